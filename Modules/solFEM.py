@@ -17,6 +17,11 @@ import numpy as np
 import scipy.sparse as sp
 import sys
 
+try:
+	import resource
+except ImportError:
+	resource = None
+
 sys.path.insert(1, '../Objects')
 
 from timeit import time
@@ -33,6 +38,13 @@ from constraints import *
 from dampings import *
 from tables import *
 from solutions import *
+from assembly import *
+from mass import *
+from factorization import *
+from results import *
+from recovery import *
+from archive import *
+from histories import *
 
 
 
@@ -354,11 +366,12 @@ their individual boundary conditions, loads and constraints.
 			assm_time_start = time.time()
 			[self.meshes[mesh].NFAT, self.meshes[mesh].NFMT, self.meshes[mesh].nDOFs] = \
 											self.nodeFreedomMapTable(self.meshes[mesh].nodes)
+			self.meshes[mesh].results = ResultStore(self.meshes[mesh])
 			self.meshes[mesh].K = []
 			self.assembleStiffnessMatrix(self.meshes[mesh])
 			self.meshes[mesh].needMassMatrix = False
 			for solution in self.meshes[mesh].solutions:
-				if inputobj.solutions[solution]['type'] in ['Eigenmodes', 'ModalDynamic']:
+				if inputobj.solutions[solution]['type'] in ['Eigenmodes', 'ModalDynamic', 'FrequencyResponse']:
 					self.meshes[mesh].needMassMatrix = True
 				elif inputobj.solutions[solution]['type'] in ['Static', 'StaticPlastic']:
 					for load in range(len(inputobj.solutions[solution]['loads'])):
@@ -367,15 +380,24 @@ their individual boundary conditions, loads and constraints.
 				else:
 					pass
 			if self.meshes[mesh].needMassMatrix == True:
-				self.assembleMassMatrix(self.meshes[mesh])
+				consistent = any(inputobj.solutions[solution]['mass'] == 'consistent' and \
+								 inputobj.solutions[solution]['type'] in ['Eigenmodes', 'ModalDynamic', 'FrequencyResponse'] \
+								 for solution in self.meshes[mesh].solutions)
+				self.assembleMassMatrix(self.meshes[mesh],consistent)
 			assm_time_stop = time.time()
 			self.assm_time = assm_time_stop - assm_time_start
-			print('\n\tAssembly time: %.3f seconds\n' % (self.assm_time))
+			print('\n\tAssembly time: %.3f seconds' % (self.assm_time))
+			print('\tPeak memory: %s' % (self.peakMemory()))
+			print('\t(stiffness matrix: %.3f seconds, of which element matrices %.3f and merge %.3f)\n' % \
+						(self.kernel_time+self.merge_time, self.kernel_time, self.merge_time))
 			print('\tModel has', len(self.meshes[mesh].nodes), 'nodes,', \
 						len(self.meshes[mesh].elements), 'elements, and\n\t', \
 						self.meshes[mesh].nDOFs, 'degrees of freedom\n')
 			print('    |------^------^------^------^------^------^------|\n\n')
-			fobj.write('\n\t\tAssembly time: %.3f seconds\n\n\n' % (self.assm_time))
+			fobj.write('\n\t\tAssembly time: %.3f seconds\n' % (self.assm_time))
+			fobj.write('\t\t(stiffness matrix: %.3f seconds, of which element matrices %.3f and merge %.3f)\n' % \
+						(self.kernel_time+self.merge_time, self.kernel_time, self.merge_time))
+			fobj.write('\t\tPeak memory: %s\n\n\n' % (self.peakMemory()))
 			fobj.write('\t\tModel has '+str(len(self.meshes[mesh].nodes))+str(' nodes, ')+ \
 						str(len(self.meshes[mesh].elements))+' elements, and\n\t\t'+ \
 						str(self.meshes[mesh].nDOFs)+' degrees of freedom\n')
@@ -384,6 +406,8 @@ their individual boundary conditions, loads and constraints.
 			# instantiate and run all solution objects listed in the *.sol-file
 			# in such an order that they will use the same mesh stiffness and
 			# mass matrices to save time and memory
+			self.meshes[mesh].factorizations = FactorizationCache()
+			self.meshes[mesh].recovery = StressRecovery(self.meshes[mesh])
 			for solution in self.meshes[mesh].solutions:
 				self.solutions[solution] = globals()[inputobj.solutions[solution]['type']](solution,self.meshes[mesh])
 				self.solutions[solution].loads = {}
@@ -400,6 +424,22 @@ their individual boundary conditions, loads and constraints.
 				self.solutions[solution].dampings = {}
 				for damp in inputobj.solutions[solution]['dampings']:
 					self.solutions[solution].dampings[damp] = self.dampings[damp]
+				if inputobj.solutions[solution]['type'] in ['Static', 'Eigenmodes']:
+					self.solutions[solution].mpcMethod = inputobj.solutions[solution]['mpc']
+				elif inputobj.solutions[solution]['mpc'] != 'lagrange':
+					print('\n\tWARNING:\n\tMPC elimination is only available for Static and Eigenmodes solutions.')
+					print('\tUsing lagrange multipliers for solution:', solution)
+				if inputobj.solutions[solution]['type'] in ['Eigenmodes', 'ModalDynamic', 'FrequencyResponse']:
+					self.solutions[solution].massMatrix = inputobj.solutions[solution]['mass']
+				elif inputobj.solutions[solution]['mass'] != 'lumped':
+					print('\n\tWARNING:\n\tConsistent mass is only available for Eigenmodes, ModalDynamic and FrequencyResponse solutions.')
+					print('\tUsing lumped mass for solution:', solution)
+				if inputobj.solutions[solution]['type'] == 'Static':
+					self.solutions[solution].averaging = inputobj.solutions[solution]['averaging']
+				elif inputobj.solutions[solution]['type'] == 'ModalDynamic':
+					self.solutions[solution].integrator = inputobj.solutions[solution]['integrator']
+				elif inputobj.solutions[solution]['type'] == 'FrequencyResponse':
+					self.solutions[solution].frequencies = inputobj.solutions[solution]['frequencies']
 				self.solutions[solution].results = {}
 				self.solutions[solution].nodesets = {}
 				self.solutions[solution].elementsets = {}
@@ -419,20 +459,19 @@ their individual boundary conditions, loads and constraints.
 							else:
 								pass
 
+			# static solutions with the same boundary conditions
+			# and constraints are solved together as load cases
+			displacements = self.solveStaticLoadCases(mesh)
+
+			for solution in self.meshes[mesh].solutions:
 				# run static solution
 				if self.solutions[solution].type == 'Static':
 					sol_time_start = time.time()
 					print('\n\n    |------^------^------^------^------^------^------|')
 					print('\tStarting solution:', solution, '(Static)')
 					print('    |------^------^------^------^------^------^------|\n')
-					print('\tApplying multipoint constraints...')
-					self.solutions[solution].applyConstraints()
-					print('\tApplying boundary conditions...')
-					self.solutions[solution].applyBoundaryConditions()
-					print('\tAssembling load vector...')
-					self.solutions[solution].assembleLoadVector()
 					print('\tCalculating displacements...')
-					self.solutions[solution].calcDisplacements()
+					self.solutions[solution].calcDisplacements(displacements[solution])
 					print('\tCalculating node forces...')
 					self.solutions[solution].calcNodeForces()
 					self.solutions[solution].calcElementForces()
@@ -441,7 +480,8 @@ their individual boundary conditions, loads and constraints.
 					self.solutions[solution].writeResults(self.name)
 					sol_time_stop = time.time()
 					sol_time = sol_time_stop - sol_time_start
-					print('\n\tSolution time: %.3f seconds\n' % (sol_time))
+					print('\n\tSolution time: %.3f seconds' % (sol_time))
+					print('\tPeak memory: %s\n' % (self.peakMemory()))
 
 				# run Eigenmodes solution
 				elif self.solutions[solution].type == 'Eigenmodes':
@@ -459,7 +499,8 @@ their individual boundary conditions, loads and constraints.
 					self.solutions[solution].writeResults(self.name)
 					sol_time_stop = time.time()
 					sol_time = sol_time_stop - sol_time_start
-					print('\n\tSolution time: %.3f seconds\n' % (sol_time))
+					print('\n\tSolution time: %.3f seconds' % (sol_time))
+					print('\tPeak memory: %s\n' % (self.peakMemory()))
 
 				# run ModalDynamic solution
 				elif self.solutions[solution].type == 'ModalDynamic':
@@ -476,13 +517,38 @@ their individual boundary conditions, loads and constraints.
 					print('\tCalculating eigenmodes...')
 					self.solutions[solution].calcEigenvalues()
 					print('\tCalculating displacements...')
-					self.solutions[solution].calcDisplacements()
+					self.solutions[solution].calcDisplacements(self.name)
 					print('\tWriting results to file...')
 					self.solutions[solution].writeResults(self.name)
 					self.solutions[solution].exportToCSV(self.name)
 					sol_time_stop = time.time()
 					sol_time = sol_time_stop - sol_time_start
-					print('\n\tSolution time: %.3f seconds\n' % (sol_time))
+					print('\n\tSolution time: %.3f seconds' % (sol_time))
+					print('\tPeak memory: %s\n' % (self.peakMemory()))
+
+				# run FrequencyResponse solution
+				elif self.solutions[solution].type == 'FrequencyResponse':
+					sol_time_start = time.time()
+					print('\n\n    |------^------^------^------^------^------^------|')
+					print('    Starting solution:', solution, '(FrequencyResponse)')
+					print('    |------^------^------^------^------^------^------|\n')
+					print('\tApplying multipoint constraints...')
+					self.solutions[solution].applyConstraints()
+					print('\tApplying boundary conditions...')
+					self.solutions[solution].applyBoundaryConditions()
+					print('\tAssembling load vector...')
+					self.solutions[solution].assembleLoadVector()
+					print('\tCalculating eigenmodes...')
+					self.solutions[solution].calcEigenvalues()
+					print('\tCalculating frequency response...')
+					self.solutions[solution].calcFrequencyResponse()
+					print('\tWriting results to file...')
+					self.solutions[solution].writeResults(self.name)
+					self.solutions[solution].exportToCSV(self.name)
+					sol_time_stop = time.time()
+					sol_time = sol_time_stop - sol_time_start
+					print('\n\tSolution time: %.3f seconds' % (sol_time))
+					print('\tPeak memory: %s\n' % (self.peakMemory()))
 
 				# run non-linear StaticPlastic solution
 				elif self.solutions[solution].type == 'StaticPlastic':
@@ -493,6 +559,12 @@ their individual boundary conditions, loads and constraints.
 	
 			print('\tDeleting stiffness matrices...')
 			del self.meshes[mesh].K
+			del self.meshes[mesh].assembler
+			if self.meshes[mesh].factorizations.reused > 0:
+				print('\tFactorizations reused:', self.meshes[mesh].factorizations.reused)
+			del self.meshes[mesh].factorizations
+			del self.meshes[mesh].recovery
+			self.meshes[mesh].topologyIndex = None
 			for solution in self.meshes[mesh].solutions:
 				if hasattr(self.solutions[solution], 'K_11'):
         			# print out stiffness-matrix by
@@ -515,8 +587,11 @@ their individual boundary conditions, loads and constraints.
 					del self.solutions[solution].K_22
 				if hasattr(self.solutions[solution], 'K_mpc'):
 					del self.solutions[solution].K_mpc
+				if hasattr(self.solutions[solution], 'partition'):
+					del self.solutions[solution].partition
 			for element in self.meshes[mesh].elements:
-				del self.meshes[mesh].elements[element].K
+				if hasattr(self.meshes[mesh].elements[element],'K'):
+					del self.meshes[mesh].elements[element].K
 				if hasattr(self.meshes[mesh].elements[element],'T_elm'):
 					del self.meshes[mesh].elements[element].T_elm
 			if self.meshes[mesh].needMassMatrix == True:
@@ -542,8 +617,9 @@ their individual boundary conditions, loads and constraints.
 #							print(0.0, end=' ')
 #					print(' ')
 				del self.meshes[mesh].M
-				for element in self.meshes[mesh].elements:
-					del self.meshes[mesh].elements[element].M
+				del self.meshes[mesh].mass
+				if hasattr(self.meshes[mesh], 'consistentM'):
+					del self.meshes[mesh].consistentM
 			print('\n\n    |------^------^------^------^------^------^------|\n')
 			fobj = open(self.name+'.res', 'a')
 			fobj.write('\n\n    |------^------^------^------^------^------^------|\n\n')
@@ -551,8 +627,22 @@ their individual boundary conditions, loads and constraints.
 			fobj.close()
 		if os.path.exists(self.name+'.out'):
 			print('\tOverwriting solution file '+self.name+'.out\n')
-		pickle.dump((self,), open(self.name+'.out', 'wb'))
+		ResultArchive(self.name+'.out').write(self)
+
+
 
+	def peakMemory(self):
+		'''
+	Peak resident memory of the process so far, as a
+	string in MB. Uses the resource module, which is
+	only available on Unix-like systems.
+	'''
+		if resource == None:
+			return 'not available'
+		peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+		if sys.platform == 'darwin':
+			peak = peak/1024.
+		return '%.1f MB' % (peak/1024.)
 
 
 	def nodeFreedomMapTable(self,nodes):
@@ -591,51 +681,100 @@ their individual boundary conditions, loads and constraints.
 	element freedom tables for each element using self.NFAT
 	and self.NFMT as input. Then merge all element stiffness
 	matrices into mesh.K matrix using their element 
-	freedom tables.
+	freedom tables. The element stiffness matrices and
+	the merge are done by an Assembler object, which is
+	kept in mesh.assembler so that the sparsity pattern
+	can be used again.
 	'''
-		row = []
-		col = []
-		data = []
 		for i in mesh.elements:
 			mesh.elements[i].elementFreedomTable(mesh.NFAT,mesh.NFMT)
-			mesh.elements[i].calcStiffnessMatrix()
-			elmDOFs = len(mesh.elements[i].K)
-			for j in range(elmDOFs):
-				for k in range(elmDOFs):
-					row.append(mesh.elements[i].EFT[k])
-					col.append(mesh.elements[i].EFT[j])
-					data.append(mesh.elements[i].K[j][k])
+		kernel_time_start = time.time()
+		mesh.assembler = Assembler(mesh)
+		stacked = mesh.assembler.calcStiffnessMatrices(mesh.elements)
+		merge_time_start = time.time()
+		mesh.K = mesh.assembler.assembleMatrix(stacked)
+		merge_time_stop = time.time()
+		self.kernel_time = merge_time_start - kernel_time_start
+		self.merge_time = merge_time_stop - merge_time_start
 
-		mesh.K = sp.coo_matrix((np.array(data),(np.array(row),np.array(col))),shape=(mesh.nDOFs,mesh.nDOFs))
-		mesh.K = mesh.K.tocsc()
 
-
-	def assembleMassMatrix(self,mesh):
+	def solveStaticLoadCases(self,mesh):
+		'''
+	Apply constraints, boundary conditions and loads
+	for all Static solutions on a mesh, and solve the
+	ones with the same fixed DOFs and MPCs together.
+	The first solution of such a group builds the
+	constraint matrix, partition and blocks of K, and
+	the others share them. Their reduced load vectors
+	are stacked as columns of one (DOFs, load cases)
+	array and solved with one factorization of K_11.
+	Returns the displacements of the free DOFs, u_1,
+	for every Static solution.
+	'''
+		loadCases = {}
+		for solution in self.meshes[mesh].solutions:
+			if self.solutions[solution].type == 'Static':
+				print('\n\tSetting up load case:', solution)
+				self.solutions[solution].setConstraintPairs()
+				self.solutions[solution].setFixedDOFs()
+				key = self.meshes[mesh].factorizations.key(self.solutions[solution].fixedDOFs,
+														   self.solutions[solution].MPCs,
+														   self.solutions[solution].ties)
+				if key not in loadCases:
+					print('\tApplying multipoint constraints...')
+					self.solutions[solution].assembleConstraintMatrix()
+					print('\tApplying boundary conditions...')
+					self.solutions[solution].partitionMatrices()
+					loadCases[key] = []
+				else:
+					print('\tUsing constraints and boundary conditions of load case:', loadCases[key][0])
+					self.solutions[solution].shareMatrices(self.solutions[loadCases[key][0]])
+				print('\tAssembling load vector...')
+				self.solutions[solution].assembleLoadVector()
+				loadCases[key].append(solution)
+
+		displacements = {}
+		for key in loadCases:
+			solutions = loadCases[key]
+			print('\n\tSolving', len(solutions), 'load case(s) with one factorization...')
+			F_1 = []
+			for solution in solutions:
+				F_1.append(self.solutions[solution].reducedLoadVector()[1])
+			F_1 = np.array(F_1).T
+			factor = self.meshes[mesh].factorizations.factorize(self.solutions[solutions[0]].K_11,
+																self.solutions[solutions[0]].fixedDOFs,
+																self.solutions[solutions[0]].MPCs,
+																self.solutions[solutions[0]].ties)
+			u_1 = factor.solve(F_1)
+			for i in range(len(solutions)):
+				displacements[solutions[i]] = u_1[:,i]
+
+		return displacements
+
+
+	def assembleMassMatrix(self,mesh,consistent=False):
 		'''
 	Assemble the global mass matrix by merging
 	all element mass matrices into mesh.M matrix
 	using their element freedom tables. mesh.M
 	only has values on the diagonal and is
 	therefore stored as a vector to save memory.
+	The element masses are kept in mesh.mass, a
+	LumpedMass object, for the loads and mass
+	properties that use them.
+
+	If a solution of the mesh uses the consistent
+	mass matrix (consistent = True) it is also
+	assembled, as the sparse matrix
+	mesh.consistentM with the sparsity pattern of
+	the stiffness matrix.
 	'''
 		print('\n\tAssembling mass matrix...')
-		mesh.M = np.zeros(mesh.nDOFs)
-		mesh.totalMass = [0., 0., 0., 0., 0., 0.]
-
-		for i in mesh.elements:
-			mesh.elements[i].calcMassMatrix()
-			elmDOFs = len(mesh.elements[i].M)
-			m = 0
-			for k in range(6):
-				if mesh.elements[i].EFS[0][k] == 1:
-					m += 1
-			k = 0
-			for j in range(elmDOFs):
-				mesh.M[mesh.elements[i].EFT[j]] += mesh.elements[i].M[j][j]
-				mesh.totalMass[k] += mesh.elements[i].M[j][j]
-				k += 1
-				if k == m:
-					k = 0
+		mesh.mass = LumpedMass(mesh)
+		[mesh.M, mesh.totalMass] = mesh.mass.assemble()
+		if consistent:
+			print('\tAssembling consistent mass matrix...')
+			mesh.consistentM = mesh.assembler.assembleMatrix(mesh.assembler.calcMassMatrices(mesh.elements,mesh.mass))
 		if mesh.totalMass[0] == mesh.totalMass[1]:
 			print('\tTotal Mass: %.4E' % (mesh.totalMass[0]))
 		else:
@@ -8,8 +8,11 @@
 #	a finite element analysis in the form of *.out files.
 #	These are binary files created by pickle, containing
 #	node objects, element objects, mesh objects,
-#	solution objects, etc. Results are from these and
-#	viewed using PyQt5 gui with OpenGL.
+#	solution objects, etc. The large result arrays are
+#	memory-mapped from the .npy files of the *.arrays
+#	directory next to the *.out file (see archive.py).
+#	Results are from these and viewed using PyQt5 gui
+#	with OpenGL.
 #	
 
 
@@ -17,7 +20,8 @@ import sys
 import re
 from math import floor, ceil
 from copy import deepcopy
-from scipy.spatial import Delaunay
+from scipy.spatial import Delaunay, cKDTree
+from scipy.sparse.csgraph import connected_components
 
 sys.path.insert(1, '../Objects')
 sys.path.insert(1, '../Modules')
@@ -1674,7 +1678,7 @@ is an OpenGL widget running inside this framework.
 				for solution in self.model.results[newResults].solutions:
 					selectResult['current']['Solution'] = solution
 					selectResult['choices'][1][solution] = {}
-					if self.model.results[newResults].solutions[solution].type != 'ModalDynamic':
+					if self.model.results[newResults].solutions[solution].type not in ['ModalDynamic', 'FrequencyResponse']:
 						for result in self.model.results[newResults].solutions[solution].results:
 							if result == 'displacement':
 								selectResult['choices'][1][solution]['displacement'] = ['x-dir', 'y-dir', 'z-dir', 'magnitude']
@@ -1898,57 +1902,35 @@ is an OpenGL widget running inside this framework.
 					else:
 						tolerance = float(str(text))
 						mesh = self.model.meshes[self.viewer.currentMesh]
-						fused_nodes = []
-						for node1 in self.model.selected_nodes:
-							for node2 in self.model.selected_nodes:
-								if node1 != node2:
-									distance = np.sqrt((mesh.nodes[node2].coord[0][0] - mesh.nodes[node1].coord[0][0])**2 + \
-											   		   (mesh.nodes[node2].coord[1][0] - mesh.nodes[node1].coord[1][0])**2 + \
-											   		   (mesh.nodes[node2].coord[2][0] - mesh.nodes[node1].coord[2][0])**2)
-									if distance <= tolerance:
-										fused_nodes.append(tuple(sorted([node1,node2])))
-						fused_nodes = sorted(set(fused_nodes))
-						to_be_deleted = sorted([i[1] for i in fused_nodes])
-						confirm_to_be_deleted = []
-						for element in mesh.elements:
-							node_in_element = False
-							elm_nodes = []
-							for node in range(len(mesh.elements[element].nodes)):
-								if mesh.elements[element].nodes[node].number in to_be_deleted:
-									# also check that no nodes that are in
-									# the same element are fused together
-									if len(elm_nodes) == 0:
-										for elm_node in mesh.elements[element].nodes:
-											elm_nodes.append(mesh.elements[element].nodes[node].number)
-									for node_combo in range(len(fused_nodes))[::-1]:
-										if mesh.elements[element].nodes[node].number in fused_nodes[node_combo]:
-											if fused_nodes[node_combo][0] in elm_nodes and fused_nodes[node_combo][1] in elm_nodes:
-												print('\tCannot fuse together two nodes that are in the same element:')
-												print('\tElement:', mesh.elements[element].number)
-												print('\nNodes:', fused_nodes[node_combo][0], 'and', fused_nodes[node_combo][1])
-											else:
-												mesh.elements[element].nodes[node] = mesh.nodes[fused_nodes[node_combo][0]]
-												confirm_to_be_deleted.append(fused_nodes[node_combo][1])
-						print('\tDeleting node(s):', end=' ')
-						deleted = []
-						for node in to_be_deleted:
-							if node in confirm_to_be_deleted:
-								if node in mesh.nodes:
-									del mesh.nodes[node]
-									deleted.append(node)
-#									print(node, end=' ')
-#						print(' ')
-
-#						print('\n\tCopying nodes:', end=' ')
-						if len(deleted) > 8:
-							for node in sorted(deleted)[:8]:
-								print(str(node)+', ', end='')
-							print('...')
+						fused = self.fusedNodes(mesh,list(self.model.selected_nodes),tolerance)
+
+						# remap the nodes of only the elements with fused
+						# nodes, found in the topology index of the mesh
+						topology = mesh.topology()
+						rows = np.unique(topology.nodeElements[topology.columns(list(fused))].indices)
+						for element in [topology.elements[row] for row in rows]:
+							nodes = mesh.elements[element].nodes
+							for k in range(len(nodes)):
+								if nodes[k].number in fused:
+									nodes[k] = mesh.nodes[fused[nodes[k].number]]
+
+						deleted = sorted([node for node in fused if node in mesh.nodes])
+						for node in deleted:
+							del mesh.nodes[node]
+						topology.remapNodes(fused)
+						if len(deleted) == 0:
+							print('\tNo nodes were fused.')
 						else:
-							print(str(sorted(deleted)[0]), end='')
-							for node in sorted(deleted)[1:]:
-								print(', '+str(node), end='')
-							print('\n')
+							print('\tDeleting node(s):', end=' ')
+							if len(deleted) > 8:
+								for node in deleted[:8]:
+									print(str(node)+', ', end='')
+								print('...')
+							else:
+								print(str(deleted[0]), end='')
+								for node in deleted[1:]:
+									print(', '+str(node), end='')
+								print('\n')
 
 						self.model.selected_nodes.clear()
 						self.model.nodesSelected = False
@@ -1961,6 +1943,61 @@ is an OpenGL widget running inside this framework.
 			print('\n\tNo mesh currently selected.')
 
 
+	def fusedNodes(self,mesh,nodes,tolerance):
+		'''
+	Find the nodes to fuse among nodes, and the node
+	each of them is fused to. Pairs of nodes within
+	tolerance of each other are found with a KD-tree,
+	and the pairs are clustered (union-find as the
+	connected components of the pairs), every cluster
+	being fused to its lowest node number.
+
+	Two nodes of the same element are never fused:
+	pairs within one element are left out, and a
+	cluster that would still bring two nodes of an
+	element together (through other nodes) is not
+	fused at all.
+
+	Returns {node: node it is fused to} for the nodes
+	that are removed.
+	'''
+		nodes = np.array(sorted(nodes),dtype=np.int64)
+		coords = np.array([[mesh.nodes[node].coord[0][0],
+							mesh.nodes[node].coord[1][0],
+							mesh.nodes[node].coord[2][0]] for node in nodes],dtype=float).reshape(-1,3)
+		pairs = cKDTree(coords).query_pairs(tolerance,output_type='ndarray')
+
+		# element-node incidence of the nodes
+		incidence = mesh.topology().incidence[:,mesh.topology().columns(nodes)].tocsc()
+		[elm, index] = incidence.nonzero()
+
+		same = np.asarray(incidence[:,pairs[:,0]].multiply(incidence[:,pairs[:,1]]).sum(axis=0)).ravel() > 0
+		if np.any(same):
+			print('\tCannot fuse together two nodes that are in the same element:')
+			print('\tNodes:', nodes[pairs[same][0,0]], 'and', nodes[pairs[same][0,1]], end='')
+			if np.count_nonzero(same) > 1:
+				print(' (and', np.count_nonzero(same)-1, 'more pair(s))')
+			else:
+				print('')
+		pairs = pairs[~same]
+
+		graph = sp.coo_matrix((np.ones(len(pairs)),(pairs[:,0],pairs[:,1])),shape=(len(nodes),len(nodes)))
+		[nClusters, cluster] = connected_components(graph,directed=False)
+		first = np.full(nClusters,len(nodes),dtype=np.int64)
+		np.minimum.at(first,cluster,np.arange(len(nodes)))
+
+		# clusters that would merge two nodes of an element
+		[key, count] = np.unique(elm*nClusters + cluster[index],return_counts=True)
+		collapsed = np.unique(key[count > 1] % nClusters)
+		if len(collapsed) != 0:
+			print('\tCannot fuse', len(collapsed), 'group(s) of nodes, that would merge two nodes of an element.')
+			first[collapsed] = -1
+
+		target = first[cluster]
+		fused = (target >= 0) & (target != np.arange(len(nodes)))
+		return dict(zip(nodes[fused].tolist(),nodes[target[fused]].tolist()))
+
+
 	def createElements(self):
 		'''
 	Create new element as specified by user input.
@@ -2082,6 +2119,7 @@ is an OpenGL widget running inside this framework.
 
 			self.model.selected_nodes.clear()
 			self.model.nodesSelected = False
+			mesh.topologyIndex = None
 			self.model.buildDisplayList(mesh)
 			self.new_mesh_view = {'Mesh': self.viewer.currentMesh}
 			self.viewer.update()
@@ -2189,6 +2227,7 @@ is an OpenGL widget running inside this framework.
 
 					self.model.selected_elements.clear()
 					self.model.elementsSelected = False
+					mesh.topologyIndex = None
 					self.model.buildDisplayList(mesh)
 					self.new_mesh_view = {'Mesh': self.viewer.currentMesh}
 					self.viewer.update()
@@ -2376,6 +2415,7 @@ is an OpenGL widget running inside this framework.
 								nodes[newNumber].number = newNumber
 								new_selected[newNumber] = nodes[newNumber]
 
+						self.model.meshes[self.viewer.currentMesh].topologyIndex = None
 						self.model.selected_nodes = new_selected
 						print('\n\tRenumbering selected nodes in', self.viewer.currentMesh)
 				else:
@@ -2413,6 +2453,7 @@ is an OpenGL widget running inside this framework.
 							new_selected[newNumber] = self.model.meshes[self.viewer.currentMesh].elements[newNumber]
 							self.model.meshes[self.viewer.currentMesh].elements[newNumber].number = newNumber
 							newNumber += 1
+						self.model.meshes[self.viewer.currentMesh].topologyIndex = None
 						self.model.selected_elements = new_selected
 						print('\n\tRenumbering selected elements in', self.viewer.currentMesh)
 				else:
@@ -2474,6 +2515,7 @@ is an OpenGL widget running inside this framework.
 						z_min = min(mesh.nodes[i].coord[2][0] for i in mesh.nodes )
 						mesh.viewScope = {'max': [x_max, y_max, z_max], 'min': [x_min, y_min, z_min]}
 						mesh.viewRadius = 1.25*max( (x_max-x_min)/2., (y_max-y_min)/2., (z_max-z_min)/2. )					
+						mesh.topologyIndex = None
 						self.model.buildDisplayList(mesh)
 						self.new_mesh_view = {'Mesh': self.viewer.currentMesh}
 						self.viewer.update()
@@ -2548,6 +2590,7 @@ is an OpenGL widget running inside this framework.
 						z_min = min(mesh.nodes[i].coord[2][0] for i in mesh.nodes )
 						mesh.viewScope = {'max': [x_max, y_max, z_max], 'min': [x_min, y_min, z_min]}
 						mesh.viewRadius = 1.25*max( (x_max-x_min)/2., (y_max-y_min)/2., (z_max-z_min)/2. )					
+						mesh.topologyIndex = None
 						self.model.buildDisplayList(mesh)
 						self.new_mesh_view = {'Mesh': self.viewer.currentMesh}
 						self.viewer.update()
@@ -2668,6 +2711,7 @@ is an OpenGL widget running inside this framework.
 					z_min = min(mesh.nodes[i].coord[2][0] for i in mesh.nodes )
 					mesh.viewScope = {'max': [x_max, y_max, z_max], 'min': [x_min, y_min, z_min]}
 					mesh.viewRadius = 1.25*max( (x_max-x_min)/2., (y_max-y_min)/2., (z_max-z_min)/2. )					
+					mesh.topologyIndex = None
 					self.model.buildDisplayList(mesh)
 					self.new_mesh_view = {'Mesh': self.viewer.currentMesh}
 					self.viewer.update()
@@ -3036,6 +3080,7 @@ is an OpenGL widget running inside this framework.
 							z_min = min(mesh.nodes[i].coord[2][0] for i in mesh.nodes )
 							mesh.viewScope = {'max': [x_max, y_max, z_max], 'min': [x_min, y_min, z_min]}
 							mesh.viewRadius = 1.25*max( (x_max-x_min)/2., (y_max-y_min)/2., (z_max-z_min)/2. )					
+							mesh.topologyIndex = None
 							self.model.buildDisplayList(mesh)
 							self.new_mesh_view = {'Mesh': self.viewer.currentMesh}
 							self.viewer.update()
@@ -3658,7 +3703,7 @@ is an OpenGL widget running inside this framework.
 					self.viewer.currentDisplayList['avg_info'] = 'None'
 				self.viewer.currentDisplayList['view radius'] = self.viewer.currentDisplayList['mesh'].viewRadius
 				self.viewer.currentDisplayList['view scope'] = self.viewer.currentDisplayList['mesh'].viewScope
-				if self.model.results[newResult].solutions[solution].type in ['Eigenmodes', 'ModalDynamic']:
+				if self.model.results[newResult].solutions[solution].type in ['Eigenmodes', 'ModalDynamic', 'FrequencyResponse']:
 					pass
 				else:
 					self.viewer.currentDisplayList['max_val'] = self.model.displayLists[solution][result][subresult]['max_val']
@@ -4257,6 +4302,21 @@ animations, loads, etc.
 						plt.title('ModalDynamics: '+solution)
 						plt.legend()
 						plt.show()
+					elif self.model.results[newResults].solutions[solution].type == 'FrequencyResponse':
+						node = int(subresult.split()[1])
+						sol = self.model.results[newResults].solutions[solution]
+						if result in ['displacement', 'velocity', 'acceleration', 'frf_accel']:
+							for dof in getattr(sol,result)[node]:
+								plt.plot(sol.f,getattr(sol,result)[node][dof]['MAGN'],label=subresult+': '+dof)
+							plt.xlabel('freq (hz)')
+						else:
+							print ('\n\tUnknown type of result for FrequencyResponse solution:', result)
+						plt.ylabel(result)
+						if result in ['displacement', 'velocity']:
+							plt.ylabel(result+'\n(relative to base if acceleration load)')
+						plt.title('FrequencyResponse: '+solution)
+						plt.legend()
+						plt.show()
 			self.gui.updateDisplayList(False,False,True)
 			self.gui.statusBar().showMessage('  RESULTS  ')
 			self.viewResults = True
@@ -5241,20 +5301,16 @@ or .sol-files.
 					d = sorted(self.selected_elements.keys())
 					print('['+str(d[0])+', '+str(d[1])+', '+str(d[2])+', '+str(d[3])+', '+str(d[4])+ \
 							', '+str(d[5])+', '+str(d[6])+', '+str(d[7])+', ...]')
+				# nodes that are only in the deleted elements are deleted
+				topology = mesh.topology()
+				del_nodes = topology.orphanedNodes(self.selected_elements)
 				for element in self.selected_elements:
-					del_nodes = []
-					for node in range(len(mesh.elements[element].nodes)):
-						del_node = True
-						for elm in mesh.elements:
-							if elm != element and mesh.elements[element].nodes[node] in \
-																	mesh.elements[elm].nodes:
-								del_node = False
-						if del_node:
-							del_nodes.append(mesh.elements[element].nodes[node])
-					for node in mesh.elements[element].nodes:
-						if node in del_nodes:
-							del mesh.nodes[node.number]
 					del mesh.elements[element]
+				for node in del_nodes:
+					if node in mesh.nodes:
+						del mesh.nodes[node]
+				topology.removeElements(self.selected_elements)
+				topology.removeNodes(del_nodes)
 			else:
 				print('\n\tDeleting selected nodes:',end=' ')
 				if len(self.selected_nodes) < 9:
@@ -5263,15 +5319,14 @@ or .sol-files.
 					d = sorted(self.selected_nodes.keys())
 					print('['+str(d[0])+', '+str(d[1])+', '+str(d[2])+', '+str(d[3])+', '+str(d[4])+ \
 							', '+str(d[5])+', '+str(d[6])+', '+str(d[7])+', ...]')
-				for node in self.selected_nodes:
-					del_node = True
-					for element in mesh.elements:
-						if self.selected_nodes[node] in mesh.elements[element].nodes:
-							del_node = False
-					if del_node:
+				topology = mesh.topology()
+				valence = topology.valence(list(self.selected_nodes))
+				for [node, count] in zip(self.selected_nodes,valence):
+					if count == 0:
 						del mesh.nodes[node]
 					else:
 						print('\n\tCannot delete node', node, 'because it is attached to an element')
+				topology.removeNodes([node for [node, count] in zip(self.selected_nodes,valence) if count == 0])
 
 			self.nodesSelected = False
 			self.selected_nodes.clear()
@@ -5480,6 +5535,7 @@ or .sol-files.
 			mesh.nodes[int(self.gui.new_node['Number'])] = \
 							Node(int(self.gui.new_node['Number']), float(self.gui.new_node['x-coordinate']), \
 									float(self.gui.new_node['y-coordinate']), float(self.gui.new_node['z-coordinate']))
+			mesh.topologyIndex = None
 			self.buildDisplayList(mesh)
 			self.gui.new_mesh_view = {'Mesh': self.gui.viewer.currentMesh}
 			print('\n\tNew node number: '+self.gui.new_node['Number'])
@@ -5493,6 +5549,7 @@ or .sol-files.
 			z_min = min(mesh.nodes[i].coord[2][0] for i in mesh.nodes )
 			mesh.viewScope = {'max': [x_max, y_max, z_max], 'min': [x_min, y_min, z_min]}
 			mesh.viewRadius = 1.25*max( (x_max-x_min)/2., (y_max-y_min)/2., (z_max-z_min)/2. )
+			mesh.topologyIndex = None
 			self.buildDisplayList(mesh)
 			self.gui.new_mesh_view = {'Mesh': self.gui.viewer.currentMesh}
 			self.elementOrientation()
@@ -5586,6 +5643,7 @@ or .sol-files.
 			z_min = min(mesh.nodes[i].coord[2][0] for i in mesh.nodes)
 			mesh.viewScope = {'max': [x_max, y_max, z_max], 'min': [x_min, y_min, z_min]}
 			mesh.viewRadius = 1.25*max( (x_max-x_min)/2., (y_max-y_min)/2., (z_max-z_min)/2. )
+			mesh.topologyIndex = None
 			self.buildDisplayList(mesh)
 			self.gui.new_mesh_view = {'Mesh': self.gui.viewer.currentMesh}
 			self.elementOrientation()
@@ -5836,6 +5894,7 @@ or .sol-files.
 			z_min = min(mesh.nodes[i].coord[2][0] for i in mesh.nodes)
 			mesh.viewScope = {'max': [x_max, y_max, z_max], 'min': [x_min, y_min, z_min]}
 			mesh.viewRadius = 1.25*max( (x_max-x_min)/2., (y_max-y_min)/2., (z_max-z_min)/2. )
+			mesh.topologyIndex = None
 			self.buildDisplayList(mesh)
 			self.gui.new_mesh_view = {'Mesh': self.gui.viewer.currentMesh}
 			self.elementOrientation()
@@ -6094,6 +6153,7 @@ or .sol-files.
 			else:
 				print('\n\tSOMETHING WENT WRONG!!!\n', element_type, 'cannot convert to', new_element_type)
 
+		mesh.topologyIndex = None
 		self.buildDisplayList(mesh)
 		self.gui.new_mesh_view = {'Mesh': self.gui.viewer.currentMesh}
 		self.elementOrientation()
@@ -6582,6 +6642,7 @@ or .sol-files.
 		z_min = min(mesh.nodes[i].coord[2][0] for i in mesh.nodes )
 		mesh.viewScope = {'max': [x_max, y_max, z_max], 'min': [x_min, y_min, z_min]}
 		mesh.viewRadius = 1.25*max( (x_max-x_min)/2., (y_max-y_min)/2., (z_max-z_min)/2. )
+		mesh.topologyIndex = None
 		self.buildDisplayList(mesh)
 #		self.externalNodes(mesh)
 		self.gui.new_mesh_view = {'Mesh': self.gui.viewer.currentMesh}
@@ -7434,6 +7495,7 @@ or .sol-files.
 			mesh.viewRadius = 1.25*max( (x_max-x_min)/2., (y_max-y_min)/2., (z_max-z_min)/2. )
 			mesh.sections_applied = False
 			self.checkForSection(mesh)
+			mesh.topologyIndex = None
 			self.buildDisplayList(mesh)
 			self.gui.new_mesh_view = {'Mesh': geom['mesh_name']}
 		
@@ -8084,7 +8146,7 @@ or .sol-files.
 				break
 		print('\n\n\tOpening file', newResults+'.out')
 		print('\t--------------------------------',end=' ')
-		self.results[newResults] = pickle.load(open(filename,'rb'))[0]
+		self.results[newResults] = ResultArchive(filename).read()
 
 		print('\n\tNew meshes available...')
 		for mesh in self.results[newResults].meshes:
@@ -13624,53 +13686,61 @@ or .sol-files.
 
 					disp_max = 0.
 					disp_min = 0.
-					for i in elements:
-						for j in range(len(elements[i].nodes)):
-							if set([elements[i].nodes[j].number]).issubset(allexternal):	
-								if subresult == 'VonMises':
-									if solution not in elements[i].solutions:
-										pass
-									elif result not in elements[i].solutions[solution]:
-										pass
-									else:
-										if nodes[elements[i].nodes[j].number].solutions[solution]['avg_stress']['VonMises'] >= disp_max:
-											disp_max = nodes[elements[i].nodes[j].number].solutions[solution]['avg_stress']['VonMises']
-										if nodes[elements[i].nodes[j].number].solutions[solution]['avg_stress']['VonMises'] <= disp_min:
-											disp_min = nodes[elements[i].nodes[j].number].solutions[solution]['avg_stress']['VonMises']
-									self.displayLists[solution][result][subresult]['avg_info'] = 'Max (avg) %.4E' % (disp_max)
-								elif subresult == 'MaxPrinc':
-									if solution not in elements[i].solutions:
-										pass
-									elif result not in elements[i].solutions[solution]:
-										pass
-									else:
-										if nodes[elements[i].nodes[j].number].solutions[solution]['avg_stress']['MaxPrinc'] >= disp_max:
-											disp_max = nodes[elements[i].nodes[j].number].solutions[solution]['avg_stress']['MaxPrinc']
-										if nodes[elements[i].nodes[j].number].solutions[solution]['avg_stress']['MaxPrinc'] <= disp_min:
-											disp_min = nodes[elements[i].nodes[j].number].solutions[solution]['avg_stress']['MaxPrinc']
-									self.displayLists[solution][result][subresult]['avg_info'] = 'Max (avg) %.4E' % (disp_max)
-								elif subresult == 'MinPrinc':
-									if solution not in elements[i].solutions:
-										pass
-									elif result not in elements[i].solutions[solution]:
-										pass
-									else:
-										if nodes[elements[i].nodes[j].number].solutions[solution]['avg_stress']['MinPrinc'] >= disp_max:
-											disp_max = nodes[elements[i].nodes[j].number].solutions[solution]['avg_stress']['MinPrinc']
-										if nodes[elements[i].nodes[j].number].solutions[solution]['avg_stress']['MinPrinc'] <= disp_min:
-											disp_min = nodes[elements[i].nodes[j].number].solutions[solution]['avg_stress']['MinPrinc']
-									self.displayLists[solution][result][subresult]['avg_info'] = 'Max (avg) %.4E' % (disp_max)
-								elif subresult == 'MaxShear':
-									if solution not in elements[i].solutions:
-										pass
-									elif result not in elements[i].solutions[solution]:
-										pass
-									else:
-										if nodes[elements[i].nodes[j].number].solutions[solution]['avg_stress']['MaxShear'] >= disp_max:
-											disp_max = nodes[elements[i].nodes[j].number].solutions[solution]['avg_stress']['MaxShear']
-										if nodes[elements[i].nodes[j].number].solutions[solution]['avg_stress']['MaxShear'] <= disp_min:
-											disp_min = nodes[elements[i].nodes[j].number].solutions[solution]['avg_stress']['MaxShear']
-									self.displayLists[solution][result][subresult]['avg_info'] = 'Max (avg) %.4E' % (disp_max)
+					if hasattr(mesh,'results'):
+						[avg_max, avg_min] = mesh.results.extremes(solution,'avg_stress',subresult,allexternal)
+						if avg_max != None:
+							disp_max = max(disp_max,avg_max)
+							disp_min = min(disp_min,avg_min)
+						if len(allexternal) != 0:
+							self.displayLists[solution][result][subresult]['avg_info'] = 'Max (avg) %.4E' % (disp_max)
+					else:
+						for i in elements:
+							for j in range(len(elements[i].nodes)):
+								if set([elements[i].nodes[j].number]).issubset(allexternal):	
+									if subresult == 'VonMises':
+										if solution not in elements[i].solutions:
+											pass
+										elif result not in elements[i].solutions[solution]:
+											pass
+										else:
+											if nodes[elements[i].nodes[j].number].solutions[solution]['avg_stress']['VonMises'] >= disp_max:
+												disp_max = nodes[elements[i].nodes[j].number].solutions[solution]['avg_stress']['VonMises']
+											if nodes[elements[i].nodes[j].number].solutions[solution]['avg_stress']['VonMises'] <= disp_min:
+												disp_min = nodes[elements[i].nodes[j].number].solutions[solution]['avg_stress']['VonMises']
+										self.displayLists[solution][result][subresult]['avg_info'] = 'Max (avg) %.4E' % (disp_max)
+									elif subresult == 'MaxPrinc':
+										if solution not in elements[i].solutions:
+											pass
+										elif result not in elements[i].solutions[solution]:
+											pass
+										else:
+											if nodes[elements[i].nodes[j].number].solutions[solution]['avg_stress']['MaxPrinc'] >= disp_max:
+												disp_max = nodes[elements[i].nodes[j].number].solutions[solution]['avg_stress']['MaxPrinc']
+											if nodes[elements[i].nodes[j].number].solutions[solution]['avg_stress']['MaxPrinc'] <= disp_min:
+												disp_min = nodes[elements[i].nodes[j].number].solutions[solution]['avg_stress']['MaxPrinc']
+										self.displayLists[solution][result][subresult]['avg_info'] = 'Max (avg) %.4E' % (disp_max)
+									elif subresult == 'MinPrinc':
+										if solution not in elements[i].solutions:
+											pass
+										elif result not in elements[i].solutions[solution]:
+											pass
+										else:
+											if nodes[elements[i].nodes[j].number].solutions[solution]['avg_stress']['MinPrinc'] >= disp_max:
+												disp_max = nodes[elements[i].nodes[j].number].solutions[solution]['avg_stress']['MinPrinc']
+											if nodes[elements[i].nodes[j].number].solutions[solution]['avg_stress']['MinPrinc'] <= disp_min:
+												disp_min = nodes[elements[i].nodes[j].number].solutions[solution]['avg_stress']['MinPrinc']
+										self.displayLists[solution][result][subresult]['avg_info'] = 'Max (avg) %.4E' % (disp_max)
+									elif subresult == 'MaxShear':
+										if solution not in elements[i].solutions:
+											pass
+										elif result not in elements[i].solutions[solution]:
+											pass
+										else:
+											if nodes[elements[i].nodes[j].number].solutions[solution]['avg_stress']['MaxShear'] >= disp_max:
+												disp_max = nodes[elements[i].nodes[j].number].solutions[solution]['avg_stress']['MaxShear']
+											if nodes[elements[i].nodes[j].number].solutions[solution]['avg_stress']['MaxShear'] <= disp_min:
+												disp_min = nodes[elements[i].nodes[j].number].solutions[solution]['avg_stress']['MaxShear']
+										self.displayLists[solution][result][subresult]['avg_info'] = 'Max (avg) %.4E' % (disp_max)
 
 					self.displayLists[solution][result][subresult]['avg_max_val'] = disp_max
 					self.displayLists[solution][result][subresult]['avg_min_val'] = disp_min
@@ -14425,53 +14495,61 @@ or .sol-files.
 
 					disp_max = 0.
 					disp_min = 0.
-					for i in elements:
-						for j in range(len(elements[i].nodes)):
-							if set([elements[i].nodes[j].number]).issubset(allexternal):	
-								if subresult == 'VonMises':
-									if solution not in elements[i].solutions:
-										pass
-									elif result not in elements[i].solutions[solution]:
-										pass
-									else:
-										if nodes[elements[i].nodes[j].number].solutions[solution]['avg_strain']['VonMises'] >= disp_max:
-											disp_max = nodes[elements[i].nodes[j].number].solutions[solution]['avg_strain']['VonMises']
-										if nodes[elements[i].nodes[j].number].solutions[solution]['avg_strain']['VonMises'] <= disp_min:
-											disp_min = nodes[elements[i].nodes[j].number].solutions[solution]['avg_strain']['VonMises']
-									self.displayLists[solution][result][subresult]['avg_info'] = 'Max (avg) %.4E' % (disp_max)
-								elif subresult == 'MaxPrinc':
-									if solution not in elements[i].solutions:
-										pass
-									elif result not in elements[i].solutions[solution]:
-										pass
-									else:
-										if nodes[elements[i].nodes[j].number].solutions[solution]['avg_strain']['MaxPrinc'] >= disp_max:
-											disp_max = nodes[elements[i].nodes[j].number].solutions[solution]['avg_strain']['MaxPrinc']
-										if nodes[elements[i].nodes[j].number].solutions[solution]['avg_strain']['MaxPrinc'] <= disp_min:
-											disp_min = nodes[elements[i].nodes[j].number].solutions[solution]['avg_strain']
-									self.displayLists[solution][result][subresult]['avg_info'] = 'Max (avg) %.4E' % (disp_max)
-								elif subresult == 'MinPrinc':
-									if solution not in elements[i].solutions:
-										pass
-									elif result not in elements[i].solutions[solution]:
-										pass
-									else:
-										if nodes[elements[i].nodes[j].number].solutions[solution]['avg_strain']['MinPrinc'] >= disp_max:
-											disp_max = nodes[elements[i].nodes[j].number].solutions[solution]['avg_strain']['MinPrinc']
-										if nodes[elements[i].nodes[j].number].solutions[solution]['avg_strain']['MinPrinc'] <= disp_min:
-											disp_min = nodes[elements[i].nodes[j].number].solutions[solution]['avg_strain']['MinPrinc']
-									self.displayLists[solution][result][subresult]['avg_info'] = 'Max (avg) %.4E' % (disp_max)
-								elif subresult == 'MaxShear':
-									if solution not in elements[i].solutions:
-										pass
-									elif result not in elements[i].solutions[solution]:
-										pass
-									else:
-										if nodes[elements[i].nodes[j].number].solutions[solution]['avg_strain']['MaxShear'] >= disp_max:
-											disp_max = nodes[elements[i].nodes[j].number].solutions[solution]['avg_strain']['MaxShear']
-										if nodes[elements[i].nodes[j].number].solutions[solution]['avg_strain']['MaxShear'] <= disp_min:
-											disp_min = nodes[elements[i].nodes[j].number].solutions[solution]['avg_strain']['MaxShear']
-									self.displayLists[solution][result][subresult]['avg_info'] = 'Max (avg) %.4E' % (disp_max)
+					if hasattr(mesh,'results'):
+						[avg_max, avg_min] = mesh.results.extremes(solution,'avg_strain',subresult,allexternal)
+						if avg_max != None:
+							disp_max = max(disp_max,avg_max)
+							disp_min = min(disp_min,avg_min)
+						if len(allexternal) != 0:
+							self.displayLists[solution][result][subresult]['avg_info'] = 'Max (avg) %.4E' % (disp_max)
+					else:
+						for i in elements:
+							for j in range(len(elements[i].nodes)):
+								if set([elements[i].nodes[j].number]).issubset(allexternal):	
+									if subresult == 'VonMises':
+										if solution not in elements[i].solutions:
+											pass
+										elif result not in elements[i].solutions[solution]:
+											pass
+										else:
+											if nodes[elements[i].nodes[j].number].solutions[solution]['avg_strain']['VonMises'] >= disp_max:
+												disp_max = nodes[elements[i].nodes[j].number].solutions[solution]['avg_strain']['VonMises']
+											if nodes[elements[i].nodes[j].number].solutions[solution]['avg_strain']['VonMises'] <= disp_min:
+												disp_min = nodes[elements[i].nodes[j].number].solutions[solution]['avg_strain']['VonMises']
+										self.displayLists[solution][result][subresult]['avg_info'] = 'Max (avg) %.4E' % (disp_max)
+									elif subresult == 'MaxPrinc':
+										if solution not in elements[i].solutions:
+											pass
+										elif result not in elements[i].solutions[solution]:
+											pass
+										else:
+											if nodes[elements[i].nodes[j].number].solutions[solution]['avg_strain']['MaxPrinc'] >= disp_max:
+												disp_max = nodes[elements[i].nodes[j].number].solutions[solution]['avg_strain']['MaxPrinc']
+											if nodes[elements[i].nodes[j].number].solutions[solution]['avg_strain']['MaxPrinc'] <= disp_min:
+												disp_min = nodes[elements[i].nodes[j].number].solutions[solution]['avg_strain']
+										self.displayLists[solution][result][subresult]['avg_info'] = 'Max (avg) %.4E' % (disp_max)
+									elif subresult == 'MinPrinc':
+										if solution not in elements[i].solutions:
+											pass
+										elif result not in elements[i].solutions[solution]:
+											pass
+										else:
+											if nodes[elements[i].nodes[j].number].solutions[solution]['avg_strain']['MinPrinc'] >= disp_max:
+												disp_max = nodes[elements[i].nodes[j].number].solutions[solution]['avg_strain']['MinPrinc']
+											if nodes[elements[i].nodes[j].number].solutions[solution]['avg_strain']['MinPrinc'] <= disp_min:
+												disp_min = nodes[elements[i].nodes[j].number].solutions[solution]['avg_strain']['MinPrinc']
+										self.displayLists[solution][result][subresult]['avg_info'] = 'Max (avg) %.4E' % (disp_max)
+									elif subresult == 'MaxShear':
+										if solution not in elements[i].solutions:
+											pass
+										elif result not in elements[i].solutions[solution]:
+											pass
+										else:
+											if nodes[elements[i].nodes[j].number].solutions[solution]['avg_strain']['MaxShear'] >= disp_max:
+												disp_max = nodes[elements[i].nodes[j].number].solutions[solution]['avg_strain']['MaxShear']
+											if nodes[elements[i].nodes[j].number].solutions[solution]['avg_strain']['MaxShear'] <= disp_min:
+												disp_min = nodes[elements[i].nodes[j].number].solutions[solution]['avg_strain']['MaxShear']
+										self.displayLists[solution][result][subresult]['avg_info'] = 'Max (avg) %.4E' % (disp_max)
 
 					self.displayLists[solution][result][subresult]['avg_max_val'] = disp_max
 					self.displayLists[solution][result][subresult]['avg_min_val'] = disp_min
@@ -15978,7 +16056,7 @@ or .sol-files.
 				elif result == 'strainenergy':
 					pass
 
-			elif self.results[newResult].solutions[solution].type == 'ModalDynamic':
+			elif self.results[newResult].solutions[solution].type in ['ModalDynamic', 'FrequencyResponse']:
 
 				self.displayLists[solution][result][subresult]['nodes'] = mesh.displayLists['nodes']
 				self.displayLists[solution][result][subresult]['wireframe'] = mesh.displayLists['wireframe']
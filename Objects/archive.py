@@ -0,0 +1,187 @@
+#
+#
+#	archive.py
+#  ------------
+#
+#	This is the archive module. It writes the model of a solved
+#	.sol-file to the .out-file, with the large numpy arrays of the
+#	results (result fields, eigenvectors, time histories) stored as
+#	.npy files in a directory next to it instead of in the pickle.
+#	When the .out-file is opened the arrays are memory-mapped, so
+#	that only the parts of the results that are used are read.
+#
+
+
+import os
+import mmap
+import json
+import pickle
+import numpy as np
+
+
+
+
+
+class ResultArchive(object):
+	'''
+Binary result files of a model. The model is pickled
+to the .out-file as before, but every numpy array of
+at least minimumSize bytes is written to the
+directory <name>.arrays as a .npy file and replaced in
+the pickle by its key. index.json in the directory has
+the format version and the shape and dtype of every
+array, by key. Arrays that are memory maps of whole
+.npy files in the array directory (the time histories
+of dynamic solutions, see histories.py) are not copied,
+the pickle only keeps their key.
+
+Reading the .out-file opens the arrays as memory maps
+(copy-on-write, so the files are never changed), which
+takes the same time for any size of the results. An
+.out-file written without arrays is read as a plain
+pickle. A file in the array directory is never
+written over in place: it is removed first and the
+array written to a new file, since the model in the
+viewer may still have the old file memory-mapped
+when the .sol-file is solved again (on Linux a
+truncated mapped file ends the program with a bus
+error, and on Windows a mapped file can not be
+written to).
+
+self.filename	- name of the .out-file
+self.directory	- directory with the arrays
+self.index		- shape and dtype of the arrays by key
+self.keys		- key of every array written, by id
+'''
+	version = 1
+	minimumSize = 65536
+
+	def __init__(self,filename):
+		self.filename = filename
+		self.directory = os.path.splitext(filename)[0]+'.arrays'
+		self.index = {}
+		self.keys = {}
+
+
+	def write(self,model):
+		'''
+	Write the model to the .out-file and its large
+	arrays to the array directory. Arrays of an
+	earlier solution of the same file that are not
+	used any more are removed afterwards, since the
+	time histories of the solution may already have
+	been written to the directory.
+	'''
+		previous = self.readIndex()
+		self.index = {}
+		self.keys = {}
+		fobj = open(self.filename, 'wb')
+		pickler = pickle.Pickler(fobj,pickle.HIGHEST_PROTOCOL)
+		pickler.persistent_id = self.persistentID
+		pickler.dump((model,))
+		fobj.close()
+		if len(self.index) != 0:
+			fobj = open(os.path.join(self.directory,'index.json'), 'w')
+			json.dump({'version': self.version, 'arrays': self.index},fobj,indent=1)
+			fobj.close()
+		elif os.path.exists(os.path.join(self.directory,'index.json')):
+			os.remove(os.path.join(self.directory,'index.json'))
+		for key in previous:
+			if key not in self.index and os.path.exists(os.path.join(self.directory,key+'.npy')):
+				os.remove(os.path.join(self.directory,key+'.npy'))
+		self.keys = {}
+
+
+	def read(self):
+		'''
+	Read the model from the .out-file, with the
+	arrays memory-mapped from the array directory.
+	'''
+		self.index = self.readIndex()
+		fobj = open(self.filename, 'rb')
+		unpickler = pickle.Unpickler(fobj)
+		unpickler.persistent_load = self.persistentLoad
+		model = unpickler.load()[0]
+		fobj.close()
+		return model
+
+
+	def readIndex(self):
+		'''
+	Arrays listed in index.json of the array
+	directory, or no arrays if there is none.
+	'''
+		path = os.path.join(self.directory,'index.json')
+		if not os.path.exists(path):
+			return {}
+		fobj = open(path, 'r')
+		index = json.load(fobj)
+		fobj.close()
+		if index['version'] > self.version:
+			print('\n\tWARNING: '+self.directory+' was written by a newer version (%d)' % (index['version']))
+		return index['arrays']
+
+
+	def path(self,key):
+		'''
+	File of the array with key, in the array
+	directory (which is created if needed).
+	'''
+		if not os.path.exists(self.directory):
+			os.makedirs(self.directory)
+		return os.path.join(self.directory,key+'.npy')
+
+
+	def newPath(self,key):
+		'''
+	File of the array with key, with an earlier
+	file of the key removed so that memory maps
+	of it stay valid.
+	'''
+		path = self.path(key)
+		if os.path.exists(path):
+			os.remove(path)
+		return path
+
+
+	def persistentID(self,obj):
+		'''
+	Key of an array that is written to the array
+	directory, or None for objects that are pickled.
+	'''
+		if not isinstance(obj,np.ndarray):
+			return None
+		if id(obj) in self.keys:
+			return self.keys[id(obj)][0]
+		if self.isArchived(obj):
+			key = os.path.basename(obj.filename)[:-4]
+			obj.flush()
+		elif obj.nbytes < self.minimumSize or obj.dtype.hasobject:
+			return None
+		else:
+			key = 'array_%06d' % (len(self.index))
+			np.save(self.newPath(key),obj)
+		self.index[key] = {'shape': list(obj.shape), 'dtype': str(obj.dtype)}
+		self.keys[id(obj)] = (key, obj)
+		return key
+
+
+	def isArchived(self,obj):
+		'''
+	True if obj is a memory map of a whole .npy
+	file in the array directory.
+	'''
+		if not isinstance(obj,np.memmap) or not isinstance(obj.base,mmap.mmap):
+			return False
+		if obj.filename is None or not obj.filename.endswith('.npy'):
+			return False
+		return os.path.dirname(obj.filename) == os.path.abspath(self.directory)
+
+
+	def persistentLoad(self,key):
+		'''
+	Memory map of the array with key.
+	'''
+		if key not in self.index:
+			raise pickle.UnpicklingError('array '+str(key)+' missing from '+self.directory)
+		return np.load(self.path(key),mmap_mode='c')
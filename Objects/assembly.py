@@ -0,0 +1,230 @@
+#
+#
+#	assembly.py
+#  -------------
+#
+#	This is the assembly module. It merges element matrices into
+#	global sparse matrices. Elements are grouped by type so that
+#	their element freedom tables and element matrices can be stacked
+#	into arrays, and the global matrix is built in one step from a
+#	sparsity pattern that is set up only once per mesh. The
+#	consistent mass matrix is merged with the same pattern as the
+#	stiffness matrix.
+#
+
+
+import numpy as np
+import scipy.sparse as sp
+
+
+
+
+
+
+class Assembler(object):
+	'''
+Assembly engine for global matrices. Elements of the
+same type are grouped together, and their element
+freedom tables are stacked into an (n_elm, elmDOFs)
+integer array. The sparsity pattern of the global
+matrix (in CSC format) is set up once from these
+tables, together with a map from every element matrix
+entry to its place in the global matrix. Any global
+matrix with the same pattern (stiffness, mass) is then
+merged in one step from stacked element matrices.
+
+self.nDOFs		- total degrees of freedom for mesh
+self.groups		- element numbers and EFT arrays per element type
+self.indices	- CSC row indices of global matrix
+self.indptr		- CSC column pointers of global matrix
+self.merge		- position in CSC data of each element matrix entry
+keepStiffness	- element types that keep their element
+				  stiffness matrix for the element forces
+'''
+	keepStiffness = ['ROD2N2D', 'BEAM2N2D', 'ROD2N', 'BEAM2N']
+
+	def __init__(self,mesh):
+		self.nDOFs = mesh.nDOFs
+		self.groups = {}
+		for i in mesh.elements:
+			key = (mesh.elements[i].type, len(mesh.elements[i].EFT))
+			if key not in self.groups:
+				self.groups[key] = {'elements': [], 'EFT': []}
+			self.groups[key]['elements'].append(i)
+			self.groups[key]['EFT'].append(mesh.elements[i].EFT)
+		for key in self.groups:
+			self.groups[key]['EFT'] = np.array(self.groups[key]['EFT'], dtype=np.int64).reshape(-1,key[1])
+		self.sparsityPattern()
+
+
+	def sparsityPattern(self):
+		'''
+	Set up the CSC sparsity pattern of the global
+	matrix. Entry [j][k] of an element matrix goes to
+	row EFT[k] and column EFT[j] of the global matrix.
+	Every entry gets a key (column*nDOFs + row), and the
+	unique keys sorted give the CSC row indices and
+	column pointers directly.
+	'''
+		keys = []
+		for key in self.groups:
+			EFT = self.groups[key]['EFT']
+			keys.append((EFT[:,:,None]*self.nDOFs + EFT[:,None,:]).ravel())
+		if len(keys) == 0:
+			keys = [np.zeros(0, dtype=np.int64)]
+		keys = np.concatenate(keys)
+		unique, self.merge = np.unique(keys, return_inverse=True)
+		if len(unique) < np.iinfo(np.int32).max:
+			idx_dtype = np.int32
+		else:
+			idx_dtype = np.int64
+		self.indices = (unique % self.nDOFs).astype(idx_dtype)
+		self.indptr = np.zeros(self.nDOFs+1, dtype=idx_dtype)
+		self.indptr[1:] = np.cumsum(np.bincount(unique // self.nDOFs, minlength=self.nDOFs))
+
+
+	def calcStiffnessMatrices(self,elements):
+		'''
+	Calculate the element stiffness matrices for every
+	element group and return them stacked. Groups of
+	solid elements that have a batched kernel (HEX8N,
+	HEX20N and TET10N) are calculated in one call per
+	group by solidStiffnessMatrices. All
+	other elements use their own calcStiffnessMatrix.
+	The element stiffness matrices are only kept on
+	the elements that use them to calculate element
+	forces (see keepStiffness), the others are
+	released once they are stacked.
+	'''
+		stacked = {}
+		for key in self.groups:
+			numbers = self.groups[key]['elements']
+			if key[0] in ['HEX8N','HEX20N','TET10N']:
+				stacked[key] = self.solidStiffnessMatrices(elements,numbers)
+			else:
+				stacked[key] = np.empty((len(numbers),key[1],key[1]))
+				for e, i in enumerate(numbers):
+					elements[i].calcStiffnessMatrix()
+					stacked[key][e] = elements[i].K
+					if key[0] not in self.keepStiffness:
+						del elements[i].K
+		return stacked
+
+
+	def solidStiffnessMatrices(self,elements,numbers,chunk=1024):
+		'''
+	Batched stiffness kernel for 3D solid elements of
+	one type. Jacobians, determinants, B-matrices and
+	the B^T*E*B contributions are calculated for all
+	elements (in chunks of at most chunk elements)
+	and all Gauss points at once, using the shape
+	function table of the element type in GaussQuad.
+
+	X			- node coordinates (n_elm, nodes, 3)
+	J			- Jacobians (n_elm, gauss, 3, 3)
+	dNf_drc		- shape function derivatives in global
+				  coordinates (n_elm, gauss, 3, nodes)
+	B			- strain-displacement matrices at all
+				  Gauss points (n_elm, gauss, 6, 3*nodes)
+	'''
+		table = elements[numbers[0]].gaussQuad.shapeFunctionTable(elements[numbers[0]],'gauss')
+		dNf_dqc = table['dNf_dqc']
+		w = table['w']
+		nodeNum = dNf_dqc.shape[1]
+		elmDOFs = 3*nodeNum
+		X = np.array([[[node.coord[0][0], node.coord[1][0], node.coord[2][0]] \
+						for node in elements[i].nodes] for i in numbers]).reshape(-1,nodeNum,3)
+		E = np.array([elements[i].section.E for i in numbers])
+		K = np.empty((len(numbers),elmDOFs,elmDOFs))
+		for start in range(0,len(numbers),chunk):
+			stop = min(start+chunk,len(numbers))
+			J = np.einsum('eai,gaj->egij',X[start:stop],dNf_dqc)
+			detJ = np.linalg.det(J)
+			dNf_drc = np.einsum('gaj,egji->egia',dNf_dqc,np.linalg.inv(J))
+			B = np.zeros((stop-start,len(w),6,elmDOFs))
+			B[:,:,0,0::3] = dNf_drc[:,:,0]
+			B[:,:,1,1::3] = dNf_drc[:,:,1]
+			B[:,:,2,2::3] = dNf_drc[:,:,2]
+			B[:,:,3,0::3] = dNf_drc[:,:,1]
+			B[:,:,3,1::3] = dNf_drc[:,:,0]
+			B[:,:,4,1::3] = dNf_drc[:,:,2]
+			B[:,:,4,2::3] = dNf_drc[:,:,1]
+			B[:,:,5,0::3] = dNf_drc[:,:,2]
+			B[:,:,5,2::3] = dNf_drc[:,:,0]
+			EB = np.matmul(E[start:stop,None],B)*(w*detJ)[:,:,None,None]
+			B = B.reshape(stop-start,-1,elmDOFs)
+			EB = EB.reshape(stop-start,-1,elmDOFs)
+			K[start:stop] = np.matmul(B.transpose(0,2,1),EB)
+		return K
+
+
+	def calcMassMatrices(self,elements,lumped):
+		'''
+	Calculate the consistent element mass matrices for
+	every element group and return them stacked. Groups
+	of solid elements with a batched kernel (HEX8N,
+	HEX20N and TET10N) are calculated in one call per
+	group by solidMassMatrices. The other elements keep
+	their lumped masses (from lumped, the LumpedMass of
+	the mesh) on the diagonal.
+	'''
+		stacked = {}
+		for key in self.groups:
+			numbers = self.groups[key]['elements']
+			if key[0] in ['HEX8N','HEX20N','TET10N']:
+				stacked[key] = self.solidMassMatrices(elements,numbers)
+			else:
+				stacked[key] = np.zeros((len(numbers),key[1],key[1]))
+				stacked[key][:,np.arange(key[1]),np.arange(key[1])] = lumped.DOFMasses(key)
+		return stacked
+
+
+	def solidMassMatrices(self,elements,numbers,chunk=1024):
+		'''
+	Batched consistent mass kernel for 3D solid elements
+	of one type,
+
+		M = sum( rho N^T N detJ w )
+
+	over the integration points of the mass matrix
+	(see massIntegrationPoints of the elements), for all
+	elements (in chunks of at most chunk elements) at
+	once. The mass is the same in the three directions,
+	so it is calculated for the nodes (m) and spread to
+	the x, y and z DOFs of the nodes.
+
+	X			- node coordinates (n_elm, nodes, 3)
+	J			- Jacobians (n_elm, points, 3, 3)
+	m			- nodal mass matrices (n_elm, nodes, nodes)
+	'''
+		table = elements[numbers[0]].gaussQuad.shapeFunctionTable(elements[numbers[0]],'mass')
+		N = table['N']
+		dNf_dqc = table['dNf_dqc']
+		w = table['w']
+		nodeNum = N.shape[1]
+		X = np.array([[[node.coord[0][0], node.coord[1][0], node.coord[2][0]] \
+						for node in elements[i].nodes] for i in numbers]).reshape(-1,nodeNum,3)
+		rho = np.array([elements[i].section.material.density for i in numbers],dtype=float)
+		M = np.zeros((len(numbers),3*nodeNum,3*nodeNum))
+		for start in range(0,len(numbers),chunk):
+			stop = min(start+chunk,len(numbers))
+			J = np.einsum('eai,gaj->egij',X[start:stop],dNf_dqc)
+			detJ = np.linalg.det(J)
+			m = np.einsum('eg,ga,gb->eab',rho[start:stop,None]*detJ*w,N,N)
+			for i in range(3):
+				M[start:stop,i::3,i::3] = m
+		return M
+
+
+	def assembleMatrix(self,stacked):
+		'''
+	Merge stacked element matrices into a global
+	sparse matrix using the precomputed sparsity pattern.
+	The stacked matrices must be given for every element
+	group, in the same order as self.groups.
+	'''
+		data = [stacked[key].ravel() for key in self.groups]
+		if len(data) == 0:
+			data = [np.zeros(0)]
+		data = np.bincount(self.merge, weights=np.concatenate(data), minlength=len(self.indices))
+		return sp.csc_matrix((data,self.indices,self.indptr),shape=(self.nDOFs,self.nDOFs))
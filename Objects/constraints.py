@@ -10,6 +10,7 @@
 
 
 import numpy as np
+from scipy.spatial import cKDTree
 
 
 
@@ -71,17 +72,51 @@ tolerance distance of each other.
 	def setupNodePairs(self,mesh):
 		'''
 	Set up a dictionary with all nodepairs that will
-	be used to set up the lagrange multipliers.
+	be used to set up the lagrange multipliers. The
+	nodes of nodeset2 within the tolerance of each
+	node of nodeset1 are found with a KD-tree of the
+	node coordinates, and the pairs are numbered in
+	the order of the two nodesets.
+
+	For nodes of either set that are not paired with
+	any node, the distance to the nearest node of the
+	other set is reported, so that the tolerance can
+	be adjusted without solving again.
 	'''
+		coord1 = self.coordinates(mesh,self.nodeset1)
+		coord2 = self.coordinates(mesh,self.nodeset2)
 		self.nodePairs = {}
-		pair = 0
-		for node1 in self.nodeset1:
-			for node2 in self.nodeset2:
-				if np.sqrt((mesh.nodes[node1].coord[0][0] - mesh.nodes[node2].coord[0][0])**2 + \
-							(mesh.nodes[node1].coord[1][0] - mesh.nodes[node2].coord[1][0])**2 + \
-							(mesh.nodes[node1].coord[2][0] - mesh.nodes[node2].coord[2][0])**2) < self.tolerance:
-					self.nodePairs[pair] = [node1, node2]
-					pair += 1
+		if len(coord1) == 0 or len(coord2) == 0:
+			return
+		tree = cKDTree(coord2)
+		found = tree.query_ball_point(coord1,self.tolerance,return_sorted=True)
+		i = np.repeat(np.arange(len(coord1)),[len(j) for j in found])
+		j = np.array([j for nodes in found for j in nodes],dtype=np.int64)
+		within = np.sqrt(((coord1[i]-coord2[j])**2).sum(axis=1)) < self.tolerance
+		[i, j] = [i[within], j[within]]
+		for pair in range(len(i)):
+			self.nodePairs[pair] = [self.nodeset1[i[pair]], self.nodeset2[j[pair]]]
+
+		paired1 = np.zeros(len(coord1),dtype=bool)
+		paired2 = np.zeros(len(coord2),dtype=bool)
+		paired1[i] = True
+		paired2[j] = True
+		missed = np.concatenate((tree.query(coord1[~paired1])[0],
+								 cKDTree(coord1).query(coord2[~paired2])[0]))
+		if len(missed) != 0:
+			print('\n\tWARNING:\n\t'+self.name+':', len(missed), 'node(s) without a pair within tolerance', self.tolerance)
+			print('\tDistance to nearest node in other nodeset: min %.4E, mean %.4E, max %.4E' % \
+						(missed.min(), missed.mean(), missed.max()))
+
+
+	def coordinates(self,mesh,nodeset):
+		'''
+	Coordinates of the nodes in nodeset as an
+	(n, 3) array.
+	'''
+		return np.array([[mesh.nodes[node].coord[0][0],
+						  mesh.nodes[node].coord[1][0],
+						  mesh.nodes[node].coord[2][0]] for node in nodeset],dtype=float).reshape(-1,3)
 
 
 
@@ -25,6 +25,10 @@ access to individual element integration
 - quad for quad and hex elements
 - tri for triangle elements
 - tet for tetrahedral elements
+- tet_mass for the consistent mass matrix of
+  tetrahedral elements, a conical product rule
+  of 4x4x4 Gauss points (exact for polynomials
+  up to order 7), as [points, weights]
 '''
 	def __init__(self):
 		self.quad_p1 = [[0.0,2.0],]
@@ -45,6 +49,66 @@ access to individual element integration
 					   [0.138196601125011, 0.138196601125011, 0.585410196624968, 0.138196601125011],
 					   [0.138196601125011, 0.138196601125011, 0.138196601125011, 0.585410196624968], 
 					    0.25]
+		self.tet_mass = self.conicalProductRule(4)
+		self.tables = {}
+
+
+	def conicalProductRule(self,n):
+		'''
+	Integration rule for the reference tetrahedron with
+	n*n*n points, from Gauss points on the unit cube
+	mapped to the tetrahedron (zeta2 = a, zeta3 = b(1-a),
+	zeta4 = c(1-a)(1-b)). The weights are scaled by the
+	volume of the reference tetrahedron (they sum to
+	1/6), as the weights of tet_p4 in integrationPoints.
+	'''
+		[x, w] = np.polynomial.legendre.leggauss(n)
+		[x, w] = [(x+1.0)/2.0, w/2.0]
+		qc = []
+		weights = []
+		for i in range(n):
+			for j in range(n):
+				for k in range(n):
+					zeta2 = x[i]
+					zeta3 = x[j]*(1.0-x[i])
+					zeta4 = x[k]*(1.0-x[i])*(1.0-x[j])
+					qc.append([1.0-zeta2-zeta3-zeta4, zeta2, zeta3, zeta4])
+					weights.append(w[i]*w[j]*w[k]*(1.0-x[i])**2*(1.0-x[j]))
+		return [qc, weights]
+
+
+	def shapeFunctionTable(self,element,points):
+		'''
+	Shape functions and their derivatives with respect
+	to the natural coordinates for an element type, at
+	the integration points (points = 'gauss'), at the
+	integration points of the consistent mass matrix
+	(points = 'mass') or at the points where nodal
+	results are calculated (points = 'nodal'). They are
+	the same for all elements of a type and integration
+	rule, so each table is only calculated the first
+	time it is asked for.
+
+	N			- shape functions (points, nodes)
+	dNf_dqc		- shape function derivatives
+				  (points, nodes, natural coordinates)
+	w			- integration weights (points), scaled
+				  by the size of the reference element
+				  for triangles and tetrahedrons
+	'''
+		key = (element.type, points, len(element.gaussPnts))
+		if key not in self.tables:
+			if points == 'gauss':
+				[qc, w] = element.integrationPoints()
+			elif points == 'mass':
+				[qc, w] = element.massIntegrationPoints()
+			else:
+				qc = element.nodalPoints()
+				w = [0.,]*len(qc)
+			self.tables[key] = {'N': np.array([element.shapeFunctions(*q) for q in qc]),
+								'dNf_dqc': np.array([element.shapeFunctionDerivatives(*q) for q in qc]),
+								'w': np.array(w)}
+		return self.tables[key]
 
 
 
@@ -62,6 +126,14 @@ section properties and nodes listed in an array.
 		self.solutions = {}
 
 
+	def nodeCoordinates(self):
+		'''
+	Node coordinates of element as an
+	array with one row per node.
+	'''
+		return np.array([[node.coord[0][0], node.coord[1][0], node.coord[2][0]] for node in self.nodes])
+
+
 	def elementFreedomTable(self,NFAT,NFMT):
 		'''
 	Create element freedom table for mapping element
@@ -121,11 +193,10 @@ Has between 1 and 6 active degrees of freedom.
 	def calcMassMatrix(self):
 		'''
 	Calculate the element mass matrix using the
-	lumped mass matrix method.
+	lumped mass matrix method, stored as the vector
+	of its diagonal.
 	'''
-		self.M = np.array([[self.section.mass[0], 0., 0.],
-							   [0., self.section.mass[1], 0.],
-							   [0., 0., self.section.mass[5]]])
+		self.M = np.array([self.section.mass[0], self.section.mass[1], self.section.mass[5]],dtype=float)
 
 
 
@@ -172,14 +243,11 @@ Has between 1 and 6 active degrees of freedom.
 	def calcMassMatrix(self):
 		'''
 	Calculate the element mass matrix using the
-	lumped mass matrix method.
+	lumped mass matrix method, stored as the vector
+	of its diagonal.
 	'''
-		self.M = np.array([[self.section.mass[0], 0., 0., 0., 0., 0.],
-						   [0., self.section.mass[1], 0., 0., 0., 0.],
-						   [0., 0., self.section.mass[2], 0., 0., 0.],
-						   [0., 0., 0., self.section.mass[3], 0., 0.],
-						   [0., 0., 0., 0., self.section.mass[4], 0.],
-						   [0., 0., 0., 0., 0., self.section.mass[5]]])
+		self.M = np.array([self.section.mass[0], self.section.mass[1], self.section.mass[2],
+						   self.section.mass[3], self.section.mass[4], self.section.mass[5]],dtype=float)
 
 
 	def calcStrain(self,u,calcStrain,calcStress,sol):
@@ -326,9 +394,10 @@ Has two active degrees of freedom per node.
 	def calcMassMatrix(self):
 		'''
 	Calculate the element mass matrix using the
-	lumped mass matrix method.
+	lumped mass matrix method, stored as the vector
+	of its diagonal.
 	'''
-		self.M = np.identity(4)*(self.section.material.density*self.section.area*self.length*0.5)
+		self.M = np.full(4,self.section.material.density*self.section.area*self.length*0.5)
 
 
 	def calcForces(self,u,sol):
@@ -475,11 +544,11 @@ Has three active degrees of fredom per node.
 	def calcMassMatrix(self):
 		'''
 	Calculate the element mass matrix using the
-	lumped mass matrix method.
+	lumped mass matrix method, stored as the vector
+	of its diagonal.
 	'''
-		self.M = np.identity(6)*(self.section.material.density*self.section.area*self.length*0.5)
-		self.M[2][2] = self.M[2][2]*((self.length**2)/12)
-		self.M[5][5] = self.M[5][5]*((self.length**2)/12)
+		self.M = np.full(6,self.section.material.density*self.section.area*self.length*0.5)
+		self.M[[2,5]] = self.M[[2,5]]*((self.length**2)/12)
 
 
 	def calcEquivalentNodalForces(self,distForce,freeDOFs):
@@ -636,12 +705,13 @@ value everywhere on the element.
 	def calcMassMatrix(self):
 		'''
 	Calculate the element mass matrix using the
-	lumped mass matrix method.
+	lumped mass matrix method, stored as the vector
+	of its diagonal.
 	'''
 		area = abs(self.nodes[0].coord[0][0]*(self.nodes[1].coord[1][0]-self.nodes[2].coord[1][0]) + \
 				   self.nodes[1].coord[0][0]*(self.nodes[2].coord[1][0]-self.nodes[0].coord[1][0]) + \
 				   self.nodes[2].coord[0][0]*(self.nodes[0].coord[1][0]-self.nodes[1].coord[1][0]))*0.5
-		self.M = np.identity(6)*(self.section.material.density*area*self.section.thickness*(1.0/3.0))
+		self.M = np.full(6,self.section.material.density*area*self.section.thickness*(1.0/3.0))
 
 
 	def calcStrain(self,u,calcStrain,calcStress,sol):
@@ -706,6 +776,7 @@ Has two active degrees of freedom per node.
 6 nodes gives 12 degrees of freedom total.
 '''
 	def __init__(self,number,sect,nodes,gaussQuad):
+		self.gaussQuad = gaussQuad
 		self.gaussPnts = gaussQuad.tri_p3
 		super(TRI6N,self).__init__(number,sect,nodes)
 		self.EFS = [[1,1,0,0,0,0],]*6
@@ -724,35 +795,67 @@ Has two active degrees of freedom per node.
 				self.nodes[i].NFS[1] = 1
 
 
-	def calcStrainDisplacementMatrix(self,zeta1,zeta2,zeta3):
+	def shapeFunctions(self,zeta1,zeta2,zeta3):
+		'''
+	Shape functions given specific
+	triangular coordinates.
+	'''
+		return np.array([zeta1*(2.0*zeta1-1.0), zeta2*(2.0*zeta2-1.0), zeta3*(2.0*zeta3-1.0),
+						 4.0*zeta1*zeta2, 4.0*zeta2*zeta3, 4.0*zeta3*zeta1])
+
+
+	def shapeFunctionDerivatives(self,zeta1,zeta2,zeta3):
 		'''
-	Calculate the B-matrix given specific 
-	shape function coordinates.
+	Derivatives of the shape functions with respect
+	to the natural coordinates, one row per node.
+	zeta2 and zeta3 are used as the independent
+	coordinates, with zeta1 = 1 - zeta2 - zeta3.
 	'''
-		dx4 = self.nodes[3].coord[0][0] - 0.5*(self.nodes[0].coord[0][0] + self.nodes[1].coord[0][0])
-		dx5 = self.nodes[4].coord[0][0] - 0.5*(self.nodes[1].coord[0][0] + self.nodes[2].coord[0][0])
-		dx6 = self.nodes[5].coord[0][0] - 0.5*(self.nodes[2].coord[0][0] + self.nodes[0].coord[0][0])
+		dNf_dzeta = np.array([[4.0*zeta1-1.0, 0.0, 0.0],
+							  [0.0, 4.0*zeta2-1.0, 0.0],
+							  [0.0, 0.0, 4.0*zeta3-1.0],
+							  [4.0*zeta2, 4.0*zeta1, 0.0],
+							  [0.0, 4.0*zeta3, 4.0*zeta2],
+							  [4.0*zeta3, 0.0, 4.0*zeta1]])
+		return dNf_dzeta[:,1:] - dNf_dzeta[:,[0]]
 
-		dy4 = self.nodes[3].coord[1][0] - 0.5*(self.nodes[0].coord[1][0] + self.nodes[1].coord[1][0])
-		dy5 = self.nodes[4].coord[1][0] - 0.5*(self.nodes[1].coord[1][0] + self.nodes[2].coord[1][0])
-		dy6 = self.nodes[5].coord[1][0] - 0.5*(self.nodes[2].coord[1][0] + self.nodes[0].coord[1][0])
 
-		Jx21 = self.nodes[1].coord[0][0] - self.nodes[0].coord[0][0] + 4.0*(dx4*(zeta1-zeta2) + (dx5-dx6)*zeta3)
-		Jx32 = self.nodes[2].coord[0][0] - self.nodes[1].coord[0][0] + 4.0*(dx5*(zeta2-zeta3) + (dx6-dx4)*zeta1)
-		Jx13 = self.nodes[0].coord[0][0] - self.nodes[2].coord[0][0] + 4.0*(dx6*(zeta3-zeta1) + (dx4-dx5)*zeta2)
-		Jy12 = self.nodes[0].coord[1][0] - self.nodes[1].coord[1][0] + 4.0*(dy4*(zeta2-zeta1) + (dy6-dy5)*zeta3)
-		Jy23 = self.nodes[1].coord[1][0] - self.nodes[2].coord[1][0] + 4.0*(dy5*(zeta3-zeta2) + (dy4-dy6)*zeta1)
-		Jy31 = self.nodes[2].coord[1][0] - self.nodes[0].coord[1][0] + 4.0*(dy6*(zeta1-zeta3) + (dy5-dy4)*zeta2)
+	def integrationPoints(self):
+		'''
+	Natural coordinates and weights of the integration
+	points. The weights are scaled by the area of the
+	reference triangle.
+	'''
+		qc = []
+		w = []
+		for i in range(len(self.gaussPnts)-1):
+			qc.append(self.gaussPnts[i])
+			w.append(self.gaussPnts[3]*0.5)
+		return [qc, w]
 
-		detJ = Jx21*Jy31 - Jy12*Jx13
-		invdetJ = 1.0/detJ
 
-		dNf_drc = [[invdetJ*(4.0*zeta1-1.0)*Jy23,        invdetJ*(4.0*zeta2-1.0)*Jy31, 
-					invdetJ*(4.0*zeta3-1.0)*Jy12,        invdetJ*4.0*(zeta2*Jy23+zeta1*Jy31),
-					invdetJ*4.0*(zeta3*Jy31+zeta2*Jy12), invdetJ*4.0*(zeta1*Jy12+zeta3*Jy23)],
-				   [invdetJ*(4.0*zeta1-1.0)*Jx32,        invdetJ*(4.0*zeta2-1.0)*Jx13, 
-					invdetJ*(4.0*zeta3-1.0)*Jx21,        invdetJ*4.0*(zeta2*Jx32+zeta1*Jx13),
-					invdetJ*4.0*(zeta3*Jx13+zeta2*Jx21), invdetJ*4.0*(zeta1*Jx21+zeta3*Jx32)]]
+	def nodalPoints(self):
+		'''
+	Natural coordinates of the points where
+	nodal results are calculated.
+	'''
+		return [[ 1.0, 0.0, 0.0], [ 0.0, 1.0, 0.0], [ 0.0, 0.0, 1.0],
+				[ 0.5, 0.5, 0.0], [ 0.0, 0.5, 0.5], [ 0.5, 0.0, 0.5]]
+
+
+	def calcStrainDisplacementMatrix(self,dNf_dqc):
+		'''
+	Calculate the B-matrix given the shape function
+	derivatives at a specific point, taken from the
+	shape function table in GaussQuad.
+	'''
+		J = self.nodeCoordinates()[:,:2].T.dot(dNf_dqc)
+
+		detJ = J[0][0]*J[1][1] - J[0][1]*J[1][0]
+		invJ = np.array([[(1.0/detJ)*J[1][1],-(1.0/detJ)*J[0][1]],
+						 [-(1.0/detJ)*J[1][0],(1.0/detJ)*J[0][0]]])
+
+		dNf_drc = invJ.T.dot(dNf_dqc.T)
 
 		B = [[],[],[]]
 		for l in range(6):
@@ -775,30 +878,22 @@ Has two active degrees of freedom per node.
 	isoparametric shape functions and Gauss Quadrature.
 	'''
 		self.K = np.array([[0.0,]*12,]*12)
-		gauss = len(self.gaussPnts)-1
-		zeta1 = 0.0
-		zeta2 = 0.0
-		zeta3 = 0.0
-		w = self.gaussPnts[3]
-		for i in range(gauss):
-			zeta1 = self.gaussPnts[i][0]
-			zeta2 = self.gaussPnts[i][1]
-			zeta3 = self.gaussPnts[i][2]
-
-			[detJ,B] = self.calcStrainDisplacementMatrix(zeta1,zeta2,zeta3)
-
-			self.K = ((B.transpose().dot(self.section.E)).dot(B))*(w*detJ*self.section.thickness*0.5) + self.K
+		table = self.gaussQuad.shapeFunctionTable(self,'gauss')
+		for i in range(len(table['w'])):
+			[detJ,B] = self.calcStrainDisplacementMatrix(table['dNf_dqc'][i])
+			self.K = ((B.transpose().dot(self.section.E)).dot(B))*(table['w'][i]*detJ*self.section.thickness) + self.K
 
 
 	def calcMassMatrix(self):
 		'''
 	Calculate the element mass matrix using the
-	lumped mass matrix method.
+	lumped mass matrix method, stored as the vector
+	of its diagonal.
 	'''
 		area = abs(self.nodes[0].coord[0][0]*(self.nodes[1].coord[1][0]-self.nodes[2].coord[1][0]) + \
 				   self.nodes[1].coord[0][0]*(self.nodes[2].coord[1][0]-self.nodes[0].coord[1][0]) + \
 				   self.nodes[2].coord[0][0]*(self.nodes[0].coord[1][0]-self.nodes[1].coord[1][0]))*0.5
-		self.M = np.identity(12)*(self.section.material.density*area*self.section.thickness*(1.0/6.0))
+		self.M = np.full(12,self.section.material.density*area*self.section.thickness*(1.0/6.0))
 
 
 	def calcStrain(self,u,calcStrain,calcStress,sol):
@@ -816,33 +911,19 @@ Has two active degrees of freedom per node.
 		ngauss = gauss
 		nodal = 6
 
-		zeta1 = 0.0
-		zeta2 = 0.0
-		zeta3 = 0.0
-
-		for i in range(gauss):
-			zeta1 = self.gaussPnts[i][0]
-			zeta2 = self.gaussPnts[i][1]
-			zeta3 = self.gaussPnts[i][2]
-
-			[detJ,B] = self.calcStrainDisplacementMatrix(zeta1,zeta2,zeta3)
-
+		table = self.gaussQuad.shapeFunctionTable(self,'gauss')
+		for i in range(len(table['w'])):
+			[detJ,B] = self.calcStrainDisplacementMatrix(table['dNf_dqc'][i])
 			if calcStrain:
 				self.solutions[sol]['strain']['int_points'][i+1] = {'strain_tensor': B.dot(u), 
 											'VonMises': 0., 'MaxPrinc': 0., 'MinPrinc': 0., 'MaxShear': 0.}
 			if calcStress:
 				self.solutions[sol]['stress']['int_points'][i+1] = {'stress_tensor': self.section.E.dot(B.dot(u)), 
 											'VonMises': 0., 'MaxPrinc': 0., 'MinPrinc': 0., 'MaxShear': 0.}
-		
-		zeta1zeta2zeta3 = [[ 1.0, 0.0, 0.0], [ 0.0, 1.0, 0.0], [ 0.0, 0.0, 1.0],
-						   [ 0.5, 0.5, 0.0], [ 0.0, 0.5, 0.5], [ 0.5, 0.0, 0.5]]
-		for j in range(nodal):
-			zeta1 = zeta1zeta2zeta3[j][0]
-			zeta2 = zeta1zeta2zeta3[j][1]
-			zeta3 = zeta1zeta2zeta3[j][2]
-
-			[detJ,B] = self.calcStrainDisplacementMatrix(zeta1,zeta2,zeta3)
 
+		table = self.gaussQuad.shapeFunctionTable(self,'nodal')
+		for j in range(nodal):
+			[detJ,B] = self.calcStrainDisplacementMatrix(table['dNf_dqc'][j])
 			if calcStrain:
 				self.solutions[sol]['strain']['nodal'][j+1] = {'strain_tensor': B.dot(u), 
 									'VonMises': 0., 'MaxPrinc': 0., 'MinPrinc': 0., 'MaxShear': 0.}
@@ -909,6 +990,7 @@ Has two active degrees of freedom per node.
 4 nodes gives 8 degrees of freedom total.
 '''
 	def __init__(self,number,sect,nodes,gaussQuad,reducedIntegration=False):
+		self.gaussQuad = gaussQuad
 		if reducedIntegration:
 			self.gaussPnts = gaussQuad.quad_p1
 			self.reducedIntegration = True
@@ -932,24 +1014,61 @@ Has two active degrees of freedom per node.
 				self.nodes[i].NFS[1] = 1
 
 
-	def calcStrainDisplacementMatrix(self,ksi,eta):
+	def shapeFunctions(self,ksi,eta):
 		'''
-	Calculate the B-matrix given specific
-	shape function coordinates.
+	Shape functions given specific
+	natural coordinates.
+	'''
+		return np.array([(1.0-ksi)*(1.0-eta)/4.0, (1.0+ksi)*(1.0-eta)/4.0,
+						 (1.0+ksi)*(1.0+eta)/4.0, (1.0-ksi)*(1.0+eta)/4.0])
+
+
+	def shapeFunctionDerivatives(self,ksi,eta):
+		'''
+	Derivatives of the shape functions with respect
+	to the natural coordinates (ksi, eta), one row
+	per node.
 	'''
 		dNf_dqc = np.array([[-(1.0-eta)/4.0, (1.0-eta)/4.0, (1.0+eta)/4.0, -(1.0+eta)/4.0],
 				   			[-(1.0-ksi)/4.0, -(1.0+ksi)/4.0, (1.0+ksi)/4.0, (1.0-ksi)/4.0]])
+		return dNf_dqc.T
+
+
+	def integrationPoints(self):
+		'''
+	Natural coordinates and weights of
+	the integration points.
+	'''
+		qc = []
+		w = []
+		for i in range(len(self.gaussPnts)):
+			for j in range(len(self.gaussPnts)):
+				qc.append([self.gaussPnts[i][0], self.gaussPnts[j][0]])
+				w.append(self.gaussPnts[i][1]*self.gaussPnts[j][1])
+		return [qc, w]
 
-		J = dNf_dqc.dot(np.array([[self.nodes[0].coord[0][0],self.nodes[0].coord[1][0]],
-								  [self.nodes[1].coord[0][0],self.nodes[1].coord[1][0]],
-								  [self.nodes[2].coord[0][0],self.nodes[2].coord[1][0]],
-								  [self.nodes[3].coord[0][0],self.nodes[3].coord[1][0]]]))
+
+	def nodalPoints(self):
+		'''
+	Natural coordinates of the points where
+	nodal results are calculated.
+	'''
+		return [[-1.,-1.], [ 1.,-1.], [ 1., 1.], [-1., 1.]]
+
+
+	def calcStrainDisplacementMatrix(self,dNf_dqc):
+		'''
+	Calculate the B-matrix given the shape function
+	derivatives at a specific point, taken from the
+	shape function table in GaussQuad.
+	'''
+		J = self.nodeCoordinates()[:,:2].T.dot(dNf_dqc)
 
 		detJ = J[0][0]*J[1][1] - J[0][1]*J[1][0]
 		invJ = np.array([[(1.0/detJ)*J[1][1],-(1.0/detJ)*J[0][1]],
 						 [-(1.0/detJ)*J[1][0],(1.0/detJ)*J[0][0]]])
 
-		dNf_drc = invJ.dot(dNf_dqc)
+		dNf_drc = invJ.T.dot(dNf_dqc.T)
 
 		B = [[],[],[]]
 		for l in range(4):
@@ -962,9 +1081,9 @@ Has two active degrees of freedom per node.
 			B[2].append(dNf_drc[1][n])
 			B[2].append(dNf_drc[0][n])
 		B = np.array(B)
-		
-		return [detJ,B]
 
+		return [detJ,B]
+		
 
 	def hourGlassControl(self):
 		'''
@@ -1032,29 +1151,17 @@ Has two active degrees of freedom per node.
 	isoparametric shape functions and Gauss Quadrature.
 	'''
 		self.K = np.array([[0.0,]*8,]*8)
-		gauss = len(self.gaussPnts)
-
-		ksi = 0.0
-		eta = 0.0
-		w_i = 0.0
-		w_j = 0.0
-
-		for i in range(gauss):
-			ksi = self.gaussPnts[i][0]
-			w_i = self.gaussPnts[i][1]
-
-			for j in range(gauss):
-				eta = self.gaussPnts[j][0]
-				w_j = self.gaussPnts[j][1]
-
-				[detJ,B] = self.calcStrainDisplacementMatrix(ksi,eta)
-				self.K = ((B.transpose().dot(self.section.E)).dot(B))*(w_i*w_j*detJ*self.section.thickness) + self.K
+		table = self.gaussQuad.shapeFunctionTable(self,'gauss')
+		for i in range(len(table['w'])):
+			[detJ,B] = self.calcStrainDisplacementMatrix(table['dNf_dqc'][i])
+			self.K = ((B.transpose().dot(self.section.E)).dot(B))*(table['w'][i]*detJ*self.section.thickness) + self.K
 
 
 	def calcMassMatrix(self):
 		'''
 	Calculate the element mass matrix using the
-	lumped mass matrix method.
+	lumped mass matrix method, stored as the vector
+	of its diagonal.
 	'''
 		area = abs(self.nodes[0].coord[0][0]*(self.nodes[1].coord[1][0]-self.nodes[3].coord[1][0]) + \
 				   self.nodes[1].coord[0][0]*(self.nodes[3].coord[1][0]-self.nodes[0].coord[1][0]) + \
@@ -1062,7 +1169,7 @@ Has two active degrees of freedom per node.
 			   abs(self.nodes[1].coord[0][0]*(self.nodes[2].coord[1][0]-self.nodes[3].coord[1][0]) + \
 				   self.nodes[2].coord[0][0]*(self.nodes[3].coord[1][0]-self.nodes[1].coord[1][0]) + \
 				   self.nodes[3].coord[0][0]*(self.nodes[1].coord[1][0]-self.nodes[2].coord[1][0]))*0.5
-		self.M = np.identity(8)*(self.section.material.density*area*self.section.thickness*0.25)
+		self.M = np.full(8,self.section.material.density*area*self.section.thickness*0.25)
 
 
 	def calcStrain(self,u,calcStrain,calcStress,sol):
@@ -1080,36 +1187,19 @@ Has two active degrees of freedom per node.
 		ngauss = gauss*gauss
 		nodal = 4
 
-		ksi = 0.0
-		eta = 0.0
-		w_i = 0.0
-		w_j = 0.0
-
-		k = 1
-		for i in range(gauss):
-			ksi = self.gaussPnts[i][0]
-			w_i = self.gaussPnts[i][1]
-			for j in range(gauss):
-				eta = self.gaussPnts[j][0]
-				w_j = self.gaussPnts[j][1]
-
-				[detJ,B] = self.calcStrainDisplacementMatrix(ksi,eta)
-
-				if calcStrain:
-					self.solutions[sol]['strain']['int_points'][k] = {'strain_tensor': B.dot(u), 
+		table = self.gaussQuad.shapeFunctionTable(self,'gauss')
+		for i in range(len(table['w'])):
+			[detJ,B] = self.calcStrainDisplacementMatrix(table['dNf_dqc'][i])
+			if calcStrain:
+				self.solutions[sol]['strain']['int_points'][i+1] = {'strain_tensor': B.dot(u), 
 											'VonMises': 0., 'MaxPrinc': 0., 'MinPrinc': 0., 'MaxShear': 0.}
-				if calcStress:
-					self.solutions[sol]['stress']['int_points'][k] = {'stress_tensor': self.section.E.dot(B.dot(u)), 
+			if calcStress:
+				self.solutions[sol]['stress']['int_points'][i+1] = {'stress_tensor': self.section.E.dot(B.dot(u)), 
 											'VonMises': 0., 'MaxPrinc': 0., 'MinPrinc': 0., 'MaxShear': 0.}
-				k += 1
-		
-		ksieta = [[-1.,-1.], [ 1.,-1.], [ 1., 1.], [-1., 1.]]
-		for j in range(nodal):
-			ksi = ksieta[j][0]
-			eta = ksieta[j][1]
-
-			[detJ,B] = self.calcStrainDisplacementMatrix(ksi,eta)
 
+		table = self.gaussQuad.shapeFunctionTable(self,'nodal')
+		for j in range(nodal):
+			[detJ,B] = self.calcStrainDisplacementMatrix(table['dNf_dqc'][j])
 			if calcStrain:
 				self.solutions[sol]['strain']['nodal'][j+1] = {'strain_tensor': B.dot(u), 
 									'VonMises': 0., 'MaxPrinc': 0., 'MinPrinc': 0., 'MaxShear': 0.}
@@ -1176,6 +1266,7 @@ Has two active degrees of freedom per node.
 8 nodes gives 16 degrees of freedom total.
 '''
 	def __init__(self,number,sect,nodes,gaussQuad):
+		self.gaussQuad = gaussQuad
 		self.gaussPnts = gaussQuad.quad_p3
 		super(QUAD8N,self).__init__(number,sect,nodes)
 		self.EFS = [[1,1,0,0,0,0],]*8
@@ -1194,10 +1285,26 @@ Has two active degrees of freedom per node.
 				self.nodes[i].NFS[1] = 1
 
 
-	def calcStrainDisplacementMatrix(self,ksi,eta):
+	def shapeFunctions(self,ksi,eta):
 		'''
-	Calculate the B-matrix given specific
-	shape function coordinates.
+	Shape functions given specific
+	natural coordinates.
+	'''
+		return np.array([-(1.0-ksi)*(1.0-eta)*(1.0+ksi+eta)/4.0,
+						 (1.0-ksi**2)*(1.0-eta)/2.0,
+						 -(1.0+ksi)*(1.0-eta)*(1.0-ksi+eta)/4.0,
+						 (1.0+ksi)*(1.0-eta**2)/2.0,
+						 -(1.0+ksi)*(1.0+eta)*(1.0-ksi-eta)/4.0,
+						 (1.0-ksi**2)*(1.0+eta)/2.0,
+						 -(1.0-ksi)*(1.0+eta)*(1.0+ksi-eta)/4.0,
+						 (1.0-ksi)*(1.0-eta**2)/2.0])
+
+
+	def shapeFunctionDerivatives(self,ksi,eta):
+		'''
+	Derivatives of the shape functions with respect
+	to the natural coordinates (ksi, eta), one row
+	per node.
 	'''
 		dNf_dqc = np.array([[(2.0*ksi+eta-2.0*ksi*eta-eta**2)/4.0,
 							 (-2.0*ksi+2.0*ksi*eta)/2.0,
@@ -1215,20 +1322,45 @@ Has two active degrees of freedom per node.
 							 (1.0-ksi**2)/2.0,
 							 (-ksi+2.0*eta+ksi**2-2.0*ksi*eta)/4.0,
 							 (-2.0*eta+2.0*ksi*eta)/2.0]])
+		return dNf_dqc.T
+
+
+	def integrationPoints(self):
+		'''
+	Natural coordinates and weights of
+	the integration points.
+	'''
+		qc = []
+		w = []
+		for i in range(len(self.gaussPnts)):
+			for j in range(len(self.gaussPnts)):
+				qc.append([self.gaussPnts[i][0], self.gaussPnts[j][0]])
+				w.append(self.gaussPnts[i][1]*self.gaussPnts[j][1])
+		return [qc, w]
+
+
+	def nodalPoints(self):
+		'''
+	Natural coordinates of the points where
+	nodal results are calculated.
+	'''
+		return [[-1.,-1.], [ 0.,-1.], [ 1.,-1.], [ 1., 0.],
+				[ 1., 1.], [ 0., 1.], [-1., 1.], [-1., 0.],[ 0., 0.]]
+
+
+	def calcStrainDisplacementMatrix(self,dNf_dqc):
+		'''
+	Calculate the B-matrix given the shape function
+	derivatives at a specific point, taken from the
+	shape function table in GaussQuad.
+	'''
+		J = self.nodeCoordinates()[:,:2].T.dot(dNf_dqc)
 
-		J = dNf_dqc.dot(np.array([[self.nodes[0].coord[0][0],self.nodes[0].coord[1][0]],
-								  [self.nodes[1].coord[0][0],self.nodes[1].coord[1][0]],
-								  [self.nodes[2].coord[0][0],self.nodes[2].coord[1][0]],
-								  [self.nodes[3].coord[0][0],self.nodes[3].coord[1][0]],
-								  [self.nodes[4].coord[0][0],self.nodes[4].coord[1][0]],
-								  [self.nodes[5].coord[0][0],self.nodes[5].coord[1][0]],
-								  [self.nodes[6].coord[0][0],self.nodes[6].coord[1][0]],
-								  [self.nodes[7].coord[0][0],self.nodes[7].coord[1][0]]]))
 		detJ = J[0][0]*J[1][1] - J[0][1]*J[1][0]
 		invJ = np.array([[(1.0/detJ)*J[1][1],-(1.0/detJ)*J[0][1]],
 						 [-(1.0/detJ)*J[1][0],(1.0/detJ)*J[0][0]]])
 
-		dNf_drc = invJ.dot(dNf_dqc)
+		dNf_drc = invJ.T.dot(dNf_dqc.T)
 
 		B = [[],[],[]]
 		for l in range(8):
@@ -1251,29 +1383,17 @@ Has two active degrees of freedom per node.
 	isoparametric shape functions and Gauss Quadrature.
 	'''
 		self.K = np.array([[0.0,]*16,]*16)
-		gauss = len(self.gaussPnts)
-
-		ksi = 0.0
-		eta = 0.0
-		w_i = 0.0
-		w_j = 0.0
-
-		for i in range(gauss):
-			ksi = self.gaussPnts[i][0]
-			w_i = self.gaussPnts[i][1]
-
-			for j in range(gauss):
-				eta = self.gaussPnts[j][0]
-				w_j = self.gaussPnts[j][1]
-
-				[detJ,B] = self.calcStrainDisplacementMatrix(ksi,eta)
-				self.K = ((B.transpose().dot(self.section.E)).dot(B))*(w_i*w_j*detJ*self.section.thickness) + self.K
+		table = self.gaussQuad.shapeFunctionTable(self,'gauss')
+		for i in range(len(table['w'])):
+			[detJ,B] = self.calcStrainDisplacementMatrix(table['dNf_dqc'][i])
+			self.K = ((B.transpose().dot(self.section.E)).dot(B))*(table['w'][i]*detJ*self.section.thickness) + self.K
 
 
 	def calcMassMatrix(self):
 		'''
 	Calculate the element mass matrix using the
-	lumped mass matrix method.
+	lumped mass matrix method, stored as the vector
+	of its diagonal.
 	'''
 		area = abs(self.nodes[0].coord[0][0]*(self.nodes[2].coord[1][0]-self.nodes[6].coord[1][0]) + \
 				   self.nodes[2].coord[0][0]*(self.nodes[6].coord[1][0]-self.nodes[0].coord[1][0]) + \
@@ -1281,7 +1401,7 @@ Has two active degrees of freedom per node.
 			   abs(self.nodes[2].coord[0][0]*(self.nodes[4].coord[1][0]-self.nodes[6].coord[1][0]) + \
 				   self.nodes[4].coord[0][0]*(self.nodes[6].coord[1][0]-self.nodes[2].coord[1][0]) + \
 				   self.nodes[6].coord[0][0]*(self.nodes[2].coord[1][0]-self.nodes[4].coord[1][0]))*0.5
-		self.M = np.identity(16)*(self.section.material.density*area*self.section.thickness*0.125)
+		self.M = np.full(16,self.section.material.density*area*self.section.thickness*0.125)
 
 
 	def calcStrain(self,u,calcStrain,calcStress,sol):
@@ -1300,37 +1420,19 @@ Has two active degrees of freedom per node.
 		ngauss = gauss*gauss
 		nodal = 9
 
-		ksi = 0.0
-		eta = 0.0
-		w_i = 0.0
-		w_j = 0.0
-
-		k = 1
-		for i in range(gauss):
-			ksi = self.gaussPnts[i][0]
-			w_i = self.gaussPnts[i][1]
-			for j in range(gauss):
-				eta = self.gaussPnts[j][0]
-				w_j = self.gaussPnts[j][1]
-
-				[detJ,B] = self.calcStrainDisplacementMatrix(ksi,eta)
-
-				if calcStrain:
-					self.solutions[sol]['strain']['int_points'][k] = {'strain_tensor': B.dot(u), 
+		table = self.gaussQuad.shapeFunctionTable(self,'gauss')
+		for i in range(len(table['w'])):
+			[detJ,B] = self.calcStrainDisplacementMatrix(table['dNf_dqc'][i])
+			if calcStrain:
+				self.solutions[sol]['strain']['int_points'][i+1] = {'strain_tensor': B.dot(u), 
 											'VonMises': 0., 'MaxPrinc': 0., 'MinPrinc': 0., 'MaxShear': 0.}
-				if calcStress:
-					self.solutions[sol]['stress']['int_points'][k] = {'stress_tensor': self.section.E.dot(B.dot(u)), 
+			if calcStress:
+				self.solutions[sol]['stress']['int_points'][i+1] = {'stress_tensor': self.section.E.dot(B.dot(u)), 
 											'VonMises': 0., 'MaxPrinc': 0., 'MinPrinc': 0., 'MaxShear': 0.}
-				k += 1
-		
-		ksieta = [[-1.,-1.], [ 0.,-1.], [ 1.,-1.], [ 1., 0.],
-				  [ 1., 1.], [ 0., 1.], [-1., 1.], [-1., 0.],[ 0., 0.]]
-		for j in range(nodal):
-			ksi = ksieta[j][0]
-			eta = ksieta[j][1]
-
-			[detJ,B] = self.calcStrainDisplacementMatrix(ksi,eta)
 
+		table = self.gaussQuad.shapeFunctionTable(self,'nodal')
+		for j in range(nodal):
+			[detJ,B] = self.calcStrainDisplacementMatrix(table['dNf_dqc'][j])
 			if calcStrain:
 				self.solutions[sol]['strain']['nodal'][j+1] = {'strain_tensor': B.dot(u), 
 									'VonMises': 0., 'MaxPrinc': 0., 'MinPrinc': 0., 'MaxShear': 0.}
@@ -1514,9 +1616,10 @@ Has 3 active degrees of freedom per node.
 	def calcMassMatrix(self):
 		'''
 	Calculate the element mass matrix using the
-	lumped mass matrix method.
+	lumped mass matrix method, stored as the vector
+	of its diagonal.
 	'''
-		self.M = np.identity(6)*(self.section.material.density*self.section.area*self.length*0.5)
+		self.M = np.full(6,self.section.material.density*self.section.area*self.length*0.5)
 
 
 	def calcForces(self,u,sol):
@@ -1737,15 +1840,11 @@ Subclass of Element.
 	def calcMassMatrix(self):
 		'''
 	Calculate the element mass matrix using the
-	lumped mass matrix method.
+	lumped mass matrix method, stored as the vector
+	of its diagonal.
 	'''
-		self.M = np.identity(12)*(self.section.material.density*self.section.area*self.length*0.5)
-		self.M[3][3] = self.M[3][3]*((self.length**2)/12)
-		self.M[4][4] = self.M[4][4]*((self.length**2)/12)
-		self.M[5][5] = self.M[5][5]*((self.length**2)/12)
-		self.M[9][9] = self.M[9][9]*((self.length**2)/12)
-		self.M[10][10] = self.M[10][10]*((self.length**2)/12)
-		self.M[11][11] = self.M[11][11]*((self.length**2)/12)
+		self.M = np.full(12,self.section.material.density*self.section.area*self.length*0.5)
+		self.M[[3,4,5,9,10,11]] = self.M[[3,4,5,9,10,11]]*((self.length**2)/12)
 
 
 	def calcEquivalentNodalForces(self,distForce,freeDOFs):
@@ -2013,7 +2112,8 @@ Has 3 active degrees of freedom per node.
 	def calcMassMatrix(self):
 		'''
 	Calculate the element mass matrix using the
-	lumped mass matrix method.
+	lumped mass matrix method, stored as the vector
+	of its diagonal.
 	'''
 		ab = [self.nodes[1].coord[0][0]-self.nodes[0].coord[0][0],
 			  self.nodes[1].coord[1][0]-self.nodes[0].coord[1][0],
@@ -2025,7 +2125,7 @@ Has 3 active degrees of freedom per node.
 			  self.nodes[3].coord[1][0]-self.nodes[0].coord[1][0],
 			  self.nodes[3].coord[2][0]-self.nodes[0].coord[2][0]]
 		volume = np.linalg.det(np.array([ab,ac,ad]))/6.0
-		self.M = np.identity(12)*(self.section.material.density*volume*0.25)
+		self.M = np.full(12,self.section.material.density*volume*0.25)
 
 
 	def calcStrain(self,u,calcStrain,calcStress,sol):		### POSSIBLY WRONG, DOUBLE CHECK THIS!!!
@@ -2097,6 +2197,7 @@ Has 3 active degrees of freedom per node.
 10 nodes gives 30 degrees of freedom total.
 '''
 	def __init__(self,number,sect,nodes,gaussQuad):
+		self.gaussQuad = gaussQuad
 		self.gaussPnts = gaussQuad.tet_p4
 		super(TET10N,self).__init__(number,sect,nodes)
 		self.EFS = [[1,1,1,0,0,0],]*10
@@ -2117,99 +2218,94 @@ Has 3 active degrees of freedom per node.
 				self.nodes[i].NFS[2] = 1
 
 
-	def calcStrainDisplacementMatrix(self,zeta1,zeta2,zeta3,zeta4):
+	def shapeFunctions(self,zeta1,zeta2,zeta3,zeta4):
 		'''
-	Calculate the B-matrix given specific
-	shape function coordinates.
-	'''
-		Jx1 = 4.0*(self.nodes[0].coord[0][0]*(zeta1-0.25)+self.nodes[4].coord[0][0]*zeta2+ \
-				self.nodes[6].coord[0][0]*zeta3+self.nodes[7].coord[0][0]*zeta4)
-		Jx2 = 4.0*(self.nodes[4].coord[0][0]*zeta1+self.nodes[1].coord[0][0]*(zeta2-0.25)+ \
-				self.nodes[5].coord[0][0]*zeta3+self.nodes[8].coord[0][0]*zeta4)
-		Jx3 = 4.0*(self.nodes[6].coord[0][0]*zeta1+self.nodes[5].coord[0][0]*zeta2+ \
-				self.nodes[2].coord[0][0]*(zeta3-0.25)+self.nodes[9].coord[0][0]*zeta4)
-		Jx4 = 4.0*(self.nodes[7].coord[0][0]*zeta1+self.nodes[8].coord[0][0]*zeta2+ \
-				self.nodes[9].coord[0][0]*zeta3+self.nodes[3].coord[0][0]*(zeta4-0.25))
-		Jy1 = 4.0*(self.nodes[0].coord[1][0]*(zeta1-0.25)+self.nodes[4].coord[1][0]*zeta2+ \
-				self.nodes[6].coord[1][0]*zeta3+self.nodes[7].coord[1][0]*zeta4)
-		Jy2 = 4.0*(self.nodes[4].coord[1][0]*zeta1+self.nodes[1].coord[1][0]*(zeta2-0.25)+ \
-				self.nodes[5].coord[1][0]*zeta3+self.nodes[8].coord[1][0]*zeta4)
-		Jy3 = 4.0*(self.nodes[6].coord[1][0]*zeta1+self.nodes[5].coord[1][0]*zeta2+ \
-				self.nodes[2].coord[1][0]*(zeta3-0.25)+self.nodes[9].coord[1][0]*zeta4)
-		Jy4 = 4.0*(self.nodes[7].coord[1][0]*zeta1+self.nodes[8].coord[1][0]*zeta2+ \
-				self.nodes[9].coord[1][0]*zeta3+self.nodes[3].coord[1][0]*(zeta4-0.25))
-		Jz1 = 4.0*(self.nodes[0].coord[2][0]*(zeta1-0.25)+self.nodes[4].coord[2][0]*zeta2+ \
-				self.nodes[6].coord[2][0]*zeta3+self.nodes[7].coord[2][0]*zeta4)
-		Jz2 = 4.0*(self.nodes[4].coord[2][0]*zeta1+self.nodes[1].coord[2][0]*(zeta2-0.25)+ \
-				self.nodes[5].coord[2][0]*zeta3+self.nodes[8].coord[2][0]*zeta4)
-		Jz3 = 4.0*(self.nodes[6].coord[2][0]*zeta1+self.nodes[5].coord[2][0]*zeta2+ \
-				self.nodes[2].coord[2][0]*(zeta3-0.25)+self.nodes[9].coord[2][0]*zeta4)
-		Jz4 = 4.0*(self.nodes[7].coord[2][0]*zeta1+self.nodes[8].coord[2][0]*zeta2+ \
-				self.nodes[9].coord[2][0]*zeta3+self.nodes[3].coord[2][0]*(zeta4-0.25))
-
-		Jx12 = Jx1-Jx2
-		Jx21 = -Jx12
-		Jx13 = Jx1-Jx3
-		Jx31 = -Jx13
-		Jx14 = Jx1-Jx4
-		Jx41 = -Jx14
-		Jx23 = Jx2-Jx3
-		Jx32 = -Jx23
-		Jx24 = Jx2-Jx4
-		Jx42 = -Jx24
-		Jx34 = Jx3-Jx4
-		Jx43 = -Jx34
-		Jy12 = Jy1-Jy2
-		Jy21 = -Jy12
-		Jy13 = Jy1-Jy3
-		Jy31 = -Jy13
-		Jy14 = Jy1-Jy4
-		Jy41 = -Jy14
-		Jy23 = Jy2-Jy3
-		Jy32 = -Jy23
-		Jy24 = Jy2-Jy4
-		Jy42 = -Jy24
-		Jy34 = Jy3-Jy4
-		Jy43 = -Jy34
-		Jz12 = Jz1-Jz2
-		Jz21 = -Jz12
-		Jz13 = Jz1-Jz3
-		Jz31 = -Jz13
-		Jz14 = Jz1-Jz4
-		Jz41 = -Jz14
-		Jz23 = Jz2-Jz3
-		Jz32 = -Jz23
-		Jz24 = Jz2-Jz4
-		Jz42 = -Jz24
-		Jz34 = Jz3-Jz4
-		Jz43 = -Jz34
-
-		detJ = Jx21*(Jy23*Jz34-Jy34*Jz23) + Jx32*(Jy34*Jz12-Jy12*Jz34) + Jx43*(Jy12*Jz23-Jy23*Jz12)
+	Shape functions given specific
+	tetrahedral coordinates.
+	'''
+		return np.array([zeta1*(2.0*zeta1-1.0), zeta2*(2.0*zeta2-1.0),
+						 zeta3*(2.0*zeta3-1.0), zeta4*(2.0*zeta4-1.0),
+						 4.0*zeta1*zeta2, 4.0*zeta2*zeta3, 4.0*zeta3*zeta1,
+						 4.0*zeta1*zeta4, 4.0*zeta2*zeta4, 4.0*zeta3*zeta4])
+
+
+	def shapeFunctionDerivatives(self,zeta1,zeta2,zeta3,zeta4):
+		'''
+	Derivatives of the shape functions with respect
+	to the natural coordinates, one row per node.
+	zeta2, zeta3 and zeta4 are used as the independent
+	coordinates, with zeta1 = 1 - zeta2 - zeta3 - zeta4.
+	'''
+		dNf_dzeta = np.array([[4*zeta1-1, 0., 0., 0.],
+							  [0., 4*zeta2-1, 0., 0.],
+							  [0., 0., 4*zeta3-1, 0.],
+							  [0., 0., 0., 4*zeta4-1],
+							  [4*zeta2, 4*zeta1, 0., 0.],
+							  [0., 4*zeta3, 4*zeta2, 0.],
+							  [4*zeta3, 0., 4*zeta1, 0.],
+							  [4*zeta4, 0., 0., 4*zeta1],
+							  [0., 4*zeta4, 0., 4*zeta2],
+							  [0., 0., 4*zeta4, 4*zeta3]])
+		return dNf_dzeta[:,1:] - dNf_dzeta[:,[0]]
+
+
+	def integrationPoints(self):
+		'''
+	Natural coordinates and weights of the integration
+	points. The weights are scaled by the volume of the
+	reference tetrahedron.
+	'''
+		qc = []
+		w = []
+		for i in range(len(self.gaussPnts)-1):
+			qc.append(self.gaussPnts[i])
+			w.append(self.gaussPnts[4]/6.)
+		return [qc, w]
+
+
+	def massIntegrationPoints(self):
+		'''
+	Natural coordinates and weights of the integration
+	points of the consistent mass matrix. The products
+	of the quadratic shape functions are of order 4,
+	so the conical product rule tet_mass is used.
+	'''
+		return self.gaussQuad.tet_mass
+
+
+	def nodalPoints(self):
+		'''
+	Natural coordinates of the points where
+	nodal results are calculated.
+	'''
+		return [[1.,0.,0.,0.], [0.,1.,0.,0.], [0.,0.,1.,0.], [0.,0.,0.,1.], [.5,.5,0.,0.],
+				[0.,.5,.5,0.], [.5,0.,.5,0.], [.5,0.,0.,.5], [0.,.5,0.,.5], [0.,0.,.5,.5]]
+
+
+	def calcStrainDisplacementMatrix(self,dNf_dqc):
+		'''
+	Calculate the B-matrix given the shape function
+	derivatives at a specific point, taken from the
+	shape function table in GaussQuad.
+	'''
+		J = self.nodeCoordinates().T.dot(dNf_dqc)
+
+		detJ = J[0][0]*(J[1][1]*J[2][2]-J[2][1]*J[1][2]) + \
+			   J[0][1]*(J[1][2]*J[2][0]-J[1][0]*J[2][2]) + \
+			   J[0][2]*(J[1][0]*J[2][1]-J[1][1]*J[2][0])
 
 		invdetJ = 1.0/detJ
+		invJ = np.array([[invdetJ*(J[1][1]*J[2][2]-J[2][1]*J[1][2]),
+						  invdetJ*(J[2][1]*J[0][2]-J[0][1]*J[2][2]),
+						  invdetJ*(J[0][1]*J[1][2]-J[0][2]*J[1][1])],
+						 [invdetJ*(J[1][2]*J[2][0]-J[1][0]*J[2][2]),
+						  invdetJ*(J[0][0]*J[2][2]-J[2][0]*J[0][2]),
+						  invdetJ*(J[0][2]*J[1][0]-J[1][2]*J[0][0])],
+						 [invdetJ*(J[1][0]*J[2][1]-J[2][0]*J[1][1]), 
+						  invdetJ*(J[2][0]*J[0][1]-J[2][1]*J[0][0]), 
+						  invdetJ*(J[0][0]*J[1][1]-J[1][0]*J[0][1])]])
 
-		a1 = Jy42*Jz32-Jy32*Jz42
-		a2 = Jy31*Jz43-Jy34*Jz13
-		a3 = Jy24*Jz14-Jy14*Jz24
-		a4 = Jy13*Jz21-Jy12*Jz31
-		b1 = Jx32*Jz42-Jx42*Jz32
-		b2 = Jx43*Jz31-Jx13*Jz34
-		b3 = Jx14*Jz24-Jx24*Jz14
-		b4 = Jx21*Jz13-Jx31*Jz12
-		c1 = Jx42*Jy32-Jx32*Jy42
-		c2 = Jx31*Jy43-Jx34*Jy13
-		c3 = Jx24*Jy14-Jx14*Jy24
-		c4 = Jx13*Jy21-Jx12*Jy31
-
-		dNf_drc = [[(4*zeta1-1)*a1, (4*zeta2-1)*a2, (4*zeta3-1)*a3, (4*zeta4-1)*a4,
-					4*(zeta1*a2+zeta2*a1), 4*(zeta2*a3+zeta3*a2), 4*(zeta3*a1+zeta1*a3),
-					4*(zeta1*a4+zeta4*a1), 4*(zeta2*a4+zeta4*a2), 4*(zeta3*a4+zeta4*a3)],
-				   [(4*zeta1-1)*b1, (4*zeta2-1)*b2, (4*zeta3-1)*b3, (4*zeta4-1)*b4,
-					4*(zeta1*b2+zeta2*b1), 4*(zeta2*b3+zeta3*b2), 4*(zeta3*b1+zeta1*b3),
-					4*(zeta1*b4+zeta4*b1), 4*(zeta2*b4+zeta4*b2), 4*(zeta3*b4+zeta4*b3)],
-				   [(4*zeta1-1)*c1, (4*zeta2-1)*c2, (4*zeta3-1)*c3, (4*zeta4-1)*c4,
-					4*(zeta1*c2+zeta2*c1), 4*(zeta2*c3+zeta3*c2), 4*(zeta3*c1+zeta1*c3),
-					4*(zeta1*c4+zeta4*c1), 4*(zeta2*c4+zeta4*c2), 4*(zeta3*c4+zeta4*c3)]]
+		dNf_drc = invJ.T.dot(dNf_dqc.T)
 
 		B = [[],[],[],[],[],[]]
 		for l in range(10):
@@ -2237,7 +2333,6 @@ Has 3 active degrees of freedom per node.
 			B[5].append(0.0)
 			B[5].append(dNf_drc[0][r])
 		B = np.array(B)
-		B = B*invdetJ
 
 		return [detJ,B]
 
@@ -2248,27 +2343,17 @@ Has 3 active degrees of freedom per node.
 	isoparametric shape functions and Gauss Quadrature.
 	'''
 		self.K = np.array([[0.0,]*30,]*30)
-		gauss = len(self.gaussPnts)-1
-		zeta1 = 0.0
-		zeta2 = 0.0
-		zeta3 = 0.0
-		zeta4 = 0.0
-		w = self.gaussPnts[4]
-		for i in range(gauss):
-			zeta1 = self.gaussPnts[i][0]
-			zeta2 = self.gaussPnts[i][1]
-			zeta3 = self.gaussPnts[i][2]
-			zeta4 = self.gaussPnts[i][3]
-
-			[detJ,B] = self.calcStrainDisplacementMatrix(zeta1,zeta2,zeta3,zeta4)
-
-			self.K = ((B.transpose().dot(self.section.E)).dot(B))*(w*detJ/6.) + self.K
+		table = self.gaussQuad.shapeFunctionTable(self,'gauss')
+		for i in range(len(table['w'])):
+			[detJ,B] = self.calcStrainDisplacementMatrix(table['dNf_dqc'][i])
+			self.K = ((B.transpose().dot(self.section.E)).dot(B))*(table['w'][i]*detJ) + self.K
 
 
 	def calcMassMatrix(self):
 		'''
 	Calculate the element mass matrix using the
-	lumped mass matrix method.
+	lumped mass matrix method, stored as the vector
+	of its diagonal.
 	'''
 		ab = [self.nodes[1].coord[0][0]-self.nodes[0].coord[0][0],
 			  self.nodes[1].coord[1][0]-self.nodes[0].coord[1][0],
@@ -2280,7 +2365,7 @@ Has 3 active degrees of freedom per node.
 			  self.nodes[3].coord[1][0]-self.nodes[0].coord[1][0],
 			  self.nodes[3].coord[2][0]-self.nodes[0].coord[2][0]]
 		volume = np.linalg.det(np.array([ab,ac,ad]))/6.0
-		self.M = np.identity(30)*(self.section.material.density*volume*0.1)
+		self.M = np.full(30,self.section.material.density*volume*0.1)
 
 
 	def calcStrain(self,u,calcStrain,calcStress,sol):
@@ -2298,33 +2383,19 @@ Has 3 active degrees of freedom per node.
 		ngauss = gauss
 		nodal = 10
 
-		zeta1 = 0.0
-		zeta2 = 0.0
-		zeta3 = 0.0
-		zeta4 = 0.0
-		for i in range(gauss):
-			zeta1 = self.gaussPnts[i][0]
-			zeta2 = self.gaussPnts[i][1]
-			zeta3 = self.gaussPnts[i][2]
-			zeta4 = self.gaussPnts[i][3]
-
-			[detJ,B] = self.calcStrainDisplacementMatrix(zeta1,zeta2,zeta3,zeta4)
+		table = self.gaussQuad.shapeFunctionTable(self,'gauss')
+		for i in range(len(table['w'])):
+			[detJ,B] = self.calcStrainDisplacementMatrix(table['dNf_dqc'][i])
 			if calcStrain:
 				self.solutions[sol]['strain']['int_points'][i+1] = {'strain_tensor': B.dot(u), 
 											'VonMises': 0., 'MaxPrinc': 0., 'MinPrinc': 0., 'MaxShear': 0.}
 			if calcStress:
 				self.solutions[sol]['stress']['int_points'][i+1] = {'stress_tensor': self.section.E.dot(B.dot(u)), 
 											'VonMises': 0., 'MaxPrinc': 0., 'MinPrinc': 0., 'MaxShear': 0.}
-		
-		zeta = [[1.,0.,0.,0.], [0.,1.,0.,0.], [0.,0.,1.,0.], [0.,0.,0.,1.], [.5,.5,0.,0.],
-				[0.,.5,.5,0.], [.5,0.,.5,0.], [.5,0.,0.,.5], [0.,.5,0.,.5], [0.,0.,.5,.5]]
-		for j in range(nodal):
-			zeta1 = zeta[j][0]
-			zeta2 = zeta[j][1]
-			zeta3 = zeta[j][2]
-			zeta4 = zeta[j][3]
 
-			[invdetJ,B] = self.calcStrainDisplacementMatrix(zeta1,zeta2,zeta3,zeta4)
+		table = self.gaussQuad.shapeFunctionTable(self,'nodal')
+		for j in range(nodal):
+			[detJ,B] = self.calcStrainDisplacementMatrix(table['dNf_dqc'][j])
 			if calcStrain:
 				self.solutions[sol]['strain']['nodal'][j+1] = {'strain_tensor': B.dot(u), 
 									'VonMises': 0., 'MaxPrinc': 0., 'MinPrinc': 0., 'MaxShear': 0.}
@@ -2405,6 +2476,7 @@ Has 3 active degrees of freedom per node.
 8 nodes gives 24 degrees of freedom total.
 '''
 	def __init__(self,number,sect,nodes,gaussQuad,reducedIntegration=False):
+		self.gaussQuad = gaussQuad
 		if reducedIntegration == True:
 			self.reducedIntegration = True
 			self.gaussPnts = gaussQuad.quad_p1
@@ -2430,10 +2502,22 @@ Has 3 active degrees of freedom per node.
 				self.nodes[i].NFS[2] = 1
 
 
-	def calcStrainDisplacementMatrix(self,zeta,eta,ksi):
+	def shapeFunctions(self,ksi,eta,zeta):
 		'''
-	Calculate the B-matrix given specific
-	shape function coordinates.
+	Shape functions given specific
+	natural coordinates.
+	'''
+		return np.array([(1.-ksi)*(1.-eta)*(1.-zeta)*0.125, (1.+ksi)*(1.-eta)*(1.-zeta)*0.125,
+						 (1.+ksi)*(1.+eta)*(1.-zeta)*0.125, (1.-ksi)*(1.+eta)*(1.-zeta)*0.125,
+						 (1.-ksi)*(1.-eta)*(1.+zeta)*0.125, (1.+ksi)*(1.-eta)*(1.+zeta)*0.125,
+						 (1.+ksi)*(1.+eta)*(1.+zeta)*0.125, (1.-ksi)*(1.+eta)*(1.+zeta)*0.125])
+
+
+	def shapeFunctionDerivatives(self,ksi,eta,zeta):
+		'''
+	Derivatives of the shape functions with respect
+	to the natural coordinates (ksi, eta, zeta), one
+	row per node.
 	'''
 		dNf_dqc = np.array([[-(1.-eta)*(1.-zeta)*0.125, -(1.-ksi)*(1.-zeta)*0.125, -(1.-ksi)*(1.-eta)*0.125],
 							[ (1.-eta)*(1.-zeta)*0.125, -(1.+ksi)*(1.-zeta)*0.125, -(1.+ksi)*(1.-eta)*0.125],
@@ -2443,34 +2527,74 @@ Has 3 active degrees of freedom per node.
 							[ (1.-eta)*(1.+zeta)*0.125, -(1.+ksi)*(1.+zeta)*0.125,  (1.+ksi)*(1.-eta)*0.125],
 							[ (1.+eta)*(1.+zeta)*0.125,  (1.+ksi)*(1.+zeta)*0.125,  (1.+ksi)*(1.+eta)*0.125],
 							[-(1.+eta)*(1.+zeta)*0.125,  (1.-ksi)*(1.+zeta)*0.125,  (1.-ksi)*(1.+eta)*0.125]])
+		return dNf_dqc
+
+
+	def integrationPoints(self):
+		'''
+	Natural coordinates and weights of
+	the integration points.
+	'''
+		qc = []
+		w = []
+		for i in range(len(self.gaussPnts)):
+			for j in range(len(self.gaussPnts)):
+				for k in range(len(self.gaussPnts)):
+					qc.append([self.gaussPnts[i][0], self.gaussPnts[j][0], self.gaussPnts[k][0]])
+					w.append(self.gaussPnts[i][1]*self.gaussPnts[j][1]*self.gaussPnts[k][1])
+		return [qc, w]
+
+
+	def massIntegrationPoints(self):
+		'''
+	Natural coordinates and weights of the
+	integration points of the consistent mass
+	matrix, 3x3x3 Gauss points.
+	'''
+		qc = []
+		w = []
+		rule = self.gaussQuad.quad_p3
+		for i in range(len(rule)):
+			for j in range(len(rule)):
+				for k in range(len(rule)):
+					qc.append([rule[i][0], rule[j][0], rule[k][0]])
+					w.append(rule[i][1]*rule[j][1]*rule[k][1])
+		return [qc, w]
+
+
+	def nodalPoints(self):
+		'''
+	Natural coordinates of the points where
+	nodal results are calculated.
+	'''
+		return [[-1.,-1.,-1.], [ 1.,-1.,-1.], [ 1., 1.,-1.], [-1., 1.,-1.],
+				[-1.,-1., 1.], [ 1.,-1., 1.], [ 1., 1., 1.], [-1., 1., 1.]]
 
-		J = np.zeros((3,3))
-		for i in range(3):
-			for j in range(3):
-				for a in range(8):
-					J[i][j] = J[i][j] + self.nodes[a].coord[i][0]*dNf_dqc[a][j]
+
+	def calcStrainDisplacementMatrix(self,dNf_dqc):
+		'''
+	Calculate the B-matrix given the shape function
+	derivatives at a specific point, taken from the
+	shape function table in GaussQuad.
+	'''
+		J = self.nodeCoordinates().T.dot(dNf_dqc)
 
 		detJ = J[0][0]*(J[1][1]*J[2][2]-J[2][1]*J[1][2]) + \
-			   J[0][1]*(J[2][1]*J[0][2]-J[0][1]*J[2][2]) + \
-			   J[0][2]*(J[0][1]*J[1][2]-J[0][2]*J[1][1])
-			
+			   J[0][1]*(J[1][2]*J[2][0]-J[1][0]*J[2][2]) + \
+			   J[0][2]*(J[1][0]*J[2][1]-J[1][1]*J[2][0])
+
 		invdetJ = 1.0/detJ
 		invJ = np.array([[invdetJ*(J[1][1]*J[2][2]-J[2][1]*J[1][2]),
 						  invdetJ*(J[2][1]*J[0][2]-J[0][1]*J[2][2]),
 						  invdetJ*(J[0][1]*J[1][2]-J[0][2]*J[1][1])],
-						 [invdetJ*(J[1][0]*J[2][2]-J[2][0]*J[1][2]),
+						 [invdetJ*(J[1][2]*J[2][0]-J[1][0]*J[2][2]),
 						  invdetJ*(J[0][0]*J[2][2]-J[2][0]*J[0][2]),
 						  invdetJ*(J[0][2]*J[1][0]-J[1][2]*J[0][0])],
 						 [invdetJ*(J[1][0]*J[2][1]-J[2][0]*J[1][1]), 
 						  invdetJ*(J[2][0]*J[0][1]-J[2][1]*J[0][0]), 
 						  invdetJ*(J[0][0]*J[1][1]-J[1][0]*J[0][1])]])
 
-		dNf_drc = np.zeros((8,3))
-		for a in range(8):
-			for i in range(3):
-				for j in range(3):
-					dNf_drc[a][i] = dNf_drc[a][i] + dNf_dqc[a][j]*invJ[j][i]
-		dNf_drc = dNf_drc.T
+		dNf_drc = invJ.T.dot(dNf_dqc.T)
 
 		B = [[],[],[],[],[],[]]
 		for l in range(8):
@@ -2508,35 +2632,17 @@ Has 3 active degrees of freedom per node.
 	isoparametric shape functions and Gauss Quadrature.
 	'''
 		self.K = np.array([[0.0,]*24,]*24)
-		gauss = len(self.gaussPnts)
-
-		ksi = 0.0
-		eta = 0.0
-		zeta = 0.0
-		w_i = 0.0
-		w_j = 0.0
-		w_k = 0.0
-
-		for i in range(gauss):
-			ksi = self.gaussPnts[i][0]
-			w_i = self.gaussPnts[i][1]
+		table = self.gaussQuad.shapeFunctionTable(self,'gauss')
+		for i in range(len(table['w'])):
+			[detJ,B] = self.calcStrainDisplacementMatrix(table['dNf_dqc'][i])
+			self.K = ((B.transpose().dot(self.section.E)).dot(B))*(table['w'][i]*detJ) + self.K
 
-			for j in range(gauss):
-				eta = self.gaussPnts[j][0]
-				w_j = self.gaussPnts[j][1]
-
-				for k in range(gauss):
-					zeta = self.gaussPnts[k][0]
-					w_k = self.gaussPnts[k][1]
-
-					[detJ,B] = self.calcStrainDisplacementMatrix(ksi,eta,zeta)
-					self.K = ((B.T.dot(self.section.E)).dot(B))*(w_i*w_j*w_k*detJ) + self.K
-			
 
 	def calcMassMatrix(self):
 		'''
 	Calculate the element mass matrix using the
-	lumped mass matrix method.
+	lumped mass matrix method, stored as the vector
+	of its diagonal.
 	'''
 		a0 = [0, 0, 0, 0, 2]
 		ab = [1, 5, 5, 2, 6]
@@ -2554,7 +2660,7 @@ Has 3 active degrees of freedom per node.
 					self.nodes[ad[i]].coord[1][0]-self.nodes[a0[i]].coord[1][0],
 					self.nodes[ad[i]].coord[2][0]-self.nodes[a0[i]].coord[2][0]]
 			volume += np.linalg.det(np.array([ab_v,ac_v,ad_v]))/6.0
-		self.M = np.identity(24)*(self.section.material.density*volume*0.125)
+		self.M = np.full(24,self.section.material.density*volume*0.125)
 
 
 	def calcStrain(self,u,calcStrain,calcStress,sol):
@@ -2572,36 +2678,19 @@ Has 3 active degrees of freedom per node.
 		ngauss = gauss**3
 		nodal = 8
 
-		ksi = 0.0
-		eta = 0.0
-		zeta = 0.0
-
-		h = 1
-		for i in range(gauss):
-			ksi = self.gaussPnts[i][0]
-			for j in range(gauss):
-				eta = self.gaussPnts[j][0]
-				for k in range(gauss):
-					zeta = self.gaussPnts[k][0]
-
-					[detJ,B] = self.calcStrainDisplacementMatrix(zeta,eta,ksi)
-					if calcStrain:
-						self.solutions[sol]['strain']['int_points'][h] = {'strain_tensor': B.dot(u), 
-												'VonMises': 0., 'MaxPrinc': 0., 'MinPrinc': 0., 'MaxShear': 0.}
-					if calcStress:
-						self.solutions[sol]['stress']['int_points'][h] = {'stress_tensor': self.section.E.dot(B.dot(u)), 
-												'VonMises': 0., 'MaxPrinc': 0., 'MinPrinc': 0., 'MaxShear': 0.}
-					h += 1
-
-		ksietazeta = [[-1.,-1.,-1.], [ 1.,-1.,-1.], [ 1., 1.,-1.], [-1., 1.,-1.],
-					  [-1.,-1., 1.], [ 1.,-1., 1.], [ 1., 1., 1.], [-1., 1., 1.]]
-		for j in range(nodal):
-			ksi  = ksietazeta[j][0]
-			eta  = ksietazeta[j][1]
-			zeta = ksietazeta[j][2]
-
-			[detJ,B] = self.calcStrainDisplacementMatrix(zeta,eta,ksi)
+		table = self.gaussQuad.shapeFunctionTable(self,'gauss')
+		for i in range(len(table['w'])):
+			[detJ,B] = self.calcStrainDisplacementMatrix(table['dNf_dqc'][i])
+			if calcStrain:
+				self.solutions[sol]['strain']['int_points'][i+1] = {'strain_tensor': B.dot(u), 
+											'VonMises': 0., 'MaxPrinc': 0., 'MinPrinc': 0., 'MaxShear': 0.}
+			if calcStress:
+				self.solutions[sol]['stress']['int_points'][i+1] = {'stress_tensor': self.section.E.dot(B.dot(u)), 
+											'VonMises': 0., 'MaxPrinc': 0., 'MinPrinc': 0., 'MaxShear': 0.}
 
+		table = self.gaussQuad.shapeFunctionTable(self,'nodal')
+		for j in range(nodal):
+			[detJ,B] = self.calcStrainDisplacementMatrix(table['dNf_dqc'][j])
 			if calcStrain:
 				self.solutions[sol]['strain']['nodal'][j+1] = {'strain_tensor': B.dot(u), 
 									'VonMises': 0., 'MaxPrinc': 0., 'MinPrinc': 0., 'MaxShear': 0.}
@@ -2682,6 +2771,7 @@ Has 3 active degrees of freedom per node.
 20 nodes gives 60 degrees of freedom total.
 '''
 	def __init__(self,number,sect,nodes,gaussQuad):
+		self.gaussQuad = gaussQuad
 		self.gaussPnts = gaussQuad.quad_p3
 		super(HEX20N,self).__init__(number,sect,nodes)
 		self.EFS = [[1,1,1,0,0,0],]*20
@@ -2702,10 +2792,30 @@ Has 3 active degrees of freedom per node.
 				self.nodes[i].NFS[2] = 1
 
 
-	def calcStrainDisplacementMatrix(self,zeta,eta,ksi):
+	def shapeFunctions(self,ksi,eta,zeta):
 		'''
-	Calculate the B-matrix given specific
-	shape function coordinates.
+	Shape functions given specific natural coordinates.
+	Corner nodes are the first 8 nodal points, and the
+	midside nodes the next 12.
+	'''
+		N = []
+		for [ksi_a,eta_a,zeta_a] in self.nodalPoints()[:20]:
+			if ksi_a != 0. and eta_a != 0. and zeta_a != 0.:
+				N.append((1.+ksi*ksi_a)*(1.+eta*eta_a)*(1.+zeta*zeta_a)*(ksi*ksi_a+eta*eta_a+zeta*zeta_a-2.)*0.125)
+			elif ksi_a == 0.:
+				N.append((1.-ksi**2)*(1.+eta*eta_a)*(1.+zeta*zeta_a)*0.25)
+			elif eta_a == 0.:
+				N.append((1.+ksi*ksi_a)*(1.-eta**2)*(1.+zeta*zeta_a)*0.25)
+			else:
+				N.append((1.+ksi*ksi_a)*(1.+eta*eta_a)*(1.-zeta**2)*0.25)
+		return np.array(N)
+
+
+	def shapeFunctionDerivatives(self,ksi,eta,zeta):
+		'''
+	Derivatives of the shape functions with respect
+	to the natural coordinates (ksi, eta, zeta), one
+	row per node.
 	'''
 		dNf_dqc = np.array([[( (eta-1)*(zeta-1)*( 2*ksi+eta+zeta+1))*0.125,
 							 (-(eta-1)*(zeta-1)*(-2*ksi+eta+zeta+1))*0.125,
@@ -2767,30 +2877,77 @@ Has 3 active degrees of freedom per node.
 							 (-((eta**2)-1)*(ksi+1))*0.25,
 							 (-((ksi**2)-1)*(eta+1))*0.25,
 							 ( ((eta**2)-1)*(ksi-1))*0.25]])
-		dNf_dqc = dNf_dqc.T
-		
-		J = np.zeros((3,3))
-		for i in range(3):
-			for j in range(3):
-				for a in range(20):
-					J[i][j] = J[i][j] + self.nodes[a].coord[i][0]*dNf_dqc[a][j]
+		return dNf_dqc.T
+
+
+	def integrationPoints(self):
+		'''
+	Natural coordinates and weights of
+	the integration points.
+	'''
+		qc = []
+		w = []
+		for i in range(len(self.gaussPnts)):
+			for j in range(len(self.gaussPnts)):
+				for k in range(len(self.gaussPnts)):
+					qc.append([self.gaussPnts[i][0], self.gaussPnts[j][0], self.gaussPnts[k][0]])
+					w.append(self.gaussPnts[i][1]*self.gaussPnts[j][1]*self.gaussPnts[k][1])
+		return [qc, w]
+
+
+	def massIntegrationPoints(self):
+		'''
+	Natural coordinates and weights of the
+	integration points of the consistent mass
+	matrix, 3x3x3 Gauss points.
+	'''
+		qc = []
+		w = []
+		rule = self.gaussQuad.quad_p3
+		for i in range(len(rule)):
+			for j in range(len(rule)):
+				for k in range(len(rule)):
+					qc.append([rule[i][0], rule[j][0], rule[k][0]])
+					w.append(rule[i][1]*rule[j][1]*rule[k][1])
+		return [qc, w]
+
+
+	def nodalPoints(self):
+		'''
+	Natural coordinates of the points where
+	nodal results are calculated.
+	'''
+		return [[-1.,-1.,-1.], [ 1.,-1.,-1.], [ 1., 1.,-1.], [-1., 1.,-1.], [-1.,-1., 1.],
+				[ 1.,-1., 1.], [ 1., 1., 1.], [-1., 1., 1.], [ 0.,-1.,-1.], [ 1., 0.,-1.],
+				[ 0., 1.,-1.], [-1., 0.,-1.], [-1.,-1., 0.], [ 1.,-1., 0.], [ 1., 1., 0.],
+				[-1., 1., 0.], [ 0.,-1., 1.], [ 1., 0., 1.], [ 0., 1., 1.], [-1., 0., 1.],
+				[ 0., 0.,-1.], [ 0., 0., 1.], [ 0.,-1., 0.], [ 1., 0., 0.], [ 0., 1., 0.], [-1., 0., 0.]]
+
+
+	def calcStrainDisplacementMatrix(self,dNf_dqc):
+		'''
+	Calculate the B-matrix given the shape function
+	derivatives at a specific point, taken from the
+	shape function table in GaussQuad.
+	'''
+		J = self.nodeCoordinates().T.dot(dNf_dqc)
 
 		detJ = J[0][0]*(J[1][1]*J[2][2]-J[2][1]*J[1][2]) + \
-			   J[0][1]*(J[2][1]*J[0][2]-J[0][1]*J[2][2]) + \
-			   J[0][2]*(J[0][1]*J[1][2]-J[0][2]*J[1][1])
+			   J[0][1]*(J[1][2]*J[2][0]-J[1][0]*J[2][2]) + \
+			   J[0][2]*(J[1][0]*J[2][1]-J[1][1]*J[2][0])
 
 		invdetJ = 1.0/detJ
-		invJ = np.array([[invdetJ*(J[1][1]*J[2][2]-J[2][1]*J[1][2]), 
-						  invdetJ*(J[1][0]*J[2][2]-J[2][0]*J[1][2]), 
-						  invdetJ*(J[1][0]*J[2][1]-J[2][0]*J[1][1])],
-						 [invdetJ*(J[2][1]*J[0][2]-J[0][1]*J[2][2]), 
+		invJ = np.array([[invdetJ*(J[1][1]*J[2][2]-J[2][1]*J[1][2]),
+						  invdetJ*(J[2][1]*J[0][2]-J[0][1]*J[2][2]),
+						  invdetJ*(J[0][1]*J[1][2]-J[0][2]*J[1][1])],
+						 [invdetJ*(J[1][2]*J[2][0]-J[1][0]*J[2][2]),
 						  invdetJ*(J[0][0]*J[2][2]-J[2][0]*J[0][2]),
-						  invdetJ*(J[2][0]*J[0][1]-J[2][1]*J[0][0])],
-						 [invdetJ*(J[0][1]*J[1][2]-J[0][2]*J[1][1]), 
-						  invdetJ*(J[0][2]*J[1][0]-J[1][2]*J[0][0]),
+						  invdetJ*(J[0][2]*J[1][0]-J[1][2]*J[0][0])],
+						 [invdetJ*(J[1][0]*J[2][1]-J[2][0]*J[1][1]), 
+						  invdetJ*(J[2][0]*J[0][1]-J[2][1]*J[0][0]), 
 						  invdetJ*(J[0][0]*J[1][1]-J[1][0]*J[0][1])]])
 
-		dNf_drc = invJ.dot(dNf_dqc.T)
+		dNf_drc = invJ.T.dot(dNf_dqc.T)
 
 		B = [[],[],[],[],[],[]]
 		for l in range(20):
@@ -2828,35 +2985,17 @@ Has 3 active degrees of freedom per node.
 	isoparametric shape functions and Gauss Quadrature.
 	'''
 		self.K = np.array([[0.0,]*60,]*60)
-		gauss = len(self.gaussPnts)
-
-		ksi = 0.0
-		eta = 0.0
-		zeta = 0.0
-		w_i = 0.0
-		w_j = 0.0
-		w_k = 0.0
-
-		for i in range(gauss):
-			ksi = self.gaussPnts[i][0]
-			w_i = self.gaussPnts[i][1]
-
-			for j in range(gauss):
-				eta = self.gaussPnts[j][0]
-				w_j = self.gaussPnts[j][1]
-
-				for k in range(gauss):
-					zeta = self.gaussPnts[k][0]
-					w_k = self.gaussPnts[k][1]
-
-					[detJ,B] = self.calcStrainDisplacementMatrix(ksi,eta,zeta)
-					self.K = ((B.transpose().dot(self.section.E)).dot(B))*(w_i*w_j*w_k*detJ) + self.K
+		table = self.gaussQuad.shapeFunctionTable(self,'gauss')
+		for i in range(len(table['w'])):
+			[detJ,B] = self.calcStrainDisplacementMatrix(table['dNf_dqc'][i])
+			self.K = ((B.transpose().dot(self.section.E)).dot(B))*(table['w'][i]*detJ) + self.K
 
 
 	def calcMassMatrix(self):
 		'''
 	Calculate the element mass matrix using the
-	lumped mass matrix method.
+	lumped mass matrix method, stored as the vector
+	of its diagonal.
 	'''
 		a0 = [0, 0, 0, 0, 2]
 		ab = [1, 5, 5, 2, 6]
@@ -2874,7 +3013,7 @@ Has 3 active degrees of freedom per node.
 					self.nodes[ad[i]].coord[1][0]-self.nodes[a0[i]].coord[1][0],
 					self.nodes[ad[i]].coord[2][0]-self.nodes[a0[i]].coord[2][0]]
 			volume += np.linalg.det(np.array([ab_v,ac_v,ad_v]))/6.0
-		self.M = np.identity(60)*(self.section.material.density*volume*0.05)
+		self.M = np.full(60,self.section.material.density*volume*0.05)
 
 
 	def calcStrain(self,u,calcStrain,calcStress,sol):
@@ -2894,39 +3033,19 @@ Has 3 active degrees of freedom per node.
 		ngauss = gauss**3
 		nodal = 26
 
-		ksi = 0.0
-		eta = 0.0
-		zeta = 0.0
-
-		h = 1
-		for i in range(gauss):
-			ksi = self.gaussPnts[i][0]
-			for j in range(gauss):
-				eta = self.gaussPnts[j][0]
-				for k in range(gauss):
-					zeta = self.gaussPnts[k][0]
-
-					[detJ,B] = self.calcStrainDisplacementMatrix(zeta,eta,ksi)
-					if calcStrain:
-						self.solutions[sol]['strain']['int_points'][h] = {'strain_tensor': B.dot(u), 
-												'VonMises': 0., 'MaxPrinc': 0., 'MinPrinc': 0., 'MaxShear': 0.}
-					if calcStress:
-						self.solutions[sol]['stress']['int_points'][h] = {'stress_tensor': self.section.E.dot(B.dot(u)), 
-												'VonMises': 0., 'MaxPrinc': 0., 'MinPrinc': 0., 'MaxShear': 0.}
-					h += 1
-
-		ksietazeta = [[-1.,-1.,-1.], [ 1.,-1.,-1.], [ 1., 1.,-1.], [-1., 1.,-1.], [-1.,-1., 1.],
-					  [ 1.,-1., 1.], [ 1., 1., 1.], [-1., 1., 1.], [ 0.,-1.,-1.], [ 1., 0.,-1.],
-					  [ 0., 1.,-1.], [-1., 0.,-1.], [-1.,-1., 0.], [ 1.,-1., 0.], [ 1., 1., 0.],
-					  [-1., 1., 0.], [ 0.,-1., 1.], [ 1., 0., 1.], [ 0., 1., 1.], [-1., 0., 1.],
-					  [ 0., 0.,-1.], [ 0., 0., 1.], [ 0.,-1., 0.], [ 1., 0., 0.], [ 0., 1., 0.], [-1., 0., 0.]]
-		for j in range(nodal):
-			ksi = ksietazeta[j][0]
-			eta = ksietazeta[j][1]
-			zeta = ksietazeta[j][2]
-
-			[detJ,B] = self.calcStrainDisplacementMatrix(zeta,eta,ksi)
+		table = self.gaussQuad.shapeFunctionTable(self,'gauss')
+		for i in range(len(table['w'])):
+			[detJ,B] = self.calcStrainDisplacementMatrix(table['dNf_dqc'][i])
+			if calcStrain:
+				self.solutions[sol]['strain']['int_points'][i+1] = {'strain_tensor': B.dot(u), 
+											'VonMises': 0., 'MaxPrinc': 0., 'MinPrinc': 0., 'MaxShear': 0.}
+			if calcStress:
+				self.solutions[sol]['stress']['int_points'][i+1] = {'stress_tensor': self.section.E.dot(B.dot(u)), 
+											'VonMises': 0., 'MaxPrinc': 0., 'MinPrinc': 0., 'MaxShear': 0.}
 
+		table = self.gaussQuad.shapeFunctionTable(self,'nodal')
+		for j in range(nodal):
+			[detJ,B] = self.calcStrainDisplacementMatrix(table['dNf_dqc'][j])
 			if calcStrain:
 				self.solutions[sol]['strain']['nodal'][j+1] = {'strain_tensor': B.dot(u), 
 									'VonMises': 0., 'MaxPrinc': 0., 'MinPrinc': 0., 'MaxShear': 0.}
@@ -0,0 +1,133 @@
+#
+#
+#	factorization.py
+#  ------------------
+#
+#	This is the factorization module. It holds sparse direct
+#	factorizations of constrained stiffness matrices, so that
+#	solutions on the same mesh with the same boundary conditions
+#	and multipoint constraints can share one factorization. It is
+#	used for static load cases, for the shift-invert operator of
+#	the eigenvalue solver and for the static correction in modal
+#	dynamics. CHOLMOD (scikit-sparse) is used when it is installed,
+#	otherwise SuperLU from scipy.
+#
+
+
+import numpy as np
+import scipy.sparse as sp
+import scipy.sparse.linalg
+
+try:
+	from sksparse import cholmod
+except ImportError:
+	cholmod = None
+
+
+
+
+
+
+class Factorization(object):
+	'''
+Sparse direct factorization of a square matrix.
+A Cholesky factorization (CHOLMOD) is tried first
+for symmetric positive definite matrices, and
+SuperLU is used if CHOLMOD is not available or
+the matrix is not positive definite (for instance
+with lagrange multipliers from MPCs).
+
+self.shape		- shape of factorized matrix
+self.method		- 'cholmod' or 'superlu'
+self.factor		- factor object used to solve
+'''
+	def __init__(self,K,positiveDefinite=True):
+		K = sp.csc_matrix(K)
+		self.shape = K.shape
+		self.factor = None
+		if cholmod is not None and positiveDefinite:
+			try:
+				self.factor = cholmod.cholesky(K)
+				self.method = 'cholmod'
+			except cholmod.CholmodError:
+				self.factor = None
+		if self.factor is None:
+			self.factor = sp.linalg.splu(K)
+			self.method = 'superlu'
+
+
+	def solve(self,b):
+		'''
+	Solve K x = b for one right-hand side
+	vector or for the columns of a dense
+	array of right-hand sides.
+	'''
+		b = np.asarray(b,dtype=float)
+		if self.method == 'cholmod':
+			return self.factor(b)
+		else:
+			return self.factor.solve(b)
+
+
+	def linearOperator(self):
+		'''
+	The inverse of the factorized matrix as a
+	scipy LinearOperator. Used as OPinv with
+	sigma = 0 in the shift-invert mode of eigsh.
+	'''
+		return sp.linalg.LinearOperator(self.shape,matvec=self.solve,dtype=float)
+
+
+
+
+
+
+class FactorizationCache(object):
+	'''
+Cache of factorizations of constrained stiffness
+matrices for one mesh. The constrained stiffness
+matrix K_11 only depends on the mesh stiffness
+matrix, the set of fixed DOFs and the multipoint
+constraints (with lagrange multipliers or eliminated),
+so these are used as key. The values
+of the fixed displacements do not change K_11.
+
+The cache is kept in mesh.factorizations while the
+solutions on the mesh are running, and must be
+deleted before the model is written to file since
+the factor objects can not be pickled.
+
+self.factors	- factorizations by key
+self.reused		- number of times a factorization
+				  was taken from the cache
+'''
+	def __init__(self):
+		self.factors = {}
+		self.reused = 0
+
+
+	def key(self,fixedDOFs,MPCs,ties=None):
+		'''
+	Key for a set of fixed DOFs, MPCs with lagrange
+	multipliers and tied DOFs that are eliminated.
+	'''
+		if ties is None:
+			ties = {}
+		return (tuple(sorted(fixedDOFs.keys())),
+				tuple(tuple(MPCs[MPC]) for MPC in sorted(MPCs.keys())),
+				tuple(tuple(ties[tie]) for tie in sorted(ties.keys())))
+
+
+	def factorize(self,K_11,fixedDOFs,MPCs,ties=None):
+		'''
+	Return the factorization of K_11 for the given
+	fixed DOFs, MPCs and tied DOFs. The matrix is only
+	factorized the first time a key is asked for.
+	'''
+		key = self.key(fixedDOFs,MPCs,ties)
+		if key in self.factors:
+			self.reused += 1
+			print('\tReusing factorization of stiffness matrix...')
+		else:
+			self.factors[key] = Factorization(K_11,positiveDefinite=(len(MPCs) == 0))
+		return self.factors[key]
@@ -0,0 +1,129 @@
+#
+#
+#	histories.py
+#  --------------
+#
+#	This is the histories module. It writes the time histories
+#	of a dynamic solution at the requested DOFs to a binary .npy
+#	file while the modal equations are integrated, one block of
+#	time steps at a time, so that only one block of the histories
+#	is kept in memory. The histories are read back from the file
+#	a block at a time for text output, or as whole histories of
+#	single DOFs for plotting.
+#
+
+
+import os
+import numpy as np
+
+
+
+
+
+class HistoryStore(object):
+	'''
+Time histories of a solution at a set of DOFs (the
+columns), stored in a .npy file as an array of
+(blocks, columns, steps in block). Every block is
+written to the file as one contiguous piece in the
+order it is calculated, and a whole history is read
+as one contiguous piece from each block.
+
+The file is memory-mapped, so pickling the store with
+ResultArchive only keeps a reference to the file. An
+earlier file of the same name is removed before the
+new one is created instead of being resized in place,
+since the viewer may still have it memory-mapped.
+
+self.filename	- .npy file of the histories
+self.columns	- label of every column
+self.index		- column of every label
+self.n			- number of time steps
+self.chunk		- number of time steps in a block
+self.data		- memory map of the file
+self.written	- number of time steps written
+'''
+	def __init__(self,filename,columns,n,chunk=4096):
+		self.filename = filename
+		self.columns = list(columns)
+		self.index = dict(zip(self.columns,range(len(self.columns))))
+		self.n = n
+		self.chunk = chunk
+		if os.path.exists(filename):
+			os.remove(filename)
+		self.data = np.lib.format.open_memmap(filename,mode='w+',dtype=float,
+								shape=(-(-n//chunk),len(self.columns),chunk))
+		self.written = 0
+
+
+	def append(self,block):
+		'''
+	Write the histories of the next time steps, given
+	as a (columns, time steps) array, to the file.
+	'''
+		start = 0
+		while start < block.shape[1]:
+			[i, j] = divmod(self.written,self.chunk)
+			steps = min(self.chunk-j,block.shape[1]-start)
+			self.data[i,:,j:j+steps] = block[:,start:start+steps]
+			self.written += steps
+			start += steps
+		if self.written == self.n:
+			self.data.flush()
+
+
+	def history(self,label):
+		'''
+	Whole time history of the column with label.
+	'''
+		return self.data[:,self.index[label],:].reshape(-1)[:self.n]
+
+
+	def blocks(self,labels):
+		'''
+	Histories of the columns with labels, as
+	(time steps, columns) arrays of one block at a
+	time, for writing them as rows of text.
+	'''
+		columns = [self.index[label] for label in labels]
+		for i in range(len(self.data)):
+			steps = min(self.chunk,self.n-i*self.chunk)
+			yield self.data[i][columns,:steps].T
+
+
+	def column(self,label):
+		'''
+	History of one column, read from the file
+	when it is used.
+	'''
+		return HistoryColumn(self,label)
+
+
+
+
+
+
+class HistoryColumn(object):
+	'''
+Time history of one column of a HistoryStore. It is
+read from the file of the store when it is converted
+to an array (np.asarray, or plotting it), so that the
+histories of a solution are not held in memory.
+'''
+	__slots__ = ['store', 'label']
+
+	def __init__(self,store,label):
+		self.store = store
+		self.label = label
+
+
+	def __array__(self,dtype=None,copy=None):
+		return np.asarray(self.store.history(self.label),dtype=dtype)
+
+
+	def __len__(self):
+		return self.store.n
+
+
+	def __getitem__(self,index):
+		return self.store.history(self.label)[index]
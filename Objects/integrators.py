@@ -0,0 +1,465 @@
+#
+#
+#	integrators.py
+#  ----------------
+#
+#	This is the integrators module. It holds the time integration
+#	schemes used by the modal dynamics solver. The modal equations
+#	of motion are uncoupled, so every integrator advances all modes
+#	together one time step at a time with numpy arrays, and stores
+#	the modal responses in (modes, time steps) arrays. The time
+#	stepping integrators can also integrate a block of time steps
+#	at a time, so that long time histories are not kept in memory.
+#	The frequency domain integrator solves all modes and time
+#	steps at once with the fast fourier transform instead.
+#
+
+
+import numpy as np
+import scipy.fft
+import scipy.linalg
+
+
+
+
+
+
+class NewmarkIntegrator(object):
+	'''
+Newmark time integration of uncoupled modal
+equations of motion, for all modes at once:
+
+	m q'' + c q' + k q = p(t)
+
+m, c and k are vectors with one value per mode
+(modal mass, damping and stiffness) and p is a
+(modes, time steps) array of modal forces.
+
+self.dt			- size of time step
+self.alpha		- Newmark parameter (0.25 gives the
+				  constant average acceleration method)
+self.beta		- Newmark parameter
+self.a			- Newmark coefficients a0 - a7
+'''
+	def __init__(self,dt,alpha=0.25,beta=0.5):
+		self.dt = dt
+		self.alpha = alpha
+		self.beta = beta
+		self.a = self.coefficients()
+
+
+	def coefficients(self):
+		'''
+	Calculates the Newmark coefficients used
+	for iteration when calculating the displacements.
+	'''
+		dt = self.dt
+		alpha = self.alpha
+		beta = self.beta
+
+		a0=1/(alpha*(dt**2))
+		a1=beta/(alpha*dt)
+		a2=1/(alpha*dt)
+		a3=(1/(2*alpha))-1
+		a4=(beta/alpha)-1
+		a5=(dt/2)*((beta/alpha)-2)
+		a6=dt*(1-beta)
+		a7=beta*dt
+
+		return [a0,a1,a2,a3,a4,a5,a6,a7]
+
+
+	def integrate(self,m,c,k,p,q0=None,dq0=None):
+		'''
+	Integrate the modal equations over all time steps
+	of p. Column j of p is the modal force used to find
+	the response at time step j, so the first column is
+	not used. The initial accelerations are zero.
+
+	q, dq, ddq		- modal displacements, velocities and
+					  accelerations (modes, time steps)
+	'''
+		[[q, dq, ddq]] = list(self.blocks(m,c,k,[p],q0,dq0))
+		return [q, dq, ddq]
+
+
+	def blocks(self,m,c,k,forces,q0=None,dq0=None):
+		'''
+	Integrate the modal equations over consecutive
+	blocks of time steps. forces gives the modal forces
+	of every block as (modes, time steps) arrays, the
+	first block starting at time step 0, and the response
+	of a block is yielded as [q, dq, ddq] before the
+	forces of the next block are used.
+	'''
+		[a0,a1,a2,a3,a4,a5,a6,a7] = self.a
+		m = np.asarray(m,dtype=float)
+		c = np.asarray(c,dtype=float)
+		k = np.asarray(k,dtype=float)
+		invKH = 1./(k + a0*m + a1*c)
+
+		# the last time step of the previous block is kept
+		# as the first column of the arrays of a block
+		previous = None
+		for p in forces:
+			nModes, n = p.shape
+			first = 0 if previous is None else 1
+			q = np.zeros((nModes,n+first))
+			dq = np.zeros((nModes,n+first))
+			ddq = np.zeros((nModes,n+first))
+			if previous is not None:
+				[q[:,0], dq[:,0], ddq[:,0]] = previous
+			else:
+				if q0 is not None:
+					q[:,0] = q0
+				if dq0 is not None:
+					dq[:,0] = dq0
+
+			for j in range(1,n+first):
+				FH = p[:,j-first] + m*(a0*q[:,j-1] + a2*dq[:,j-1] + a3*ddq[:,j-1]) + \
+							  c*(a1*q[:,j-1] + a4*dq[:,j-1] + a5*ddq[:,j-1])
+				q[:,j] = FH*invKH
+				ddq[:,j] = a0*(q[:,j]-q[:,j-1]) - a2*dq[:,j-1] - a3*ddq[:,j-1]
+				dq[:,j] = dq[:,j-1] + a6*ddq[:,j-1] + a7*ddq[:,j]
+
+			previous = [q[:,-1], dq[:,-1], ddq[:,-1]]
+			yield [q[:,first:], dq[:,first:], ddq[:,first:]]
+
+
+
+
+
+
+class NigamJenningsIntegrator(object):
+	'''
+Exact recursive integration (Nigam and Jennings) of
+uncoupled modal equations of motion, for all modes
+at once:
+
+	m q'' + c q' + k q = p(t)
+
+The modal force is taken as piecewise linear between
+time steps, and for such a force the recurrence is
+exact for every mode, whatever the size of the time
+step. The recurrence coefficients only depend on the
+frequency and damping ratio of each mode and on the
+time step, so they are calculated once before the
+time loop. The closed form of the coefficients divides
+by zero for rigid body modes (zero frequency) and for
+critically damped modes, and loses precision when the
+time step is a small fraction of the period, so the
+coefficients of those modes are calculated with the
+matrix exponential instead.
+
+self.dt			- size of time step
+self.minimumStep	- smallest omega*dt for the closed form
+self.critical	- closest damping ratio to one for the
+				  closed form
+'''
+	def __init__(self,dt,minimumStep=1.0e-1,critical=1.0e-6):
+		self.dt = dt
+		self.minimumStep = minimumStep
+		self.critical = critical
+
+
+	def coefficients(self,omega,dampRatio):
+		'''
+	Calculates the recurrence coefficients for every
+	mode. The displacement and velocity at the next
+	time step are:
+
+		q[j]  = A11 q[j-1] + A12 dq[j-1] + B11 f[j-1] + B12 f[j]
+		dq[j] = A21 q[j-1] + A22 dq[j-1] + B21 f[j-1] + B22 f[j]
+
+	where f is the modal force divided by the modal mass.
+	The damped frequency is imaginary for overdamped modes,
+	so the coefficients are calculated with complex numbers
+	and the real part is used.
+
+	omega		- undamped circular frequency of each mode
+	dampRatio	- damping ratio of each mode
+	'''
+		dt = self.dt
+		w = np.asarray(omega,dtype=complex)
+		z = np.asarray(dampRatio,dtype=complex)
+
+		sz = np.sqrt(1.-z**2)
+		wd = w*sz
+		E = np.exp(-z*w*dt)
+		S = np.sin(wd*dt)
+		C = np.cos(wd*dt)
+
+		A11 = E*(z/sz*S + C)
+		A12 = E*S/wd
+		A21 = -w/sz*E*S
+		A22 = E*(C - z/sz*S)
+
+		b1 = (2*z**2-1)/(w**2*dt)
+		b2 = 2*z/(w**3*dt)
+		B11 = b2 - E*((b1 + z/w)*S/wd + (b2 + 1/w**2)*C)
+		B12 = E*(b1*S/wd + b2*C) + 1/w**2 - b2
+		B21 = E*((b2 + 1/w**2)*(wd*S + z*w*C) - (b1 + z/w)*(C - z/sz*S)) - 1/(w**2*dt)
+		B22 = E*(b1*(C - z/sz*S) - b2*(wd*S + z*w*C)) + 1/(w**2*dt)
+
+		return [np.real(A) for A in [A11,A12,A21,A22,B11,B12,B21,B22]]
+
+
+	def exactCoefficients(self,k,c):
+		'''
+	Calculates the same recurrence coefficients from the
+	matrix exponential of the equations of motion of each
+	mode, as first order equations of the state
+
+		(q, dq, f, df/dt)
+
+	where f is the linear force between the time steps.
+	It holds for any frequency and damping, also rigid
+	body modes and critically damped modes.
+
+	k			- modal stiffness divided by modal mass
+	c			- modal damping divided by modal mass
+	'''
+		dt = self.dt
+		S = np.zeros((len(k),4,4))
+		S[:,0,1] = 1.
+		S[:,1,0] = -k
+		S[:,1,1] = -c
+		S[:,1,2] = 1.
+		S[:,2,3] = 1.
+		E = scipy.linalg.expm(S*dt)
+
+		# the state at the start of a time step
+		# is (q, dq, f[j-1], (f[j]-f[j-1])/dt)
+		return [E[:,0,0], E[:,0,1], E[:,1,0], E[:,1,1],
+				E[:,0,2]-E[:,0,3]/dt, E[:,0,3]/dt, E[:,1,2]-E[:,1,3]/dt, E[:,1,3]/dt]
+
+
+	def integrate(self,m,c,k,p,q0=None,dq0=None):
+		'''
+	Integrate the modal equations over all time steps
+	of p. Column j of p is the modal force at time step
+	j, and the force varies linearly between the columns.
+	The accelerations follow from the equations of motion.
+
+	q, dq, ddq		- modal displacements, velocities and
+					  accelerations (modes, time steps)
+	'''
+		[[q, dq, ddq]] = list(self.blocks(m,c,k,[p],q0,dq0))
+		return [q, dq, ddq]
+
+
+	def blocks(self,m,c,k,forces,q0=None,dq0=None):
+		'''
+	Integrate the modal equations over consecutive
+	blocks of time steps. forces gives the modal forces
+	of every block as (modes, time steps) arrays, the
+	first block starting at time step 0, and the response
+	of a block is yielded as [q, dq, ddq] before the
+	forces of the next block are used.
+	'''
+		m = np.asarray(m,dtype=float)
+		c = np.asarray(c,dtype=float)
+		k = np.asarray(k,dtype=float)
+
+		omega = np.sqrt(np.maximum(k/m,0.))
+		dampRatio = c/(2.*m*np.where(omega > 0.,omega,1.))
+		closed = (omega*self.dt >= self.minimumStep) & (np.abs(1.-dampRatio) > self.critical)
+		coefficients = np.zeros((8,len(m)))
+		if np.any(closed):
+			coefficients[:,closed] = self.coefficients(omega[closed],dampRatio[closed])
+		if not np.all(closed):
+			coefficients[:,~closed] = self.exactCoefficients((k/m)[~closed],(c/m)[~closed])
+		[A11,A12,A21,A22,B11,B12,B21,B22] = coefficients
+
+		# the last time step of the previous block is kept
+		# as the first column of the arrays of a block
+		previous = None
+		for p in forces:
+			nModes, n = p.shape
+			first = 0 if previous is None else 1
+			f = np.zeros((nModes,n+first))
+			f[:,first:] = p/m[:,None]
+			q = np.zeros((nModes,n+first))
+			dq = np.zeros((nModes,n+first))
+			if previous is not None:
+				[q[:,0], dq[:,0], f[:,0]] = previous
+			else:
+				if q0 is not None:
+					q[:,0] = q0
+				if dq0 is not None:
+					dq[:,0] = dq0
+
+			for j in range(1,n+first):
+				q[:,j] = A11*q[:,j-1] + A12*dq[:,j-1] + B11*f[:,j-1] + B12*f[:,j]
+				dq[:,j] = A21*q[:,j-1] + A22*dq[:,j-1] + B21*f[:,j-1] + B22*f[:,j]
+			q = q[:,first:]
+			dq = dq[:,first:]
+			ddq = f[:,first:] - (c/m)[:,None]*dq - (k/m)[:,None]*q
+
+			previous = [q[:,-1], dq[:,-1], f[:,-1]]
+			yield [q, dq, ddq]
+
+
+
+
+
+
+class FrequencyDomainIntegrator(object):
+	'''
+Frequency domain solution of uncoupled modal
+equations of motion, for all modes at once:
+
+	m q'' + c q' + k q = p(t)
+
+The modal forces are transformed once with the fast
+fourier transform, multiplied by the transfer function
+of every mode
+
+	H(w) = 1/(k - m w^2 + i c w)
+
+and transformed back. The transform is circular, so the
+signals are padded with zeros until the free vibration
+after the last time step has decayed to tolerance times
+its amplitude in the slowest decaying mode, before it
+wraps around to the start of the time signal. The length
+of the padded signals is a power of two between padding
+and maxPadding times the signal length. Initial
+conditions are added as the exact free vibration
+response of each mode. Rigid body modes (no stiffness)
+do not have a transfer function at zero frequency and
+their response does not decay, so they are integrated
+with NigamJenningsIntegrator instead.
+
+The spectrum of the modal accelerations is kept after
+the integration, so it can be used directly instead of
+transforming the accelerations a second time. It is the
+spectrum of the accelerations at the time steps only,
+padded with zeros to a power of two and without the
+mirrored half, the same as fwdFFT of the time signal.
+
+self.dt			- size of time step
+self.padding	- minimum length of padded signals
+				  as a multiple of the signal length
+self.maxPadding	- maximum length of padded signals
+				  as a multiple of the signal length
+self.tolerance	- allowed relative amplitude of the
+				  response that wraps around
+self.nfft		- length of padded signals
+self.nSpectrum	- length of the padded signal of the
+				  spectrum
+self.spectrum	- spectrum of the modal accelerations from
+				  the last integration (modes, nSpectrum/2)
+'''
+	def __init__(self,dt,padding=2,maxPadding=32,tolerance=1.0e-6):
+		self.dt = dt
+		self.padding = padding
+		self.maxPadding = maxPadding
+		self.tolerance = tolerance
+		self.nfft = None
+		self.nSpectrum = None
+		self.spectrum = None
+
+
+	def signalLength(self,n,decay):
+		'''
+	Length of padded signals for n time steps, when
+	the slowest decaying mode decays as exp(-decay*t).
+	'''
+		length = self.padding*n
+		if decay > 0.:
+			length = max(length, n+int(np.ceil(np.log(1./self.tolerance)/(decay*self.dt))))
+		else:
+			length = self.maxPadding*n
+		if length > self.maxPadding*n:
+			print('\n\tWARNING:\n\tModal response does not decay within', self.maxPadding, 'times the length')
+			print('\tof the time signal, some of it will wrap around to the start.')
+			length = self.maxPadding*n
+		nfft = 1
+		while nfft < length:
+			nfft *= 2
+		return nfft
+
+
+	def frequencies(self):
+		'''
+	Circular frequencies of the spectra.
+	'''
+		return 2.*np.pi*scipy.fft.rfftfreq(self.nfft,self.dt)
+
+
+	def transform(self,x,axis=-1):
+		'''
+	Fourier transform of real signals along
+	axis, padded with zeros to self.nfft.
+	'''
+		return scipy.fft.rfft(x,n=self.nfft,axis=axis)
+
+
+	def spectrumOf(self,x,axis=-1):
+		'''
+	Spectrum of real signals along axis, padded with
+	zeros to the next power of two of their length and
+	without the mirrored half, as in fwdFFT.
+	'''
+		self.nSpectrum = 1
+		while self.nSpectrum < x.shape[axis]:
+			self.nSpectrum *= 2
+		X = scipy.fft.rfft(x,n=self.nSpectrum,axis=axis)
+		return np.take(X,np.arange(self.nSpectrum//2),axis=axis)
+
+
+	def integrate(self,m,c,k,p,q0=None,dq0=None):
+		'''
+	Integrate the modal equations over all time steps
+	of p. Column j of p is the modal force at time step j.
+
+	q, dq, ddq		- modal displacements, velocities and
+					  accelerations (modes, time steps)
+	'''
+		m = np.asarray(m,dtype=float)
+		c = np.asarray(c,dtype=float)
+		k = np.asarray(k,dtype=float)
+		nModes, n = p.shape
+		rigid = k <= 0.
+
+		q = np.zeros((nModes,n))
+		dq = np.zeros((nModes,n))
+		ddq = np.zeros((nModes,n))
+		if not np.all(rigid):
+			flexible = ~rigid
+			self.nfft = self.signalLength(n,np.min(c[flexible]/(2.*m[flexible])))
+			w = self.frequencies()
+			Q = self.transform(p[flexible])/(k[flexible,None] - m[flexible,None]*w**2 + 1j*c[flexible,None]*w)
+			q[flexible] = scipy.fft.irfft(Q,n=self.nfft,axis=1)[:,:n]
+			dq[flexible] = scipy.fft.irfft(1j*w*Q,n=self.nfft,axis=1)[:,:n]
+			Q *= -w**2
+			ddq[flexible] = scipy.fft.irfft(Q,n=self.nfft,axis=1)[:,:n]
+		if np.any(rigid):
+			[q[rigid], dq[rigid], ddq[rigid]] = NigamJenningsIntegrator(self.dt).integrate(m[rigid],c[rigid],k[rigid],p[rigid])
+
+		# free vibration from the initial conditions
+		if np.any(q0) or np.any(dq0):
+			free = NigamJenningsIntegrator(self.dt).integrate(m,c,k,np.zeros((nModes,n)),q0,dq0)
+			q += free[0]
+			dq += free[1]
+			ddq += free[2]
+
+		self.spectrum = self.spectrumOf(ddq,axis=1)
+		return [q, dq, ddq]
+
+
+	def blocks(self,m,c,k,forces,q0=None,dq0=None):
+		'''
+	Same interface as the time stepping integrators.
+	The transform needs the forces of all time steps,
+	so all blocks are integrated together and the
+	response is then yielded in blocks of the same
+	size as the forces.
+	'''
+		forces = list(forces)
+		[q, dq, ddq] = self.integrate(m,c,k,np.concatenate(forces,axis=1),q0,dq0)
+		start = 0
+		for p in forces:
+			stop = start+p.shape[1]
+			yield [q[:,start:stop], dq[:,start:stop], ddq[:,start:stop]]
+			start = stop
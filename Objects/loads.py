@@ -4,13 +4,28 @@
 #  ----------
 #
 #	This file holds the load objects. They take information from
-#	the FEModel object about loads, and calculate the load vectors
-#	to be used in the analysis.
+#	the FEModel object about loads, and calculate the forces they
+#	apply on the DOFs of the model, which are summed to the load
+#	vectors used in the analysis by loadVector.
 #
 
 
 from math import sqrt
 import numpy as np
+from meshes import *
+
+
+
+
+
+def loadVector(loads,size):
+	'''
+Sum the forces of loads to a load vector of size
+DOFs, as a (size, 1) array.
+'''
+	dofs = np.concatenate([np.zeros(0,dtype=np.int64)]+[load.dofs for load in loads])
+	values = np.concatenate([np.zeros(0)]+[load.values for load in loads])
+	return np.bincount(dofs,weights=values,minlength=size).reshape(size,1)
 
 
 
@@ -18,11 +33,39 @@ import numpy as np
 
 class Load(object):
 	'''
-Base class for loads.
+Base class for loads. The forces of a load are kept
+as the DOFs it is applied to and the force on each of
+them, instead of a full load vector of the model.
+
+self.dofs	- DOF numbers of the forces
+self.values	- force on each of the DOFs
 '''
 	def __init__(self,name,nodeset):
 		self.name = name
 		self.nodes = nodeset
+		self.dofs = np.zeros(0,dtype=np.int64)
+		self.values = np.zeros(0)
+
+
+	def setForces(self,dofs,values):
+		'''
+	Set the forces of the load from arrays of DOFs
+	and values of the same size. A DOF given more
+	than once keeps its last value.
+	'''
+		dofs = np.asarray(dofs,dtype=np.int64).ravel()
+		values = np.asarray(values,dtype=float).ravel()
+		[self.dofs, last] = np.unique(dofs[::-1],return_index=True)
+		self.values = values[::-1][last]
+
+
+	def nodeDOFs(self,NFMT,nodes,first=0,components=3):
+		'''
+	DOFs first to first+components of each of the
+	nodes, as a (nodes, components) array.
+	'''
+		start = np.array([NFMT[node] for node in nodes],dtype=np.int64).reshape(-1,1)
+		return start + np.arange(first,first+components)
 
 
 
@@ -39,16 +82,15 @@ distributed on a set of nodes.
 		super(Force,self).__init__(name,nodeset)
 
 
-	def calcDegreeOfFreedomForces(self,nDOFs,NFMT):
+	def calcDegreeOfFreedomForces(self,NFMT):
 		'''
 	Calculate the force contribution on each individual
 	degree of freedom based on affected nodes, force and
 	force vector.
-	self.F = force vector
-	nDOFs  = number of degrees of freedom (in FE-model)
-	NFMT   = node freedom map table
+	self.dofs   = DOFs of the forces
+	self.values = forces
+	NFMT        = node freedom map table
 	'''
-		self.F = np.zeros((nDOFs,1))
 
 		number_of_nodes = len(self.nodes)
 		vectMag = sqrt(self.vector[0][0]**2 + self.vector[1][0]**2 + self.vector[2][0]**2)
@@ -56,11 +98,10 @@ distributed on a set of nodes.
 		f2_cos = self.vector[1][0]/vectMag
 		f3_cos = self.vector[2][0]/vectMag
 
-		for i in range(number_of_nodes):
-			self.F[NFMT[self.nodes[i]]] = (self.force*f1_cos)/number_of_nodes
-			self.F[NFMT[self.nodes[i]]+1] = (self.force*f2_cos)/number_of_nodes
-			if self.vector[2][0] != 0.0:
-				self.F[NFMT[self.nodes[i]]+2] = (self.force*f3_cos)/number_of_nodes
+		components = 3 if self.vector[2][0] != 0.0 else 2
+		value = (self.force*np.array([f1_cos, f2_cos, f3_cos])[:components])/number_of_nodes
+		dofs = self.nodeDOFs(NFMT,self.nodes,0,components)
+		self.setForces(dofs,np.tile(value,(len(dofs),1)))
 
 
 
@@ -77,15 +118,14 @@ individually to each node in nodeset.
 		super(ForceConcentrated,self).__init__(name,nodeset)
 
 
-	def calcDegreeOfFreedomForces(self,nDOFs,NFMT):
+	def calcDegreeOfFreedomForces(self,NFMT):
 		'''
 	Apply the force contribution on each individual
 	degree of freedom separately.
-	self.F = force vector
-	nDOFs  = number of degrees of freedom (in FE-model)
-	NFMT   = node freedom map table
+	self.dofs   = DOFs of the forces
+	self.values = forces
+	NFMT        = node freedom map table
 	'''
-		self.F = np.zeros((nDOFs,1))
 
 		number_of_nodes = len(self.nodes)
 		vectMag = sqrt(self.vector[0][0]**2 + self.vector[1][0]**2 + self.vector[2][0]**2)
@@ -93,11 +133,10 @@ individually to each node in nodeset.
 		f2_cos = self.vector[1][0]/vectMag
 		f3_cos = self.vector[2][0]/vectMag
 
-		for i in range(number_of_nodes):
-			self.F[NFMT[self.nodes[i]]] = self.force*f1_cos
-			self.F[NFMT[self.nodes[i]]+1] = self.force*f2_cos
-			if self.vector[2][0] != 0.0:
-				self.F[NFMT[self.nodes[i]]+2] = self.force*f3_cos
+		components = 3 if self.vector[2][0] != 0.0 else 2
+		value = self.force*np.array([f1_cos, f2_cos, f3_cos])[:components]
+		dofs = self.nodeDOFs(NFMT,self.nodes,0,components)
+		self.setForces(dofs,np.tile(value,(len(dofs),1)))
 
 
 
@@ -114,16 +153,15 @@ uniformly distributed on a set of nodes.
 		super(ForceDynamic,self).__init__(name,nodeset)
 
 
-	def calcDegreeOfFreedomForces(self,nDOFs,NFMT):
+	def calcDegreeOfFreedomForces(self,NFMT):
 		'''
 	Calculate the force contribution on each individual
 	degree of freedom based on affected nodes, force and
 	force vector.
-	self.F = force vector
-	nDOFs  = number of degrees of freedom (in FE-model)
-	NFMT   = node freedom map table
+	self.dofs   = DOFs of the forces
+	self.values = forces
+	NFMT        = node freedom map table
 	'''
-		self.F = np.zeros((nDOFs,1))
 
 		number_of_nodes = len(self.nodes)
 		vectMag = sqrt(self.vector[0][0]**2 + self.vector[1][0]**2 + self.vector[2][0]**2)
@@ -131,11 +169,10 @@ uniformly distributed on a set of nodes.
 		f2_cos = self.vector[1][0]/vectMag
 		f3_cos = self.vector[2][0]/vectMag
 
-		for i in range(number_of_nodes):
-			self.F[NFMT[self.nodes[i]]] = (self.force*f1_cos)/number_of_nodes
-			self.F[NFMT[self.nodes[i]]+1] = (self.force*f2_cos)/number_of_nodes
-			if self.vector[2][0] != 0.0:
-				self.F[NFMT[self.nodes[i]]+2] = (self.force*f3_cos)/number_of_nodes
+		components = 3 if self.vector[2][0] != 0.0 else 2
+		value = (self.force*np.array([f1_cos, f2_cos, f3_cos])[:components])/number_of_nodes
+		dofs = self.nodeDOFs(NFMT,self.nodes,0,components)
+		self.setForces(dofs,np.tile(value,(len(dofs),1)))
 
 
 
@@ -152,16 +189,15 @@ to all nodes in specified nodeset.
 		super(Acceleration,self).__init__(name,nodeset)
 
 
-	def calcDegreeOfFreedomForces(self,nDOFs,NFMT):
+	def calcDegreeOfFreedomForces(self,NFMT):
 		'''
 	Calculate the force contribution on each individual
 	degree of freedom based on affected nodes, force and
 	force vector.
-	self.F = acceleration vector
-	nDOFs  = number of degrees of freedom (in FE-model)
-	NFMT   = node freedom map table
+	self.dofs   = DOFs of the accelerations
+	self.values = accelerations
+	NFMT        = node freedom map table
 	'''
-		self.F = np.zeros((nDOFs,1))
 
 		number_of_nodes = len(self.nodes)
 		vectMag = sqrt(self.vector[0][0]**2 + self.vector[1][0]**2 + self.vector[2][0]**2)
@@ -169,11 +205,10 @@ to all nodes in specified nodeset.
 		f2_cos = self.vector[1][0]/vectMag
 		f3_cos = self.vector[2][0]/vectMag
 
-		for i in range(number_of_nodes):
-			self.F[NFMT[self.nodes[i]]] = (self.accel_factor*f1_cos)
-			self.F[NFMT[self.nodes[i]]+1] = (self.accel_factor*f2_cos)
-			if self.vector[2][0] != 0.0:
-				self.F[NFMT[self.nodes[i]]+2] = (self.accel_factor*f3_cos)
+		components = 3 if self.vector[2][0] != 0.0 else 2
+		value = self.accel_factor*np.array([f1_cos, f2_cos, f3_cos])[:components]
+		dofs = self.nodeDOFs(NFMT,self.nodes,0,components)
+		self.setForces(dofs,np.tile(value,(len(dofs),1)))
 
 
 
@@ -191,16 +226,15 @@ specified nodeset.
 		super(Torque,self).__init__(name,nodeset)
 
 
-	def calcDegreeOfFreedomForces(self,nDOFs,NFMT,nodes):
+	def calcDegreeOfFreedomForces(self,NFMT,nodes):
 		'''
 	Apply the force contribution on each individual
 	degree of freedom separately.
-	self.F 			= force vector
-	nDOFs  			= number of degrees of freedom (in FE-model)
+	self.dofs		= DOFs of the moments
+	self.values		= moments
 	NFMT			= node freedom map table
 	nodes[node].NFS = node freedom signature
 	'''
-		self.F = np.zeros((nDOFs,1))
 
 		number_of_nodes = len(self.nodes)
 		momentMag = sqrt(self.moment[0][0]**2 + self.moment[1][0]**2 + self.moment[2][0]**2)
@@ -208,20 +242,25 @@ specified nodeset.
 		m2_cos = self.moment[1][0]/momentMag
 		m3_cos = self.moment[2][0]/momentMag
 
+		planar = []
+		spatial = []
 		for i in range(number_of_nodes):
 			if 1 not in nodes[self.nodes[i]].NFS[3:]:
 				print('\n\tWARNING!!! \n\tCannot apply moment to node '+str(self.nodes[i])+'.',
 					  'It only has translational DOFs.')
 			elif nodes[self.nodes[i]].NFS == [1,1,0,0,0,1]:
-				self.F[NFMT[self.nodes[i]]+2] = self.torque*m3_cos
+				planar.append(self.nodes[i])
 			elif nodes[self.nodes[i]].NFS == [1,1,1,1,1,1]:
-				self.F[NFMT[self.nodes[i]]+3] = self.torque*m1_cos
-				self.F[NFMT[self.nodes[i]]+4] = self.torque*m2_cos
-				self.F[NFMT[self.nodes[i]]+5] = self.torque*m3_cos
+				spatial.append(self.nodes[i])
 			else:
 				print('\n\tWARNING!!! \n\tUnknown DOFs for node '+str(self.nodes[i])+'.',
 					  'No torque applied.')
 
+		dofs = np.append(self.nodeDOFs(NFMT,planar,2,1),self.nodeDOFs(NFMT,spatial,3,3))
+		values = np.append(np.full(len(planar),self.torque*m3_cos),
+						   np.tile(self.torque*np.array([m1_cos, m2_cos, m3_cos]),len(spatial)))
+		self.setForces(dofs,values)
+
 
 
 
@@ -252,15 +291,25 @@ to a set of beam elements.
 		super(ForceDistributed,self).__init__(name,elementset)
 
 
-	def calcDegreeOfFreedomForces(self,nDOFs,NFMT,elements,fixedDOFs,MPCs):
+	def calcDegreeOfFreedomForces(self,NFMT,mesh,fixedDOFs,MPCs):
 		'''
 	Apply the force contribution on each individual
 	degree of freedom separately.
-	self.F = force vector
-	nDOFs  = number of degrees of freedom (in FE-model)
-	NFMT   = node freedom map table
+	self.dofs   = DOFs of the forces
+	self.values = forces
+	NFMT        = node freedom map table
+	mesh        = mesh of the elements, the shared end
+	              nodes are looked up in its topology index
 	'''
-		self.F = np.zeros((nDOFs,1))
+		elements = mesh.elements
+		constraints = ConstraintIndex(MPCs)
+
+		# an end node is shared if it is the end of another
+		# beam or rod element (all of them have two nodes)
+		lineElements = [element for element in elements if elements[element].type in \
+							['ROD2N2D', 'BEAM2N2D', 'ROD2N', 'BEAM2N']]
+		endNodes = sorted(set([elements[element].nodes[i].number for element in self.elementset for i in range(2)]))
+		shared = dict(zip(endNodes,mesh.topology().valence(endNodes,lineElements) > 1))
 
 		vectMag = sqrt(self.vector[0][0]**2 + self.vector[1][0]**2 + self.vector[2][0]**2)
 		distForce = [self.force*self.vector[0][0]/vectMag,
@@ -275,41 +324,16 @@ to a set of beam elements.
 				is2D = True
 			else:
 				elmDOFs = 12
-			# check if node DOFs are free or not
+			# DOFs of the end nodes are free if the node is connected
+			# to other elements, or restrained by boundary conditions
+			# or constraints
+			ends = [elements[element].nodes[0].number, elements[element].nodes[1].number]
+			dofs = [NFMT[node]+i for node in ends for i in range(int(elmDOFs/2))]
+			constrained = constraints.isConstrained(dofs)
 			freeDOFs = [0]*elmDOFs
-			# first check if both nodes are connected to other elements
-			for element2 in elements:
-				if element2 != element:
-					if elements[element2].nodes[0].number == elements[element].nodes[0].number or \
-								elements[element2].nodes[1].number == elements[element].nodes[0].number:
-						if elmDOFs == 6:
-							freeDOFs[0] = freeDOFs[1] = freeDOFs[2] = 1
-						if elmDOFs == 12:
-							freeDOFs[0] = freeDOFs[1] = freeDOFs[2] = freeDOFs[3] = freeDOFs[4] = freeDOFs[5] = 1
-					if elements[element2].nodes[0].number == elements[element].nodes[1].number or \
-								elements[element2].nodes[1].number == elements[element].nodes[1].number:
-						if elmDOFs == 6:
-							freeDOFs[3] = freeDOFs[4] = freeDOFs[5] = 1
-						if elmDOFs == 12:
-							freeDOFs[6] = freeDOFs[7] = freeDOFs[8] = freeDOFs[9] = freeDOFs[10] = freeDOFs[11] = 1
-			# if not, check if nodes are restrained by boundary conditions or constraints (and in which DOFs)
-			if 0 in freeDOFs:
-				n1_dofs = [NFMT[elements[element].nodes[0].number]+i for i in range(int(elmDOFs/2))]
-				for i, dof in enumerate(n1_dofs):
-					if dof in fixedDOFs:
-						freeDOFs[i] = 1
-					else:
-						for mpc in MPCs:
-							if dof in MPCs[mpc]:
-								freeDOFs[i] = 1
-				n2_dofs = [NFMT[elements[element].nodes[1].number]+i for i in range(int(elmDOFs/2))]
-				for i, dof in enumerate(n2_dofs):
-					if dof in fixedDOFs:
-						freeDOFs[i+int(elmDOFs/2)] = 1
-					else:
-						for mpc in MPCs:
-							if dof in MPCs[mpc]:
-								freeDOFs[i+int(elmDOFs/2)] = 1
+			for i, dof in enumerate(dofs):
+				if shared[ends[i//int(elmDOFs/2)]] or dof in fixedDOFs or constrained[i]:
+					freeDOFs[i] = 1
 
 			elements[element].calcEquivalentNodalForces(distForce,freeDOFs)
 			if is2D:
@@ -331,18 +355,10 @@ to a set of beam elements.
 				else:
 					self.nodes[elements[element].nodes[1].number] += elements[element].eqNodeForces[6:]
 
-		for node in self.nodes:
-			if is2D:
-				self.F[NFMT[node]] += self.nodes[node][0]
-				self.F[NFMT[node]+1] += self.nodes[node][1]
-				self.F[NFMT[node]+2] += self.nodes[node][2]
-			else:
-				self.F[NFMT[node]] += self.nodes[node][0]
-				self.F[NFMT[node]+1] += self.nodes[node][1]
-				self.F[NFMT[node]+2] += self.nodes[node][2]
-				self.F[NFMT[node]+3] += self.nodes[node][3]
-				self.F[NFMT[node]+4] += self.nodes[node][4]
-				self.F[NFMT[node]+5] += self.nodes[node][5]
+		components = 3 if is2D else 6
+		nodes = list(self.nodes)
+		self.setForces(self.nodeDOFs(NFMT,nodes,0,components),
+					   [np.ravel(self.nodes[node])[:components] for node in nodes])
 
 
 
@@ -360,38 +376,26 @@ a set of elements.
 		super(Gravity,self).__init__(name,elementset)
 
 
-	def calcDegreeOfFreedomForces(self,nDOFs,NFMT,elements):
+	def calcDegreeOfFreedomForces(self,NFMT,mesh):
 		'''
 	Apply the force contribution on each individual
 	degree of freedom separately.
-	self.F = force vector
-	nDOFs = number of degrees of freedom (in FE-model)
-	NFMT = node freedom map table
+	self.dofs   = DOFs of the forces
+	self.values = forces
+	NFMT        = node freedom map table
+	mesh        = mesh of the elements, with the lumped
+	              element masses in mesh.mass
 	'''
-		self.F = np.zeros((nDOFs,1))
-
-		self.nodes = {}
-		for element in self.elementset:
-			if hasattr(elements[element],'M'):
-				pass
-			else:
-				elements[element].calcMassMatrix()
-			for node in elements[element].nodes:
-				if node.number in self.nodes:
-					self.nodes[node.number] += elements[element].M[0][0]
-				else:
-					self.nodes[node.number] = elements[element].M[0][0]
+		[nodes, mass] = mesh.mass.nodalMasses(self.elementset)
 
 		vectMag = sqrt(self.vector[0][0]**2 + self.vector[1][0]**2 + self.vector[2][0]**2)
 		f1_cos = self.vector[0][0]/vectMag
 		f2_cos = self.vector[1][0]/vectMag
 		f3_cos = self.vector[2][0]/vectMag
 
-		for node in self.nodes:
-			self.F[NFMT[node]] = self.acceleration*self.nodes[node]*f1_cos
-			self.F[NFMT[node]+1] = self.acceleration*self.nodes[node]*f2_cos
-			if self.vector[2][0] != 0.0:
-				self.F[NFMT[node]+2] = self.acceleration*self.nodes[node]*f3_cos
+		components = 3 if self.vector[2][0] != 0.0 else 2
+		self.setForces(self.nodeDOFs(NFMT,nodes,0,components),
+					   self.acceleration*mass.reshape(-1,1)*np.array([f1_cos, f2_cos, f3_cos])[:components])
 
 		
 
@@ -0,0 +1,176 @@
+#
+#
+#	mass.py
+#  ---------
+#
+#	This is the mass module. It calculates the lumped masses of
+#	the elements of a mesh, kept as arrays of nodal masses per
+#	element group instead of a mass matrix on every element, and
+#	merges them into the diagonal of the global mass matrix with
+#	one bincount. The volumes of the solid elements are calculated
+#	for all elements of a type at once.
+#
+
+
+import numpy as np
+
+
+
+
+
+
+class LumpedMass(object):
+	'''
+Lumped mass of the elements of a mesh. The elements
+are grouped as in the Assembler of the mesh. Solid
+elements (TET4N, TET10N, HEX8N and HEX20N) have the
+same mass at all their DOFs, so only the nodal mass
+of every element is kept. The other elements use
+their own calcMassMatrix, and the masses of all their
+DOFs are kept.
+
+self.groups		- element numbers and EFT arrays per group
+				  (from the Assembler), with 'mass', the
+				  nodal mass (the mass of the first DOF)
+				  of every element, and for groups that
+				  are not solids 'DOFMass', the mass of
+				  every element DOF (elements, elmDOFs)
+self.numbers	- element numbers, sorted
+self.nodeMass	- nodal mass of the elements in
+				  self.numbers
+solids			- tetrahedra (first node and the nodes
+				  of the three edges from it) that make
+				  up the volume of a solid element type,
+				  and the share of the element mass of
+				  each node
+'''
+	solids = {'TET4N':	([0], [1], [2], [3], 0.25),
+			  'TET10N':	([0], [1], [2], [3], 0.1),
+			  'HEX8N':	([0, 0, 0, 0, 2], [1, 5, 5, 2, 6], [2, 2, 7, 3, 7], [5, 7, 4, 7, 5], 0.125),
+			  'HEX20N':	([0, 0, 0, 0, 2], [1, 5, 5, 2, 6], [2, 2, 7, 3, 7], [5, 7, 4, 7, 5], 0.05)}
+
+	def __init__(self,mesh):
+		self.mesh = mesh
+		self.groups = {}
+		for key in mesh.assembler.groups:
+			numbers = mesh.assembler.groups[key]['elements']
+			self.groups[key] = {'elements': numbers, 'EFT': mesh.assembler.groups[key]['EFT']}
+			if key[0] in self.solids:
+				self.groups[key]['mass'] = self.solidMasses(numbers,key[0])
+			else:
+				self.groups[key]['DOFMass'] = self.elementMasses(numbers,key[1])
+				self.groups[key]['mass'] = self.groups[key]['DOFMass'][:,0].copy()
+
+		numbers = np.concatenate([np.zeros(0,dtype=np.int64)]+[np.array(self.groups[key]['elements'],dtype=np.int64) for key in self.groups])
+		mass = np.concatenate([np.zeros(0)]+[self.groups[key]['mass'] for key in self.groups])
+		order = np.argsort(numbers)
+		self.numbers = numbers[order]
+		self.nodeMass = mass[order]
+
+
+	def solidMasses(self,numbers,type):
+		'''
+	Nodal masses of solid elements of one type. The
+	volume of every element is the sum of the volumes
+	of its tetrahedra in self.solids, calculated for
+	all elements at once.
+	'''
+		elements = self.mesh.elements
+		[a0, ab, ac, ad, share] = self.solids[type]
+		nodeNum = max(ab+ac+ad)+1
+		X = np.array([[[node.coord[0][0], node.coord[1][0], node.coord[2][0]] \
+						for node in elements[i].nodes[:nodeNum]] for i in numbers]).reshape(-1,nodeNum,3)
+		density = np.array([elements[i].section.material.density for i in numbers],dtype=float)
+		volume = 0.
+		for i in range(len(a0)):
+			edges = np.stack([X[:,ab[i]]-X[:,a0[i]], X[:,ac[i]]-X[:,a0[i]], X[:,ad[i]]-X[:,a0[i]]],axis=1)
+			volume += np.linalg.det(edges)/6.0
+		return density*volume*share
+
+
+	def elementMasses(self,numbers,elmDOFs):
+		'''
+	Masses of every DOF of elements that are not solids,
+	from the element mass (calcMassMatrix), which is
+	released once it is stored.
+	'''
+		elements = self.mesh.elements
+		mass = np.empty((len(numbers),elmDOFs))
+		for e, i in enumerate(numbers):
+			elements[i].calcMassMatrix()
+			mass[e] = elements[i].M
+			del elements[i].M
+		return mass
+
+
+	def DOFMasses(self,key):
+		'''
+	Mass of every DOF of the elements of a group.
+	'''
+		if 'DOFMass' in self.groups[key]:
+			return self.groups[key]['DOFMass']
+		return np.repeat(self.groups[key]['mass'],key[1]).reshape(-1,key[1])
+
+
+	def assemble(self):
+		'''
+	Merge the element masses into the diagonal of the
+	global mass matrix, and sum the total mass in each
+	of the six DOF directions. The masses are summed in
+	the order of the elements of the mesh.
+
+	Returns [M, totalMass].
+	'''
+		elements = self.mesh.elements
+		totalMass = [0., 0., 0., 0., 0., 0.]
+		dofs = []
+		values = []
+		rank = []
+		if len(self.groups) > 1:
+			position = dict(zip(elements,range(len(elements))))
+			width = max(key[1] for key in self.groups)
+		for key in self.groups:
+			mass = self.DOFMasses(key)
+			dofs.append(self.groups[key]['EFT'].ravel())
+			values.append(mass.ravel())
+			if len(self.groups) > 1:
+				rows = np.array([position[i] for i in self.groups[key]['elements']],dtype=np.int64)
+				rank.append((rows[:,None]*width + np.arange(key[1])).ravel())
+
+			# DOFs of a node follow the element freedom signature
+			m = sum(elements[self.groups[key]['elements'][0]].EFS[0][:6])
+			direction = np.arange(key[1]) % m
+			for k in range(m):
+				totalMass[k] += mass[:,direction == k].sum()
+
+		dofs = np.concatenate([np.zeros(0,dtype=np.int64)]+dofs)
+		values = np.concatenate([np.zeros(0)]+values)
+		if len(rank) != 0:
+			order = np.argsort(np.concatenate(rank),kind='stable')
+			[dofs, values] = [dofs[order], values[order]]
+		return [np.bincount(dofs,weights=values,minlength=self.mesh.nDOFs), totalMass]
+
+
+	def elementNodeMasses(self,numbers):
+		'''
+	Nodal mass of each of the elements with numbers.
+	'''
+		return self.nodeMass[np.searchsorted(self.numbers,np.asarray(numbers,dtype=np.int64))]
+
+
+	def nodalMasses(self,numbers=None):
+		'''
+	Mass at every node of the elements with numbers
+	(all elements of the mesh if None), summed over
+	the elements in their order.
+
+	Returns [node numbers, masses].
+	'''
+		elements = self.mesh.elements
+		if numbers is None:
+			numbers = list(elements)
+		count = [len(elements[i].nodes) for i in numbers]
+		nodes = np.array([node.number for i in numbers for node in elements[i].nodes],dtype=np.int64)
+		[unique, index] = np.unique(nodes,return_inverse=True)
+		weights = np.repeat(self.elementNodeMasses(numbers),count)
+		return [unique, np.bincount(index,weights=weights,minlength=len(unique))]
@@ -2,11 +2,14 @@
 #
 #	mesh.py
 #  ---------
-#	Mesh object holding all nodes and elements 
+#	Mesh object holding all nodes and elements
 #	used in finite element model, containing assembly
 #	and type information. Also used to store results.
-#	
+#
+
 
+import numpy as np
+import scipy.sparse as sp
 
 
 
@@ -18,13 +21,236 @@ Class for mesh. Holds information on node coordinates
 element nodes, element type, and analysis results.
 It is stored to binary file for easy access of results
 to viewFEM.py.
+
+self.topologyIndex	- MeshTopology of the mesh, or None
+					  until it is first used
 '''
 	def __init__(self,nodes,elements):
 		self.nodes = nodes
 		self.elements = elements
 		self.solutions = []
+		self.topologyIndex = None
+
+
+	def topology(self):
+		'''
+	Topology index of the mesh. It is built the first
+	time it is used, and kept until the mesh is edited.
+	Functions that edit the nodes or elements of the
+	mesh either update the index (removeElements,
+	removeNodes, remapNodes) or set self.topologyIndex
+	to None, so that it is built again. An index whose
+	node or element numbers are not those of the mesh
+	is also built again.
+	'''
+		index = getattr(self,'topologyIndex',None)
+		if index is None or not index.isCurrent(self):
+			self.topologyIndex = MeshTopology(self)
+		return self.topologyIndex
+
+
+
+
+
+
+
+class MeshTopology(object):
+	'''
+Node and element adjacency of a mesh, as sparse
+incidence matrices, for looking up the elements of
+a node and the neighbors of an element instead of
+searching all elements.
+
+Edits of the mesh can update the index with
+removeElements, removeNodes and remapNodes.
+
+self.elements		- element numbers, in row order
+self.nodes			- node numbers (sorted), in column order
+self.rows			- row of every element number
+self.incidence		- (elements, nodes) csr matrix, the number
+					  of times a node is in an element
+self.nodeElements	- (nodes, elements) csr matrix, the
+					  transpose of self.incidence
+'''
+	def __init__(self,mesh):
+		self.elements = list(mesh.elements)
+		count = np.array([len(mesh.elements[element].nodes) for element in self.elements],dtype=np.int64)
+		numbers = np.array([node.number for element in self.elements for node in mesh.elements[element].nodes],dtype=np.int64)
+		self.nodes = np.union1d(np.array(list(mesh.nodes),dtype=np.int64),numbers)
+		rows = np.repeat(np.arange(len(self.elements)),count)
+		self.incidence = sp.csr_matrix((np.ones(len(numbers),dtype=np.int64),(rows,np.searchsorted(self.nodes,numbers))),
+										shape=(len(self.elements),len(self.nodes)))
+		self.update()
+
+
+	def update(self):
+		'''
+	Row lookup and transpose of the incidence matrix,
+	after self.elements or self.incidence are changed.
+	'''
+		self.rows = dict(zip(self.elements,range(len(self.elements))))
+		self.incidence.sum_duplicates()
+		self.nodeElements = self.incidence.T.tocsr()
+
+
+	def isCurrent(self,mesh):
+		'''
+	True if the index has the same node and element
+	numbers as the mesh.
+	'''
+		if len(self.elements) != len(mesh.elements) or len(self.nodes) != len(mesh.nodes):
+			return False
+		if self.elements != list(mesh.elements):
+			return False
+		return np.array_equal(self.nodes,np.sort(np.array(list(mesh.nodes),dtype=np.int64)))
+
+
+	def columns(self,nodes):
+		'''
+	Columns of node numbers, -1 for nodes that
+	are not in the index.
+	'''
+		nodes = np.atleast_1d(np.asarray(nodes,dtype=np.int64))
+		if len(self.nodes) == 0:
+			return np.full(len(nodes),-1,dtype=np.int64)
+		column = np.minimum(np.searchsorted(self.nodes,nodes),len(self.nodes)-1)
+		return np.where(self.nodes[column] == nodes,column,-1)
+
+
+	def elementsOf(self,node):
+		'''
+	Numbers of the elements with node.
+	'''
+		column = self.columns(node)[0]
+		if column < 0:
+			return []
+		rows = self.nodeElements.indices[self.nodeElements.indptr[column]:self.nodeElements.indptr[column+1]]
+		return [self.elements[row] for row in rows]
+
+
+	def valence(self,nodes,elements=None):
+		'''
+	Number of elements each of the nodes is in,
+	counting only elements if they are given.
+	'''
+		column = self.columns(nodes)
+		if elements is None:
+			count = np.diff(self.nodeElements.indptr)
+		else:
+			rows = np.array([self.rows[element] for element in elements],dtype=np.int64)
+			count = np.asarray(self.incidence[rows].sum(axis=0)).ravel()
+		if len(count) == 0:
+			return np.zeros(len(column),dtype=np.int64)
+		return np.where(column >= 0,count[column],0)
+
+
+	def neighbors(self,element):
+		'''
+	Numbers of the elements that share one or more
+	nodes with element.
+	'''
+		row = self.rows[element]
+		columns = self.incidence.indices[self.incidence.indptr[row]:self.incidence.indptr[row+1]]
+		rows = np.unique(self.nodeElements[columns].indices)
+		return [self.elements[i] for i in rows if i != row]
+
+
+	def orphanedNodes(self,elements):
+		'''
+	Nodes of the elements that are in no other
+	elements, i.e. left without elements if the
+	elements are removed.
+	'''
+		rows = np.array([self.rows[element] for element in elements],dtype=np.int64)
+		removed = self.incidence[rows].sum(axis=0).A1
+		total = self.incidence.sum(axis=0).A1
+		return self.nodes[(removed > 0) & (removed == total)].tolist()
+
+
+	def removeElements(self,elements):
+		'''
+	Remove elements from the index.
+	'''
+		keep = np.ones(len(self.elements),dtype=bool)
+		keep[[self.rows[element] for element in elements if element in self.rows]] = False
+		self.elements = [element for [element, kept] in zip(self.elements,keep) if kept]
+		self.incidence = self.incidence[np.flatnonzero(keep)]
+		self.update()
+
+
+	def removeNodes(self,nodes):
+		'''
+	Remove nodes from the index. Their elements
+	are no longer connected through them.
+	'''
+		keep = np.ones(len(self.nodes),dtype=bool)
+		column = self.columns(nodes)
+		keep[column[column >= 0]] = False
+		self.nodes = self.nodes[keep]
+		self.incidence = self.incidence[:,np.flatnonzero(keep)].tocsr()
+		self.update()
+
+
+	def remapNodes(self,fused):
+		'''
+	Replace the nodes in fused by the node they are
+	fused to ({node: target}) in all elements, and
+	remove them from the index.
+	'''
+		if len(fused) == 0:
+			return
+		source = self.columns(list(fused))
+		target = self.columns([fused[node] for node in fused])
+		column = np.arange(len(self.nodes))
+		column[source] = target
+		remap = sp.csr_matrix((np.ones(len(column),dtype=np.int64),(np.arange(len(column)),column)),
+								shape=(len(self.nodes),len(self.nodes)))
+		self.incidence = (self.incidence @ remap).tocsr()
+		self.removeNodes(list(fused))
+
+
 
 
 
 
 
+
+
+class ConstraintIndex(object):
+	'''
+DOF to MPC lookup of the constraint pairs of a
+solution ({key: DOFs}), so that the MPCs of a DOF
+are found without searching all MPCs. It belongs to
+the solution, not to the mesh, since every solution
+has its own constraints.
+
+self.constrained	- sorted DOFs that are in an MPC
+self.mpcPointer		- start of the MPCs of every constrained
+					  DOF in self.mpcs
+self.mpcs			- MPC keys of the constrained DOFs
+'''
+	def __init__(self,MPCs):
+		keys = list(MPCs)
+		dofs = np.array([dof for mpc in keys for dof in MPCs[mpc]],dtype=np.int64)
+		mpcs = np.repeat(np.arange(len(keys)),[len(MPCs[mpc]) for mpc in keys])
+		order = np.argsort(dofs,kind='stable')
+		[self.constrained, start] = np.unique(dofs[order],return_index=True)
+		self.mpcPointer = np.append(start,len(dofs))
+		self.mpcs = [keys[i] for i in mpcs[order]]
+
+
+	def isConstrained(self,dofs):
+		'''
+	True for each of the DOFs that is in an MPC.
+	'''
+		return np.isin(np.asarray(dofs,dtype=np.int64),self.constrained)
+
+
+	def mpcsOf(self,dof):
+		'''
+	Keys of the MPCs with dof.
+	'''
+		i = np.searchsorted(self.constrained,dof)
+		if i == len(self.constrained) or self.constrained[i] != dof:
+			return []
+		return self.mpcs[self.mpcPointer[i]:self.mpcPointer[i+1]]
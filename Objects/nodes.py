@@ -17,7 +17,9 @@ class Node(object):
 	'''
 Base class for all nodes. Stores coordinates,
 information on active degrees of freedom and
-results (displacement, acceleration...).
+results (displacement, acceleration...). Static
+results are read from the result store of the
+mesh through node.solutions[solution].
 '''
 	def __init__(self,n,x,y,z=0):
 		self.number = n
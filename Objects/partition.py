@@ -0,0 +1,238 @@
+#
+#
+#	partition.py
+#  --------------
+#
+#	This is the partition module. It splits the degrees of freedom
+#	of a solution into free and fixed DOFs with numpy index arrays,
+#	and extracts the blocks of the global matrices for the two sets
+#	with one symmetric permutation of each matrix. DOFs tied to each
+#	other by multipoint constraints can be eliminated in the same
+#	step, with a sparse transformation to one master DOF per group.
+#
+
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.csgraph import connected_components
+
+
+
+
+
+
+class DOFPartition(object):
+	'''
+Partition of the DOFs of a solution (including the
+lagrange multiplier DOFs of MPCs) into free DOFs (1)
+and fixed DOFs (2). The free DOFs come first in
+increasing order, followed by the fixed DOFs in
+increasing order, which is the order of index11.
+
+A global matrix is permuted to this order once, by
+taking its columns in the order of index11 and
+mapping its row indices through self.position,
+and the blocks 11, 12 and 22 are then
+single slices of the permuted CSC matrix. A lumped
+(diagonal) matrix given as a vector is partitioned
+without forming the full matrix.
+
+self.nDOFs		- number of DOFs, including MPCs
+self.nFree		- number of free DOFs
+self.isFixed	- boolean mask, True for fixed DOFs
+self.free		- free DOFs
+self.fixed		- fixed DOFs
+self.index11	- free DOFs followed by fixed DOFs
+self.position	- position of every DOF in index11
+'''
+	def __init__(self,nDOFs,fixedDOFs):
+		self.nDOFs = nDOFs
+		self.fixed = np.array(sorted(fixedDOFs.keys()),dtype=np.int64)
+		self.isFixed = np.zeros(nDOFs,dtype=bool)
+		self.isFixed[self.fixed] = True
+		self.free = np.flatnonzero(~self.isFixed)
+		self.nFree = len(self.free)
+		self.index11 = np.concatenate((self.free,self.fixed))
+		self.position = np.empty(nDOFs,dtype=np.int64)
+		self.position[self.index11] = np.arange(nDOFs)
+
+
+	def fixedValues(self,fixedDOFs):
+		'''
+	Values of the fixed DOFs (u_2) in the
+	order of the partition.
+	'''
+		return np.array([fixedDOFs[DOF] for DOF in self.fixed],dtype=float)
+
+
+	def permute(self,A):
+		'''
+	Symmetric permutation of the sparse matrix A to
+	the order of index11, returned in CSC format.
+	'''
+		A = sp.csc_matrix(A)[:,self.index11]
+		A.indices = self.position[A.indices].astype(A.indices.dtype)
+		A.has_sorted_indices = False
+		return A
+
+
+	def blocks(self,A,names=['11','12','22']):
+		'''
+	Blocks of A for the free (1) and fixed (2) DOFs,
+	in the order given by names. A is a sparse matrix,
+	or a vector with the diagonal of a lumped matrix.
+	'''
+		M = self.nFree
+		N = self.nDOFs-M
+		blocks = {}
+		if isinstance(A,np.ndarray) and A.ndim == 1:
+			diagonal = A[self.index11]
+			blocks['11'] = sp.diags(diagonal[:M],0,format='csc')
+			blocks['12'] = sp.csc_matrix((M,N))
+			blocks['22'] = sp.diags(diagonal[M:],0,format='csc')
+		else:
+			A = self.permute(A)
+			blocks['11'] = A[:M,:M]
+			blocks['12'] = A[:M,M:]
+			blocks['22'] = A[M:,M:]
+		return [blocks[name] for name in names]
+
+
+	def reduce(self,F):
+		'''
+	Loads on the free DOFs from a load vector F
+	given for all DOFs.
+	'''
+		return F[self.free]
+
+
+	def restrict(self,x):
+		'''
+	Values of the free DOFs from a vector x (or
+	the rows of an array) given for all DOFs.
+	'''
+		return x[self.free]
+
+
+	def scatter(self,x_1,x_2):
+		'''
+	Global vector from the values of the free
+	DOFs (x_1) and the fixed DOFs (x_2). The values
+	can also be arrays with one row per DOF.
+	'''
+		x = np.empty((self.nDOFs,)+np.shape(x_1)[1:])
+		x[self.free] = x_1
+		x[self.fixed] = x_2
+		return x
+
+
+
+
+
+
+class DOFElimination(DOFPartition):
+	'''
+Partition of the DOFs of a solution where the DOFs
+tied together by MPCs (u_a = u_b) are eliminated
+instead of adding lagrange multipliers. Every group
+of tied DOFs is replaced by one master DOF (the
+lowest DOF of the group), so that
+
+	u = T u_m
+
+where T is a sparse (DOFs, master DOFs) matrix with
+a single 1 in every row. The global matrices are
+reduced to T^T K T, which stays symmetric positive
+definite, and load vectors to T^T F. A lumped mass
+matrix stays diagonal, with the masses of a group
+added together on its master DOF.
+
+A master DOF is fixed if any DOF of its group is
+fixed. The free and fixed DOFs of the partition and
+index11 are numbered as master DOFs, self.nDOFs is
+the number of master DOFs.
+
+self.nAll		- number of DOFs of the mesh
+self.master		- master DOF (index) of every DOF
+self.masters	- lowest DOF of every master DOF
+self.fixedMasters	- fixed displacement of the fixed
+				  master DOFs
+self.T			- transformation to the DOFs of the
+				  mesh from the master DOFs, with
+				  the columns in the order of index11
+'''
+	def __init__(self,nDOFs,fixedDOFs,ties):
+		self.nAll = nDOFs
+		pairs = np.array([ties[tie] for tie in sorted(ties.keys())],dtype=np.int64).reshape(-1,2)
+		graph = sp.coo_matrix((np.ones(len(pairs)),(pairs[:,0],pairs[:,1])),shape=(nDOFs,nDOFs))
+		[nMasters, group] = connected_components(graph,directed=False)
+		self.masters = np.full(nMasters,nDOFs,dtype=np.int64)
+		np.minimum.at(self.masters,group,np.arange(nDOFs))
+		order = np.argsort(self.masters)
+		self.masters = self.masters[order]
+		rank = np.empty(nMasters,dtype=np.int64)
+		rank[order] = np.arange(nMasters)
+		self.master = rank[group]
+
+		fixedMasters = {}
+		for DOF in fixedDOFs:
+			if self.master[DOF] in fixedMasters and fixedMasters[self.master[DOF]] != fixedDOFs[DOF]:
+				print('\n\tWARNING:\n\tTied DOFs', self.masters[self.master[DOF]], 'and', DOF, 'have different fixed displacements.')
+				print('\tUsing the fixed displacement of DOF', DOF)
+			fixedMasters[self.master[DOF]] = fixedDOFs[DOF]
+		super(DOFElimination,self).__init__(nMasters,fixedMasters)
+		self.fixedMasters = fixedMasters
+		self.T = sp.csc_matrix((np.ones(nDOFs),(np.arange(nDOFs),self.position[self.master])),shape=(nDOFs,nMasters))
+
+
+	def fixedValues(self,fixedDOFs):
+		'''
+	Values of the fixed master DOFs (u_2) in the
+	order of the partition.
+	'''
+		return np.array([self.fixedMasters[DOF] for DOF in self.fixed],dtype=float)
+
+
+	def permute(self,A):
+		'''
+	Reduced matrix T^T A T of the sparse matrix A,
+	in the order of index11 and in CSC format.
+	'''
+		return sp.csc_matrix(self.T.T.dot(sp.csc_matrix(A)).dot(self.T))
+
+
+	def blocks(self,A,names=['11','12','22']):
+		'''
+	Blocks of the reduced matrix for the free (1) and
+	fixed (2) master DOFs, in the order given by names.
+	A is a sparse matrix, or a vector with the diagonal
+	of a lumped matrix.
+	'''
+		if isinstance(A,np.ndarray) and A.ndim == 1:
+			A = np.bincount(self.master,weights=A[:self.nAll],minlength=self.nDOFs)
+		return super(DOFElimination,self).blocks(A,names)
+
+
+	def reduce(self,F):
+		'''
+	Loads on the free master DOFs, T^T F, from a load
+	vector F given for all DOFs of the mesh.
+	'''
+		return self.T.T.dot(F[:self.nAll])[:self.nFree]
+
+
+	def restrict(self,x):
+		'''
+	Values of the free master DOFs from a vector x
+	(or the rows of an array) given for all DOFs of
+	the mesh, taken from the lowest DOF of each group.
+	'''
+		return x[self.masters[self.free]]
+
+
+	def scatter(self,x_1,x_2):
+		'''
+	Vector of all DOFs of the mesh from the values of
+	the free (x_1) and fixed (x_2) master DOFs.
+	'''
+		return super(DOFElimination,self).scatter(x_1,x_2)[self.master]
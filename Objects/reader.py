@@ -337,10 +337,15 @@ is accessible to the FEModel object.
 											   'loads': [],
 											   'boundaries': [],
 											   'dampings': [],
+											   'integrator': 'Newmark',
+											   'averaging': 'unweighted',
+											   'mpc': 'lagrange',
+											   'mass': 'lumped',
+											   'frequencies': None,
 											   'results': {} }
 					current_solution = line[1]
 					self.meshes[current_solution] = 'all'
-					if line[2] in ['Static', 'StaticPlastic', 'Eigenmodes', 'ModalDynamic']:
+					if line[2] in ['Static', 'StaticPlastic', 'Eigenmodes', 'ModalDynamic', 'FrequencyResponse']:
 						pass
 					else:
 						print('\n\tERROR: (line number '+str(line_number)+')')
@@ -394,6 +399,88 @@ is accessible to the FEModel object.
 					else:
 						self.solutions[current_solution]['dampings'].append(line[1])
 
+				elif(line[0] == 'INTEGRATOR'):
+					if current_solution == '':
+						print('\n\tERROR: (line number '+str(line_number)+')')
+						print('\tINTEGRATOR needs to be specified AFTER the SOLUTION it is used in!')
+						input_error = True
+						break
+					elif line[1] in ['Newmark', 'NigamJennings', 'FrequencyDomain']:
+						self.solutions[current_solution]['integrator'] = line[1]
+					else:
+						print('\n\tERROR: (line number '+str(line_number)+')')
+						print('\tUnknown INTEGRATOR type: ', line[1])
+						input_error = True
+						break
+
+				elif(line[0] == 'AVERAGING'):
+					if current_solution == '':
+						print('\n\tERROR: (line number '+str(line_number)+')')
+						print('\tAVERAGING needs to be specified AFTER the SOLUTION it is used in!')
+						input_error = True
+						break
+					elif line[1] in ['unweighted', 'volume']:
+						self.solutions[current_solution]['averaging'] = line[1]
+					else:
+						print('\n\tERROR: (line number '+str(line_number)+')')
+						print('\tUnknown AVERAGING type: ', line[1])
+						input_error = True
+						break
+
+				elif(line[0] == 'MPC'):
+					if current_solution == '':
+						print('\n\tERROR: (line number '+str(line_number)+')')
+						print('\tMPC needs to be specified AFTER the SOLUTION it is used in!')
+						input_error = True
+						break
+					elif line[1] in ['lagrange', 'elimination']:
+						self.solutions[current_solution]['mpc'] = line[1]
+					else:
+						print('\n\tERROR: (line number '+str(line_number)+')')
+						print('\tUnknown MPC type: ', line[1])
+						input_error = True
+						break
+
+				elif(line[0] == 'MASS'):
+					if current_solution == '':
+						print('\n\tERROR: (line number '+str(line_number)+')')
+						print('\tMASS needs to be specified AFTER the SOLUTION it is used in!')
+						input_error = True
+						break
+					elif line[1] in ['lumped', 'consistent']:
+						self.solutions[current_solution]['mass'] = line[1]
+					else:
+						print('\n\tERROR: (line number '+str(line_number)+')')
+						print('\tUnknown MASS type: ', line[1])
+						input_error = True
+						break
+
+				elif(line[0] == 'FREQUENCIES'):
+					if current_solution == '':
+						print('\n\tERROR: (line number '+str(line_number)+')')
+						print('\tFREQUENCIES need to be specified AFTER the SOLUTION they are used in!')
+						input_error = True
+						break
+					elif len(line) < 4:
+						print('\n\tERROR: (line number '+str(line_number)+')')
+						print('\tFREQUENCIES needs a first frequency, a last frequency and a number of lines!')
+						input_error = True
+						break
+					else:
+						try:
+							frequencies = [float(line[1]), float(line[2]), int(line[3])]
+						except ValueError:
+							print('\n\tERROR: (line number '+str(line_number)+')')
+							print('\tFREQUENCIES needs two frequencies and a whole number of lines, not:', ', '.join(line[1:4]))
+							input_error = True
+							break
+						if not 0. <= frequencies[0] < frequencies[1] or frequencies[2] <= 0:
+							print('\n\tERROR: (line number '+str(line_number)+')')
+							print('\tFREQUENCIES needs 0 <= first frequency < last frequency and more than 0 lines!')
+							input_error = True
+							break
+						self.solutions[current_solution]['frequencies'] = frequencies
+
 				elif(line[0] == 'RESULTS'):
 					if current_solution == '':
 						print('\n\tERROR: (line number '+str(line_number)+')')
@@ -795,11 +882,15 @@ is accessible to the FEModel object.
 						print('\n\tERROR:\n\tSolution '+sol+' has no results requested.')
 						input_error = True
 
-				elif self.solutions[sol]['type'] in ['ModalDynamic']:
+				elif self.solutions[sol]['type'] in ['ModalDynamic', 'FrequencyResponse']:
 					# check that results requested are
 					# supported for solution type
+					if self.solutions[sol]['type'] == 'ModalDynamic':
+						supported = ['displacement', 'velocity', 'acceleration', 'frf_accel', 'srs_accel', 'modeshapes']
+					else:
+						supported = ['displacement', 'velocity', 'acceleration', 'frf_accel', 'modeshapes']
 					for result in self.solutions[sol]['results']:
-						if result not in ['displacement', 'velocity', 'acceleration', 'frf_accel', 'srs_accel', 'modeshapes']:
+						if result not in supported:
 							print('\n\tERROR:\n\t'+result+' not supported for solution type '+self.solutions[sol]['type'])
 							input_error = True
 
@@ -820,7 +911,7 @@ is accessible to the FEModel object.
 					# applicable to solution type
 					for load in self.solutions[sol]['loads']:
 						if self.loads[load]['type'] not in ['ForceDynamic', 'Acceleration']:
-							print('\n\tERROR:\n\tSolution '+sol+' has loads that can not be used in ModalDynamic solution.')
+							print('\n\tERROR:\n\tSolution '+sol+' has loads that can not be used in '+self.solutions[sol]['type']+' solution.')
 							input_error = True
 
 				else:
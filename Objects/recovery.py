@@ -0,0 +1,180 @@
+#
+#
+#	recovery.py
+#  -------------
+#
+#	This is the recovery module. It calculates strains and stresses
+#	of 3D solid elements from the displacements of a solution, for
+#	all elements of a type at once. The element displacements are
+#	gathered with the element freedom tables of the assembler, the
+#	strains at all nodal points follow from one tensor contraction
+#	with cached inverse Jacobians, and the von Mises, principal and
+#	maximum shear values are found for all points with a closed-form
+#	eigenvalue solution of the symmetric 3x3 tensors.
+#
+
+
+import numpy as np
+
+
+
+
+
+
+class StressRecovery(object):
+	'''
+Batched strain and stress recovery for the 3D solid
+elements of a mesh (HEX8N, HEX20N and TET10N). The
+results are calculated at the points where nodal
+results are calculated for the element type (the
+nodes, and for HEX20N also the face midpoints), and
+stored in the result store of the mesh.
+
+The inverse Jacobians at these points only depend on
+the node coordinates, so they are calculated once for
+all elements of a type the first time it is used, and
+kept for later solutions on the same mesh.
+
+self.mesh		- mesh of the elements
+self.chunk		- number of elements calculated together
+self.EFT		- (elements, DOFs) element freedom
+				  tables of every type, in the row
+				  order of the result store
+self.sections	- section of every element of a type,
+				  as an index into self.E
+self.E			- elasticity matrices of the sections
+self.invJ		- (elements, points, 3, 3) inverse
+				  Jacobians of every type
+'''
+	types = ['HEX8N', 'HEX20N', 'TET10N']
+
+	def __init__(self,mesh,chunk=4096):
+		self.mesh = mesh
+		self.chunk = chunk
+		self.EFT = {}
+		self.sections = {}
+		self.E = []
+		self.invJ = {}
+
+
+	def elementType(self,type):
+		'''
+	Set up the element freedom tables, section index
+	and inverse Jacobians of the elements of a type.
+	'''
+		elements = self.mesh.elements
+		numbers = self.mesh.results.elementType(type)
+		self.EFT[type] = np.array([elements[element].EFT for element in numbers],dtype=np.int64).reshape(len(numbers),-1)
+		sections = {}
+		index = []
+		for element in numbers:
+			section = elements[element].section
+			if id(section) not in sections:
+				sections[id(section)] = len(self.E)
+				self.E.append(np.array(section.E,dtype=float))
+			index.append(sections[id(section)])
+		self.sections[type] = np.array(index,dtype=np.int64)
+
+		table = self.shapeFunctionTable(type)
+		X = np.array([elements[element].nodeCoordinates() for element in numbers]).reshape(len(numbers),-1,3)
+		J = np.einsum('eai,paj->epij',X,table['dNf_dqc'])
+		self.invJ[type] = np.linalg.inv(J)
+
+
+	def shapeFunctionTable(self,type):
+		'''
+	Shape function table at the nodal points of an
+	element type, from GaussQuad.
+	'''
+		element = self.mesh.elements[self.mesh.results.elementType(type)[0]]
+		return element.gaussQuad.shapeFunctionTable(element,'nodal')
+
+
+	def recover(self,solution,u,numbers,calcStrain,calcStress):
+		'''
+	Calculate strains and/or stresses of the given
+	elements for the displacements u of a solution,
+	and store them in the result store of the mesh.
+	'''
+		elements = self.mesh.elements
+		store = self.mesh.results
+		selected = {}
+		for element in numbers:
+			if elements[element].type not in selected:
+				selected[elements[element].type] = []
+			selected[elements[element].type].append(element)
+
+		for type in selected:
+			if type not in self.invJ:
+				self.elementType(type)
+
+		u = np.asarray(u,dtype=float).ravel()
+		E = np.array(self.E).reshape(-1,6,6)
+		for type in selected:
+			rows = np.unique([store.elementRows[element] for element in selected[type]])
+			dNf_dqc = self.shapeFunctionTable(type)['dNf_dqc']
+			for start in range(0,len(rows),self.chunk):
+				chunk = rows[start:start+self.chunk]
+				strain = self.strains(u[self.EFT[type][chunk]].reshape(len(chunk),-1,3),dNf_dqc,self.invJ[type][chunk])
+				if calcStrain:
+					store.setElementField(solution,'strain',type,chunk,store.record(self.invariants(strain)))
+				if calcStress:
+					stress = np.einsum('eij,epj->epi',E[self.sections[type][chunk]],strain)
+					store.setElementField(solution,'stress',type,chunk,store.record(self.invariants(stress)))
+
+
+	def strains(self,U,dNf_dqc,invJ):
+		'''
+	Strain vectors [xx, yy, zz, xy, yz, zx] (with
+	engineering shear strains, as from the B-matrix of
+	the elements) at all points of a set of elements.
+
+	U			- node displacements (elements, nodes, 3)
+	dNf_dqc		- shape function derivatives with respect
+				  to the natural coordinates (points, nodes, 3)
+	invJ		- inverse Jacobians (elements, points, 3, 3)
+	'''
+		G = np.einsum('paj,eak->epjk',dNf_dqc,U)
+		grad = np.einsum('epji,epjk->epik',invJ,G)
+		return np.stack([grad[...,0,0], grad[...,1,1], grad[...,2,2],
+						 grad[...,1,0]+grad[...,0,1],
+						 grad[...,2,1]+grad[...,1,2],
+						 grad[...,2,0]+grad[...,0,2]],axis=-1)
+
+
+	def invariants(self,t):
+		'''
+	Von Mises, maximum principal, minimum principal and
+	maximum shear values of (..., 6) tensor vectors, as
+	a (..., 4) array. The components are arranged in the
+	symmetric tensor as in the elements:
+
+		[[t0, t3, t4],
+		 [t3, t1, t5],
+		 [t4, t5, t2]]
+	'''
+		VonMises = np.sqrt(((t[...,0]-t[...,1])**2 + (t[...,1]-t[...,2])**2 + (t[...,0]-t[...,2])**2 + \
+							6*(t[...,3]**2 + t[...,4]**2 + t[...,5]**2))/2.0)
+		[MaxPrinc, MinPrinc] = self.principalValues(t)
+		return np.stack([VonMises, MaxPrinc, MinPrinc, (MaxPrinc-MinPrinc)/2.0],axis=-1)
+
+
+	def principalValues(self,t):
+		'''
+	Largest and smallest eigenvalues of symmetric 3x3
+	tensors given as (..., 6) vectors, using the closed
+	form (trigonometric) solution of the characteristic
+	equation instead of an eigenvalue solver per point.
+	'''
+		q = (t[...,0] + t[...,1] + t[...,2])/3.0
+		a = t[...,0] - q
+		b = t[...,1] - q
+		c = t[...,2] - q
+		offDiagonal = t[...,3]**2 + t[...,4]**2 + t[...,5]**2
+		p = np.sqrt((a**2 + b**2 + c**2 + 2*offDiagonal)/6.0)
+		det = a*(b*c - t[...,5]**2) - t[...,3]*(t[...,3]*c - t[...,5]*t[...,4]) + \
+			  t[...,4]*(t[...,3]*t[...,5] - b*t[...,4])
+		isotropic = p == 0.
+		r = np.where(isotropic, 0., det/(2*np.where(isotropic, 1., p)**3))
+		phi = np.arccos(np.clip(r,-1.,1.))/3.0
+		return [q + 2*p*np.cos(phi), q + 2*p*np.cos(phi + 2*np.pi/3.0)]
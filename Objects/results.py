@@ -0,0 +1,535 @@
+#
+#
+#	results.py
+#  ------------
+#
+#	This is the results module. It holds the results of the
+#	solutions on a mesh as one contiguous numpy array for every
+#	solution and result field, with a row for every node, or a
+#	row for every element of a type with a column for every point
+#	where element results are calculated. The solvers write whole
+#	fields at once, and the nodes and elements only hold a small
+#	view object per solution that reads its row from the arrays,
+#	for writeResults and the viewer. Element results are averaged
+#	at the nodes with a sparse element-node incidence matrix per
+#	element type.
+#
+
+
+import numpy as np
+import scipy.sparse as sp
+
+
+
+
+
+
+class ResultStore(object):
+	'''
+Results of the solutions on a mesh, as one array per
+solution and field with a row for every node of the
+mesh, in the order of mesh.nodes:
+
+	self.fields[solution][field]	- (nodes, k) array
+
+Fields with named components (the averaged stresses
+and strains) are structured arrays, so that the
+components can be read by name from a row, or as a
+column for all nodes. Fields that are only calculated
+for some of the nodes (node forces) have a boolean
+mask of the rows that have values.
+
+Element results (stresses and strains at the nodal
+points of solid elements) are kept per element type,
+since the number of points depends on the type:
+
+	self.elementFields[solution][field][type]
+									- (elements, points) array
+
+self.nodeIDs		- node numbers in row order
+self.rows			- row of every node number
+self.DOFs			- (nodes, 6) global DOF of every node
+					  freedom, -1 for inactive freedoms
+self.fields			- result arrays by solution and field
+self.defined		- rows with values by solution and field
+self.elementIDs		- element numbers of every type in row order
+self.elementRows	- row of every element number in its type
+self.connectivity	- (elements, nodes) node rows of the elements
+					  of every type
+self.elementFields	- element result arrays by solution,
+					  field and element type
+self.elementDefined	- elements with values by solution,
+					  field and element type
+self.incidences		- (nodes, element nodes) incidence matrix
+					  of the elements of every type
+self.volumes		- volume of every element of a type
+self.valences		- number (or volume) of the elements
+					  at every node, by type and weighting
+'''
+	components = ['VonMises', 'MaxPrinc', 'MinPrinc', 'MaxShear']
+
+	# corner nodes of the simplices (tetrahedrons, triangles
+	# and lines) that the element volumes are calculated from,
+	# with the hexahedrons split into five tetrahedrons as in
+	# the mass matrices of the elements
+	simplices = {'TET4N':	[[0, 1, 2, 3]],
+				 'TET10N':	[[0, 1, 2, 3]],
+				 'HEX8N':	[[0, 1, 2, 5], [0, 5, 2, 7], [0, 5, 7, 4], [0, 2, 3, 7], [2, 6, 7, 5]],
+				 'HEX20N':	[[0, 1, 2, 5], [0, 5, 2, 7], [0, 5, 7, 4], [0, 2, 3, 7], [2, 6, 7, 5]],
+				 'TRI3N':	[[0, 1, 2]],
+				 'TRI6N':	[[0, 1, 2]],
+				 'QUAD4N':	[[0, 1, 2], [0, 2, 3]],
+				 'QUAD8N':	[[0, 1, 2], [0, 2, 3]],
+				 'ROD2N':	[[0, 1]],
+				 'ROD2N2D':	[[0, 1]],
+				 'BEAM2N':	[[0, 1]],
+				 'BEAM2N2D':	[[0, 1]]}
+
+	def __init__(self,mesh):
+		self.mesh = mesh
+		self.nodeIDs = np.array([mesh.nodes[node].number for node in mesh.nodes],dtype=np.int64)
+		self.rows = dict(zip(self.nodeIDs.tolist(),range(len(self.nodeIDs))))
+		NFS = np.array([mesh.nodes[node].NFS for node in mesh.nodes],dtype=np.int64).reshape(-1,6)
+		start = np.array([mesh.NFMT[node] for node in self.nodeIDs],dtype=np.int64)
+		self.DOFs = np.where(NFS == 1, start[:,None]+np.cumsum(NFS,axis=1)-1, -1)
+		self.fields = {}
+		self.defined = {}
+		self.elementIDs = {}
+		self.elementRows = {}
+		self.connectivity = {}
+		self.elementFields = {}
+		self.elementDefined = {}
+		self.incidences = {}
+		self.volumes = {}
+		self.valences = {}
+
+
+	def rowsOf(self,nodes):
+		'''
+	Rows of a list of node numbers.
+	'''
+		return np.array([self.rows[node] for node in nodes],dtype=np.int64)
+
+
+	def nodalVector(self,x):
+		'''
+	Values of a global DOF vector at every node, as a
+	(nodes, 7) array with the six freedoms (zero for
+	inactive freedoms) and the magnitude of the three
+	translations in the last column.
+	'''
+		x = np.asarray(x,dtype=float).ravel()
+		active = self.DOFs >= 0
+		values = np.zeros((len(self.nodeIDs),7))
+		values[:,:6][active] = x[self.DOFs[active]]
+		values[:,6] = np.sqrt(np.sum(values[:,:3]**2,axis=1))
+		return values
+
+
+	def setField(self,solution,field,values,rows=None):
+		'''
+	Store a field for all nodes, or only for the
+	given rows of values.
+	'''
+		if solution not in self.fields:
+			self.fields[solution] = {}
+			self.defined[solution] = {}
+			self.attach(solution)
+		self.fields[solution][field] = values
+		if rows is None:
+			self.defined[solution][field] = None
+		else:
+			self.defined[solution][field] = np.zeros(len(self.nodeIDs),dtype=bool)
+			self.defined[solution][field][rows] = True
+
+
+	def record(self,values):
+		'''
+	Structured array with the named components from
+	an array with the components as the last axis.
+	'''
+		values = np.ascontiguousarray(values,dtype=float)
+		dtype = [(component,float) for component in self.components]
+		return values.view(dtype).reshape(values.shape[:-1])
+
+
+	def setAverage(self,solution,field,elementField,elements=None,weighted=False):
+		'''
+	Store the nodal average of an element field as
+	a field of the nodes. Nodes without elements with
+	values are left without values.
+	'''
+		[average, valence] = self.average(solution,elementField,elements,weighted)
+		self.setField(solution,field,self.record(average),np.flatnonzero(valence))
+
+
+	def field(self,solution,field):
+		'''
+	Array of a field for all nodes.
+	'''
+		return self.fields[solution][field]
+
+
+	def has(self,solution,field,row):
+		'''
+	True if the node in row has values for the field.
+	'''
+		if solution not in self.fields or field not in self.fields[solution]:
+			return False
+		defined = self.defined[solution][field]
+		return defined is None or bool(defined[row])
+
+
+	def remove(self,solution,field,rows):
+		'''
+	Remove the values of a field for the given rows.
+	'''
+		if self.defined[solution][field] is None:
+			self.defined[solution][field] = np.ones(len(self.nodeIDs),dtype=bool)
+		self.defined[solution][field][rows] = False
+
+
+	def elementType(self,type):
+		'''
+	Element numbers, rows and connectivity of the
+	elements of a type, set up the first time the
+	type is used.
+	'''
+		if type not in self.elementIDs:
+			elements = self.mesh.elements
+			numbers = [element for element in elements if elements[element].type == type]
+			self.elementIDs[type] = np.array(numbers,dtype=np.int64)
+			self.elementRows.update(zip(numbers,range(len(numbers))))
+			self.connectivity[type] = np.array([[self.rows[node.number] for node in elements[element].nodes] \
+												for element in numbers],dtype=np.int64).reshape(len(numbers),-1)
+		return self.elementIDs[type]
+
+
+	def setElementField(self,solution,field,type,rows,values):
+		'''
+	Store a field at the points of the elements of a
+	type. values has a row for every element row in
+	rows and the named components as the last axis.
+	The field is created the first time it is set,
+	and later calls add the values of more elements.
+	'''
+		numbers = self.elementType(type)
+		if solution not in self.elementFields:
+			self.elementFields[solution] = {}
+			self.elementDefined[solution] = {}
+		if field not in self.elementFields[solution]:
+			self.elementFields[solution][field] = {}
+			self.elementDefined[solution][field] = {}
+		if type not in self.elementFields[solution][field]:
+			self.elementFields[solution][field][type] = np.zeros((len(numbers),values.shape[1]),values.dtype)
+			self.elementDefined[solution][field][type] = np.zeros(len(numbers),dtype=bool)
+		self.elementFields[solution][field][type][rows] = values
+		self.elementDefined[solution][field][type][rows] = True
+		elements = self.mesh.elements
+		for row in rows:
+			if solution not in elements[numbers[row]].solutions:
+				elements[numbers[row]].solutions[solution] = ElementResults(self,solution,type,row)
+
+
+	def hasElement(self,solution,field,type,row):
+		'''
+	True if the element in row of a type has values
+	for the field.
+	'''
+		if solution not in self.elementFields or field not in self.elementFields[solution]:
+			return False
+		if type not in self.elementFields[solution][field]:
+			return False
+		return bool(self.elementDefined[solution][field][type][row])
+
+
+	def removeElement(self,solution,field,type,row):
+		'''
+	Remove the values of an element field for the
+	element in row of a type.
+	'''
+		self.elementDefined[solution][field][type][row] = False
+
+
+	def gatherElementField(self,solution,field,numbers):
+		'''
+	Copy a field from the result dicts of elements
+	into the element arrays, so that it is averaged
+	with the fields of the other elements. The dicts
+	are kept, since other results of the elements are
+	stored in them.
+	'''
+		elements = self.mesh.elements
+		selected = {}
+		for element in numbers:
+			if solution in elements[element].solutions and field in elements[element].solutions[solution]:
+				if elements[element].type not in selected:
+					selected[elements[element].type] = []
+				selected[elements[element].type].append(element)
+		for type in selected:
+			self.elementType(type)
+			rows = np.unique([self.elementRows[element] for element in selected[type]])
+			values = []
+			for row in rows:
+				nodal = elements[self.elementIDs[type][row]].solutions[solution][field]['nodal']
+				values.append([[nodal[point][component] for component in self.components] \
+										for point in range(1,len(nodal)+1)])
+			self.setElementField(solution,field,type,rows,self.record(np.array(values,dtype=float)))
+
+
+	def incidence(self,type):
+		'''
+	Sparse (nodes, element nodes) incidence matrix of
+	the elements of a type, where column e*n+a is node
+	a of the element in row e. Multiplying it with the
+	values at the element nodes gives their sum at
+	every node.
+	'''
+		if type not in self.incidences:
+			connectivity = self.connectivity[type]
+			self.incidences[type] = sp.csr_matrix((np.ones(connectivity.size),
+													(connectivity.ravel(),np.arange(connectivity.size))),
+													shape=(len(self.nodeIDs),connectivity.size))
+		return self.incidences[type]
+
+
+	def elementVolumes(self,type):
+		'''
+	Volume of every element of a type, from the
+	simplices of its corner nodes. The areas of 2D
+	elements are multiplied by the thickness and the
+	lengths of rods and beams by the area of their
+	sections. Element types without a volume get 1.
+	'''
+		if type not in self.volumes:
+			numbers = self.elementIDs[type]
+			if type not in self.simplices:
+				self.volumes[type] = np.ones(len(numbers))
+				return self.volumes[type]
+			nodes = self.mesh.nodes
+			coord = np.array([[nodes[node].coord[0][0], nodes[node].coord[1][0], nodes[node].coord[2][0]] \
+															for node in self.nodeIDs])
+			X = coord[self.connectivity[type]]
+			volume = np.zeros(len(numbers))
+			for simplex in self.simplices[type]:
+				edges = X[:,simplex[1:]]-X[:,simplex[:1]]
+				if len(simplex) == 4:
+					volume += np.linalg.det(edges)/6.0
+				elif len(simplex) == 3:
+					volume += np.linalg.norm(np.cross(edges[:,0],edges[:,1]),axis=1)/2.0
+				else:
+					volume += np.linalg.norm(edges[:,0],axis=1)
+			if len(self.simplices[type][0]) == 3:
+				volume *= [getattr(self.mesh.elements[element].section,'thickness',1.) for element in numbers]
+			elif len(self.simplices[type][0]) == 2:
+				volume *= [getattr(self.mesh.elements[element].section,'area',1.) for element in numbers]
+			self.volumes[type] = np.abs(volume)
+		return self.volumes[type]
+
+
+	def valence(self,type,weighted):
+		'''
+	Number of elements of a type at every node, or
+	their volume if weighted is True. It is the same
+	for all fields, so it is only calculated once.
+	'''
+		if (type, weighted) not in self.valences:
+			weights = self.elementVolumes(type) if weighted else np.ones(len(self.elementIDs[type]))
+			self.valences[(type, weighted)] = self.incidence(type).dot(np.repeat(weights,self.connectivity[type].shape[1]))
+		return self.valences[(type, weighted)]
+
+
+	def average(self,solution,field,elements=None,weighted=False):
+		'''
+	Nodal average of an element field, from the values
+	at the element nodes of the elements with values
+	(or only of the given elements). Every element has
+	the same weight, or a weight equal to its volume
+	if weighted is True. Returns the (nodes, components)
+	averages and the valence of every node, which is
+	zero for nodes without elements with values.
+	'''
+		average = np.zeros((len(self.nodeIDs),len(self.components)))
+		valence = np.zeros(len(self.nodeIDs))
+		if solution not in self.elementFields or field not in self.elementFields[solution]:
+			return [average, valence]
+		for type in self.elementFields[solution][field]:
+			n = self.connectivity[type].shape[1]
+			selected = self.elementDefined[solution][field][type]
+			if elements is not None:
+				selected = selected & np.isin(self.elementIDs[type],list(elements))
+			if weighted:
+				weights = np.where(selected,self.elementVolumes(type),0.)
+			else:
+				weights = selected.astype(float)
+			values = self.elementFields[solution][field][type][:,:n]
+			values = np.stack([values[component] for component in self.components],axis=-1)
+			values = np.where(selected[:,None,None],values*weights[:,None,None],0.)
+			average += self.incidence(type).dot(values.reshape(-1,len(self.components)))
+			if np.all(selected):
+				valence += self.valence(type,weighted)
+			else:
+				valence += self.incidence(type).dot(np.repeat(weights,n))
+		defined = valence > 0
+		average[defined] /= valence[defined][:,None]
+		return [average, valence]
+
+
+	def extremes(self,solution,field,component,nodes):
+		'''
+	Largest and smallest value of a component of a
+	field over the given nodes that have values.
+	Returns [None, None] if none of them has values.
+	'''
+		if solution not in self.fields or field not in self.fields[solution]:
+			return [None, None]
+		rows = self.rowsOf([node for node in nodes if node in self.rows])
+		if self.defined[solution][field] is not None:
+			rows = rows[self.defined[solution][field][rows]]
+		if len(rows) == 0:
+			return [None, None]
+		values = self.fields[solution][field][component][rows]
+		return [np.max(values), np.min(values)]
+
+
+	def elementMaximum(self,solution,field,component):
+		'''
+	Largest value of a component of an element field
+	over all points of the elements with values, and
+	the number of the element where it is found.
+	Returns [None, None] if no element has values.
+	'''
+		maximum = [None, None]
+		if solution in self.elementFields and field in self.elementFields[solution]:
+			for type in self.elementFields[solution][field]:
+				defined = np.flatnonzero(self.elementDefined[solution][field][type])
+				if len(defined) == 0:
+					continue
+				values = self.elementFields[solution][field][type][defined][component].max(axis=1)
+				if maximum[0] is None or np.max(values) > maximum[0]:
+					maximum = [np.max(values), self.elementIDs[type][defined[np.argmax(values)]]]
+		return maximum
+
+
+	def attach(self,solution):
+		'''
+	Give every node of the mesh a view of its results
+	for a solution, in node.solutions[solution].
+	'''
+		for node, row in self.rows.items():
+			self.mesh.nodes[node].solutions[solution] = NodeResults(self,solution,row)
+
+
+
+
+
+
+class NodeResults(object):
+	'''
+Results of one solution at one node. Reads the row of
+the node from the arrays of the result store, so that
+node.solutions[solution][field] gives the values of
+the node and "field in node.solutions[solution]" tells
+if the node has values for the field.
+'''
+	__slots__ = ['store', 'solution', 'row']
+
+	def __init__(self,store,solution,row):
+		self.store = store
+		self.solution = solution
+		self.row = row
+
+
+	def __contains__(self,field):
+		return self.store.has(self.solution,field,self.row)
+
+
+	def __getitem__(self,field):
+		if field not in self:
+			raise KeyError(field)
+		return self.store.fields[self.solution][field][self.row]
+
+
+	def keys(self):
+		return [field for field in self.store.fields[self.solution] if field in self]
+
+
+
+
+
+
+class ElementResults(object):
+	'''
+Results of one solution at one element, read from the
+arrays of the result store. Gives the same access as
+the result dicts of other elements, so that
+
+	element.solutions[solution][field]['nodal'][point]
+
+is the record of named components at a point, where
+the points are numbered from 1.
+'''
+	__slots__ = ['store', 'solution', 'type', 'row']
+
+	def __init__(self,store,solution,type,row):
+		self.store = store
+		self.solution = solution
+		self.type = type
+		self.row = row
+
+
+	def __contains__(self,field):
+		return self.store.hasElement(self.solution,field,self.type,self.row)
+
+
+	def __getitem__(self,field):
+		if field not in self:
+			raise KeyError(field)
+		return {'nodal': PointResults(self.store.elementFields[self.solution][field][self.type][self.row])}
+
+
+	def __delitem__(self,field):
+		if field not in self:
+			raise KeyError(field)
+		self.store.removeElement(self.solution,field,self.type,self.row)
+
+
+	def keys(self):
+		return [field for field in self.store.elementFields.get(self.solution,{}) if field in self]
+
+
+
+
+
+
+class PointResults(object):
+	'''
+Results at the points of one element, numbered
+from 1 as in the result dicts of elements.
+'''
+	__slots__ = ['values']
+
+	def __init__(self,values):
+		self.values = values
+
+
+	def __getitem__(self,point):
+		if not 1 <= point <= len(self.values):
+			raise KeyError(point)
+		return self.values[point-1]
+
+
+	def __len__(self):
+		return len(self.values)
+
+
+	def __iter__(self):
+		return iter(range(1,len(self.values)+1))
+
+
+	def keys(self):
+		return list(self)
+
+
+	def items(self):
+		return [(point, self[point]) for point in self]
@@ -15,12 +15,19 @@ import scipy.sparse as sp
 import matplotlib.pyplot as plt
 
 from signaler import *
+from loads import *
 from math import sqrt
 from timeit import time
 from scipy.sparse.linalg import ArpackNoConvergence
 from scipy.linalg import eigh
 from scipy.integrate import cumtrapz, odeint
 from scipy.fft import fft, ifft
+from integrators import *
+from partition import *
+from results import *
+from recovery import *
+from histories import *
+from archive import *
 
 
 
@@ -34,6 +41,8 @@ and generates results as requested.
 	def __init__(self,name,mesh):
 		self.name = name
 		self.mesh = mesh
+		self.mpcMethod = 'lagrange'
+		self.massMatrix = 'lumped'
 
 
 	def applyBoundaryConditions(self):
@@ -58,9 +67,30 @@ and generates results as requested.
 					  eigenvectors.
 	self.fixedDOFs 	- DOFs with a fixed displacement.
 	self.mesh.NFMT	- Node Freedom Map Table.
-	self.index11	- List of DOFs for sorting K_11,
+	self.index11	- Array of DOFs for sorting K_11,
 					  K_12 and M_11, given K, K_mpc
-					  and M.
+					  and M (free DOFs first, then
+					  fixed DOFs).
+	self.partition	- Free and fixed DOFs as index
+					  arrays, used to extract the
+					  blocks of K (or K_mpc) and M.
+					  With tied DOFs (self.ties) the
+					  blocks are of the reduced
+					  matrices T^T K T and T^T M T.
+	self.massMatrix	- 'lumped' for the diagonal mass
+					  matrix (self.mesh.M) or
+					  'consistent' for the sparse
+					  consistent mass matrix
+					  (self.mesh.consistentM).
+	'''
+		self.setFixedDOFs()
+		self.partitionMatrices()
+
+
+	def setFixedDOFs(self):
+		'''
+	Collect the fixed DOFs of the boundary conditions,
+	{DOF: displacement}, in self.fixedDOFs.
 	'''
 		self.fixedDOFs = {}
 		for bound in self.boundaries:
@@ -68,114 +98,131 @@ and generates results as requested.
 			for DOF in self.boundaries[bound].fixed:
 				self.fixedDOFs[DOF] = self.boundaries[bound].fixed[DOF]
 
+
+	def partitionMatrices(self):
+		'''
+	Set up self.partition from self.fixedDOFs and
+	self.ties and extract the blocks of the stiffness
+	and mass matrices (see applyBoundaryConditions).
+	'''
 		if hasattr(self,'K_mpc'):
-			self.index11 = []
-			for DOF in range(self.mesh.nDOFs+len(self.MPCs)):
-				if DOF not in self.fixedDOFs:
-					self.index11.append(DOF)
-			for DOF in sorted(self.fixedDOFs.keys()):
-				self.index11.append(DOF)
-
-			self.K_11 = self.K_mpc[self.index11[:(self.mesh.nDOFs+len(self.MPCs)-len(self.fixedDOFs))],:] \
-									[:,self.index11[:(self.mesh.nDOFs+len(self.MPCs)-len(self.fixedDOFs))]]
-			self.K_12 = self.K_mpc[self.index11,:][:,self.index11][range(0,self.mesh.nDOFs+len(self.MPCs)-len(self.fixedDOFs)),:] \
-									[:,range(self.mesh.nDOFs+len(self.MPCs)-len(self.fixedDOFs),self.mesh.nDOFs+len(self.MPCs))]
-			if self.type in ['Eigenmodes', 'ModalDynamic']:
-				if len(self.fixedDOFs) > 0:
-					self.K_22 = self.K_mpc[self.index11,:][:,self.index11][range(self.mesh.nDOFs+len(self.MPCs)-len(self.fixedDOFs),self.mesh.nDOFs+len(self.MPCs)),:] \
-											[:,range(self.mesh.nDOFs+len(self.MPCs)-len(self.fixedDOFs),self.mesh.nDOFs+len(self.MPCs))]
+			K = self.K_mpc
+		else:
+			K = self.mesh.K
+		if len(self.ties) != 0:
+			self.partition = DOFElimination(K.shape[0],self.fixedDOFs,self.ties)
+		else:
+			self.partition = DOFPartition(K.shape[0],self.fixedDOFs)
+		self.index11 = self.partition.index11
+
+		modal = self.type in ['Eigenmodes', 'ModalDynamic', 'FrequencyResponse'] and len(self.fixedDOFs) > 0
+		if modal:
+			[self.K_11, self.K_12, self.K_22] = self.partition.blocks(K)
 		else:
-			self.index11 = []
-			for DOF in range(self.mesh.nDOFs):
-				if DOF not in self.fixedDOFs:
-					self.index11.append(DOF)
-			for DOF in sorted(self.fixedDOFs.keys()):
-				self.index11.append(DOF)
-
-			self.K_11 = self.mesh.K[self.index11[:(self.mesh.nDOFs-len(self.fixedDOFs))],:] \
-									[:,self.index11[:(self.mesh.nDOFs-len(self.fixedDOFs))]]
-			self.K_12 = self.mesh.K[self.index11,:][:,self.index11][range(0,self.mesh.nDOFs-len(self.fixedDOFs)),:] \
-									[:,range(self.mesh.nDOFs-len(self.fixedDOFs),self.mesh.nDOFs)]
-			if self.type in ['Eigenmodes', 'ModalDynamic']:
-				if len(self.fixedDOFs) > 0:
-					self.K_22 = self.mesh.K[self.index11,:][:,self.index11][range(self.mesh.nDOFs-len(self.fixedDOFs),self.mesh.nDOFs),:] \
-											[:,range(self.mesh.nDOFs-len(self.fixedDOFs),self.mesh.nDOFs)]
+			[self.K_11, self.K_12] = self.partition.blocks(K,['11','12'])
 
 		if self.mesh.needMassMatrix == True:
-			if hasattr(self,'K_mpc'):
+			if self.massMatrix == 'consistent':
+				M = self.mesh.consistentM
+				if hasattr(self,'K_mpc'):
+					M = sp.block_diag((M,sp.csc_matrix((len(self.MPCs),len(self.MPCs)))),format='csc')
+			else:
 				M = self.mesh.M
-				M = np.append(M,np.zeros(len(self.MPCs)))
-				M = sp.diags(M,0)
-				M = M.tocsc()
-				self.M_11 = M[self.index11[:(self.mesh.nDOFs+len(self.MPCs)-len(self.fixedDOFs))],:] \
-								[:,self.index11[:(self.mesh.nDOFs+len(self.MPCs)-len(self.fixedDOFs))]]
-				if self.type in ['Eigenmodes', 'ModalDynamic']:
-					if len(self.fixedDOFs) > 0:
-						self.M_12 = M[self.index11,:][:,self.index11][range(0,self.mesh.nDOFs+len(self.MPCs)-len(self.fixedDOFs)),:] \
-											[:,range(self.mesh.nDOFs+len(self.MPCs)-len(self.fixedDOFs),self.mesh.nDOFs+len(self.MPCs))]
-						self.M_22 = M[self.index11,:][:,self.index11][range(self.mesh.nDOFs+len(self.MPCs)-len(self.fixedDOFs),self.mesh.nDOFs+len(self.MPCs)),:] \
-											[:,range(self.mesh.nDOFs+len(self.MPCs)-len(self.fixedDOFs),self.mesh.nDOFs+len(self.MPCs))]
+				if hasattr(self,'K_mpc'):
+					M = np.append(M,np.zeros(len(self.MPCs)))
+			if modal:
+				[self.M_11, self.M_12, self.M_22] = self.partition.blocks(M)
 			else:
-				M = sp.diags(self.mesh.M,0)
-				M = M.tocsc()
-				self.M_11 = M[self.index11[:(self.mesh.nDOFs-len(self.fixedDOFs))],:][:,self.index11[:(self.mesh.nDOFs-len(self.fixedDOFs))]]
-				if self.type in ['Eigenmodes', 'ModalDynamic']:
-					if len(self.fixedDOFs) > 0:
-						self.M_12 = M[self.index11,:][:,self.index11][range(0,self.mesh.nDOFs-len(self.fixedDOFs)),:] \
-											[:,range(self.mesh.nDOFs-len(self.fixedDOFs),self.mesh.nDOFs)]
-						self.M_22 = M[self.index11,:][:,self.index11][range(self.mesh.nDOFs-len(self.fixedDOFs),self.mesh.nDOFs),:] \
-											[:,range(self.mesh.nDOFs-len(self.fixedDOFs),self.mesh.nDOFs)]
+				[self.M_11] = self.partition.blocks(M,['11'])
+
+
+	def shareMatrices(self,solution):
+		'''
+	Use the constraint matrix, partition and matrix
+	blocks of another solution with the same fixed
+	DOFs and constraints, instead of building copies
+	of them. Only the DOFs of self.fixedDOFs are used
+	by the partition, so the fixed displacements can
+	differ between the solutions.
+	'''
+		for matrix in ['K_mpc', 'partition', 'index11', 'K_11', 'K_12', 'K_22', 'M_11', 'M_12', 'M_22']:
+			if hasattr(solution,matrix):
+				setattr(self,matrix,getattr(solution,matrix))
+
+
+
 
 
 	def applyConstraints(self):
 		'''
 	Use constraints input from FEModel to create
 	lagrange multipliers that are applied to the
-	global stiffness matrix.
+	global stiffness matrix. Only the sparse
+	constraint matrix is built here, the assembled
+	global stiffness matrix is used as it is.
+
+	With self.mpcMethod = 'elimination' the constrained
+	DOF pairs are instead eliminated by the partition
+	(see DOFElimination), which keeps the stiffness
+	matrix symmetric positive definite.
 
 	self.mesh.K			- Global stiffness matrix.
 	self.K_mpc			- Global stiffness matrix
 						  with multipoint
 						  constraints applied.
 	self.MPCs			- DOFs that have lagrange
-						  multipliers.	
+						  multipliers.
+	self.ties			- DOFs that are eliminated.
 	'''
-		self.MPCs = {}
-		MPC_count = 0
+		self.setConstraintPairs()
+		self.assembleConstraintMatrix()
+
+
+	def setConstraintPairs(self):
+		'''
+	Set up the DOF pairs of the constraints, as
+	self.MPCs (lagrange multipliers) or self.ties
+	(eliminated) depending on self.mpcMethod.
+	'''
+		pairs = {}
 		for constr in self.constraints:
 			self.constraints[constr].setupNodePairs(self.mesh)
 			self.constraints[constr].lagrangeMultipliers(self.mesh)
 			for MPC in self.constraints[constr].lagrange:
-				self.MPCs[MPC_count] = self.constraints[constr].lagrange[MPC]
-				MPC_count += 1
+				pairs[len(pairs)] = self.constraints[constr].lagrange[MPC]
+
+		self.MPCs = {}
+		self.ties = {}
+		if self.mpcMethod == 'elimination':
+			self.ties = pairs
+		else:
+			self.MPCs = pairs
 
+
+	def assembleConstraintMatrix(self):
+		'''
+	Build self.K_mpc from the assembled stiffness
+	matrix and self.MPCs (see applyConstraints).
+	'''
 		if len(self.MPCs) != 0:
-			row = []
-			col = []
-			data = []
-			for elm in self.mesh.elements:
-				elmDOFs = len(self.mesh.elements[elm].K)
-				for j in range(elmDOFs):
-					for k in range(elmDOFs):
-						row.append(self.mesh.elements[elm].EFT[k])
-						col.append(self.mesh.elements[elm].EFT[j])
-						data.append(self.mesh.elements[elm].K[j][k])
-			for MPC in range(len(self.MPCs)):
-				row.append(self.mesh.nDOFs+MPC)
-				col.append(self.MPCs[MPC][0])
-				data.append(1.)
-				row.append(self.mesh.nDOFs+MPC)
-				col.append(self.MPCs[MPC][1])
-				data.append(-1.)
-				row.append(self.MPCs[MPC][0])
-				col.append(self.mesh.nDOFs+MPC)
-				data.append(1.)
-				row.append(self.MPCs[MPC][1])
-				col.append(self.mesh.nDOFs+MPC)
-				data.append(-1.)
-			self.K_mpc = sp.coo_matrix((np.array(data),(np.array(row),np.array(col))), \
-										shape=(self.mesh.nDOFs+len(self.MPCs),self.mesh.nDOFs+len(self.MPCs)))
-			self.K_mpc = self.K_mpc.tocsc()
+			# constraint matrix C with one row per MPC, u_a - u_b = 0,
+			# added to the assembled stiffness matrix as a block matrix
+			#
+			#	K_mpc = [ K  C^T ]
+			#			[ C   0  ]
+			DOFs = np.array([self.MPCs[MPC] for MPC in range(len(self.MPCs))],dtype=np.int64).reshape(-1,2)
+			row = np.repeat(np.arange(len(self.MPCs)),2)
+			data = np.tile([1., -1.],len(self.MPCs))
+			C = sp.csr_matrix((data,(row,DOFs.ravel())),shape=(len(self.MPCs),self.mesh.nDOFs))
+			self.K_mpc = sp.bmat([[self.mesh.K, C.T], [C, None]],format='csc')
+
+
+	def constraintPairs(self):
+		'''
+	DOF pairs of all MPCs, with lagrange multipliers
+	or eliminated.
+	'''
+		return dict(enumerate(list(self.MPCs.values())+list(self.ties.values())))
 
 
 
@@ -188,10 +235,16 @@ given the stiffness matrix, K, and the
 stiffness matrix modified for loads and
 constraints, K_11 and K_12, as well as 
 the force vector F.
+
+self.averaging	- 'unweighted' or 'volume', the
+				  weighting of the elements in the
+				  nodal averages of stresses and
+				  strains
 '''
 	def __init__(self,name,mesh):
 		self.type = 'Static'
 		super(Static,self).__init__(name,mesh)
+		self.averaging = 'unweighted'
 
 
 	def assembleLoadVector(self):
@@ -199,21 +252,32 @@ the force vector F.
 	Assemble the load vector from loads defined in
 	the input file.
 	'''
-		self.F = np.zeros((self.mesh.nDOFs+len(self.MPCs),1))
 		for j in self.loads:
 			if self.loads[j].type == 'Gravity':
-				self.loads[j].calcDegreeOfFreedomForces(self.mesh.nDOFs,self.mesh.NFMT,self.mesh.elements)
+				self.loads[j].calcDegreeOfFreedomForces(self.mesh.NFMT,self.mesh)
 			elif self.loads[j].type == 'ForceDistributed':
-				self.loads[j].calcDegreeOfFreedomForces(self.mesh.nDOFs,self.mesh.NFMT,self.mesh.elements,self.fixedDOFs,self.MPCs)
+				self.loads[j].calcDegreeOfFreedomForces(self.mesh.NFMT,self.mesh,self.fixedDOFs,self.constraintPairs())
 			elif self.loads[j].type == 'Torque':
-				self.loads[j].calcDegreeOfFreedomForces(self.mesh.nDOFs,self.mesh.NFMT,self.mesh.nodes)
+				self.loads[j].calcDegreeOfFreedomForces(self.mesh.NFMT,self.mesh.nodes)
 			else:
-				self.loads[j].calcDegreeOfFreedomForces(self.mesh.nDOFs,self.mesh.NFMT)
-			for k in range(self.mesh.nDOFs):
-				self.F[k] += self.loads[j].F[k]
+				self.loads[j].calcDegreeOfFreedomForces(self.mesh.NFMT)
+		self.F = loadVector(self.loads.values(),self.mesh.nDOFs+len(self.MPCs))
+
+
+	def reducedLoadVector(self):
+		'''
+	Set up the displacement vector of the fixed
+	DOFs, u_2, and the load vector of the free
+	DOFs with the loads from the fixed
+	displacements included, F_1 - K_12 u_2.
+	'''
+		u_2 = self.partition.fixedValues(self.fixedDOFs)
+		F_1 = self.partition.reduce(self.F[:,0])
+
+		return [u_2, F_1-self.K_12.dot(u_2)]
 
 
-	def calcDisplacements(self):
+	def calcDisplacements(self,u_1=None):
 		'''
 	Calculate displacements for FE-model
 	using the scipy sparsity matrix solver.
@@ -245,53 +309,27 @@ the force vector F.
 					  boundary DOFs.
 	self.K_12		- Part of rearranged global
 					  stiffness matrix.
-	'''
-		u_2 = []
-		for DOF in sorted(self.fixedDOFs.keys()):
-			u_2.append(self.fixedDOFs[DOF])
-		u_2 = np.array(u_2)
-
-		F_1 = []
-		for DOF in range(self.mesh.nDOFs+len(self.MPCs)):
-			if DOF not in self.fixedDOFs:
-				F_1.append(self.F[DOF][0])
-		F_1 = np.array(F_1)
 
-		if hasattr(self,'K_mpc'):
+	K_11 is factorized once for all solutions on the
+	mesh with the same fixed DOFs and MPCs, using the
+	factorization cache in self.mesh.factorizations.
+	If u_1 is given it has already been solved for
+	together with other load cases, and is only
+	distributed to the nodes, so the reduced load
+	vector is not needed.
+	'''
+		if u_1 is None:
+			[u_2, F_1] = self.reducedLoadVector()
 #			u_1 = mkl.sparse_qr_solve_mkl(self.K_11,F_1-mkl.dot_product_mkl(self.K_12,u_2))
-			u_1 = sp.linalg.spsolve(self.K_11,F_1-self.K_12.dot(u_2))
+			factor = self.mesh.factorizations.factorize(self.K_11,self.fixedDOFs,self.MPCs,self.ties)
+			u_1 = factor.solve(F_1)
 		else:
-#			u_1 = mkl.sparse_qr_solve_mkl(self.K_11,F_1-mkl.dot_product_mkl(self.K_12,u_2))
-			u_1 = sp.linalg.spsolve(self.K_11,F_1-self.K_12.dot(u_2))
-
-		self.u = []
-		count_1 = 0
-		count_2 = 0
-		for DOF in range(self.mesh.nDOFs):
-			if DOF in self.fixedDOFs:
-				self.u.append(u_2[count_2])
-				count_2 += 1
-			else:
-				self.u.append(u_1[count_1])
-				count_1 += 1
-		self.u = np.array(self.u)
-
-		for node in self.mesh.nodes:
-			if self.name not in self.mesh.nodes[node].solutions:
-				self.mesh.nodes[node].solutions[self.name] = {}
-			self.mesh.nodes[node].solutions[self.name]['displacement'] = [0., 0., 0., 0., 0., 0., 0.]
-			m = 0
-			for nfs in range(len(self.mesh.nodes[node].NFS)):
-				if self.mesh.nodes[node].NFS[nfs] == 1:
-					self.mesh.nodes[node].solutions[self.name]['displacement'][nfs] = self.u[self.mesh.NFMT[node]+m]
-					m += 1
-				else:
-					self.mesh.nodes[node].solutions[self.name]['displacement'][nfs] = 0.0
+			u_2 = self.partition.fixedValues(self.fixedDOFs)
+
+		# lagrange multipliers of MPCs are not displacements
+		self.u = self.partition.scatter(u_1,u_2)[:self.mesh.nDOFs]
 
-			self.mesh.nodes[node].solutions[self.name]['displacement'][6] = \
-				sqrt(self.mesh.nodes[node].solutions[self.name]['displacement'][0]**2 + \
-					 self.mesh.nodes[node].solutions[self.name]['displacement'][1]**2 + \
-					 self.mesh.nodes[node].solutions[self.name]['displacement'][2]**2)
+		self.mesh.results.setField(self.name,'displacement',self.mesh.results.nodalVector(self.u))
 
 
 	def calcNodeForces(self):
@@ -300,9 +338,14 @@ the force vector F.
 	'''
 		self.F = self.mesh.K.dot(self.u)
 		self.F = np.reshape(self.F,(len(self.F),1))
-		for j in self.loads:
-			if self.loads[j].type == 'ForceDistributed':
-				self.F -= self.loads[j].F
+		distributed = [self.loads[j] for j in self.loads if self.loads[j].type == 'ForceDistributed']
+		for load in distributed:
+			# load objects and element equivalent node forces are
+			# shared by all load cases, which are all set up before
+			# any of them are solved, so recalculate for this one
+			load.calcDegreeOfFreedomForces(self.mesh.NFMT,self.mesh,self.fixedDOFs,self.constraintPairs())
+		if len(distributed) != 0:
+			self.F -= loadVector(distributed,len(self.F))
 
 		self.reactionForces = {}
 		for BC in self.boundaries:
@@ -310,36 +353,16 @@ the force vector F.
 				if node not in self.reactionForces:
 					self.reactionForces[node] = []
 
-		for node in self.mesh.nodes:
-			if 'nodeforce' in self.mesh.nodes[node].solutions[self.name]:
-				pass
-			elif node in self.reactionForces:
-				self.mesh.nodes[node].solutions[self.name]['nodeforce'] = [0., 0., 0., 0., 0., 0., 0.]
-				m = 0
-				for nfs in range(6):
-					if self.mesh.nodes[node].NFS[nfs] == 1:
-						self.mesh.nodes[node].solutions[self.name]['nodeforce'][nfs] = float(self.F[self.mesh.NFMT[node]+m])
-						m += 1
-				self.mesh.nodes[node].solutions[self.name]['nodeforce'][6] = \
-							sqrt(self.mesh.nodes[node].solutions[self.name]['nodeforce'][0]**2 + \
-								 self.mesh.nodes[node].solutions[self.name]['nodeforce'][1]**2 + \
-								 self.mesh.nodes[node].solutions[self.name]['nodeforce'][2]**2)
-				self.reactionForces[node] = self.mesh.nodes[node].solutions[self.name]['nodeforce']
-			elif 'nodeforce' in self.results:
-				for pltxt in self.results['nodeforce']:
-					if node in self.nodesets[self.results['nodeforce'][pltxt]]:
-						self.mesh.nodes[node].solutions[self.name]['nodeforce'] = [0., 0., 0., 0., 0., 0., 0.]
-						m = 0
-						for nfs in range(6):
-							if self.mesh.nodes[node].NFS[nfs] == 1:
-								self.mesh.nodes[node].solutions[self.name]['nodeforce'][nfs] = float(self.F[self.mesh.NFMT[node]+m])
-								m += 1
-						self.mesh.nodes[node].solutions[self.name]['nodeforce'][6] = \
-									sqrt(self.mesh.nodes[node].solutions[self.name]['nodeforce'][0]**2 + \
-										 self.mesh.nodes[node].solutions[self.name]['nodeforce'][1]**2 + \
-										 self.mesh.nodes[node].solutions[self.name]['nodeforce'][2]**2)
-			else:
-				pass
+		nodes = set(self.reactionForces)
+		if 'nodeforce' in self.results:
+			for pltxt in self.results['nodeforce']:
+				nodes.update(self.nodesets[self.results['nodeforce'][pltxt]])
+		nodes = [node for node in nodes if node in self.mesh.results.rows]
+		nodeforce = self.mesh.results.nodalVector(self.F)
+		self.mesh.results.setField(self.name,'nodeforce',nodeforce,self.mesh.results.rowsOf(nodes))
+		for node in self.reactionForces:
+			if node in self.mesh.results.rows:
+				self.reactionForces[node] = nodeforce[self.mesh.results.rows[node]]
 
 
 	def calcElementForces(self):
@@ -379,9 +402,24 @@ the force vector F.
 		if stress or strain:
 			print('\tCalculating element stresses/strains...')
 
+		# 3D solid elements are calculated together by the
+		# stress recovery of the mesh, for the elements in
+		# all requested sets of both results
+		batched = []
+		for res in ['strain', 'stress']:
+			if res in self.results:
+				for pltxt in self.results[res]:
+					for element in self.elementsets[self.results[res][pltxt]]:
+						if self.mesh.elements[element].type in StressRecovery.types:
+							batched.append(element)
+		if len(batched) > 0:
+			self.mesh.recovery.recover(self.name,self.u,batched,strain,stress)
+
 		if strain:
 			for pltxt in self.results['strain']:
 				for element in self.elementsets[self.results['strain'][pltxt]]:
+					if self.mesh.elements[element].type in StressRecovery.types:
+						continue
 					if self.name not in self.mesh.elements[element].solutions:
 						self.mesh.elements[element].solutions[self.name] = {}
 					u = []
@@ -395,6 +433,8 @@ the force vector F.
 		if stress:
 			for pltxt in self.results['stress']:
 				for element in self.elementsets[self.results['stress'][pltxt]]:
+					if self.mesh.elements[element].type in StressRecovery.types:
+						continue
 					if self.name not in self.mesh.elements[element].solutions:
 						self.mesh.elements[element].solutions[self.name] = {}
 					if 'stress' in self.mesh.elements[element].solutions[self.name]:
@@ -409,69 +449,18 @@ the force vector F.
 									dof += 1
 						self.mesh.elements[element].calcStrain(u,strain,stress,self.name)
 
+		# element results that are not in the element arrays yet
+		# are copied there, and all are averaged at the nodes
+		weighted = (self.averaging == 'volume')
 		if strain:
 			print('\t...average element strains...')
-			for element in self.mesh.elements:
-				if self.name in self.mesh.elements[element].solutions:
-					if ('strain' in self.mesh.elements[element].solutions[self.name]):
-						for elm_node in range(len(self.mesh.elements[element].nodes)):
-							node_number = self.mesh.elements[element].nodes[elm_node].number
-							if 'avg_strain' not in self.mesh.nodes[node_number].solutions[self.name]:
-								self.mesh.nodes[node_number].solutions[self.name]['avg_strain'] = {'VonMises': 0.,
-																								   'MaxPrinc': 0.,
-																								   'MinPrinc': 0.,
-																								   'MaxShear': 0.,
-																								   'elm_count': 0}
-							self.mesh.nodes[node_number].solutions[self.name]['avg_strain']['VonMises'] += \
-									self.mesh.elements[element].solutions[self.name]['strain']['nodal'][elm_node+1]['VonMises']
-							self.mesh.nodes[node_number].solutions[self.name]['avg_strain']['MaxPrinc'] += \
-									self.mesh.elements[element].solutions[self.name]['strain']['nodal'][elm_node+1]['MaxPrinc']
-							self.mesh.nodes[node_number].solutions[self.name]['avg_strain']['MinPrinc'] += \
-									self.mesh.elements[element].solutions[self.name]['strain']['nodal'][elm_node+1]['MinPrinc']
-							self.mesh.nodes[node_number].solutions[self.name]['avg_strain']['MaxShear'] += \
-									self.mesh.elements[element].solutions[self.name]['strain']['nodal'][elm_node+1]['MaxShear']
-							self.mesh.nodes[node_number].solutions[self.name]['avg_strain']['elm_count'] += 1
-			for node in self.mesh.nodes:
-				if 'avg_strain' in self.mesh.nodes[node].solutions[self.name]:
-					if self.mesh.nodes[node].solutions[self.name]['avg_strain']['elm_count'] != 1:
-						count = self.mesh.nodes[node].solutions[self.name]['avg_strain']['elm_count']
-						self.mesh.nodes[node].solutions[self.name]['avg_strain']['VonMises'] /= count
-						self.mesh.nodes[node].solutions[self.name]['avg_strain']['MaxPrinc'] /= count
-						self.mesh.nodes[node].solutions[self.name]['avg_strain']['MinPrinc'] /= count
-						self.mesh.nodes[node].solutions[self.name]['avg_strain']['MaxShear'] /= count
-					del self.mesh.nodes[node].solutions[self.name]['avg_strain']['elm_count']
+			self.mesh.results.gatherElementField(self.name,'strain',self.mesh.elements)
+			self.mesh.results.setAverage(self.name,'avg_strain','strain',weighted=weighted)
 
 		if stress:
 			print('\t...average element stresses...')
-			for element in self.mesh.elements:
-				if self.name in self.mesh.elements[element].solutions:
-					if ('stress' in self.mesh.elements[element].solutions[self.name]):
-						for elm_node in range(len(self.mesh.elements[element].nodes)):
-							node_number = self.mesh.elements[element].nodes[elm_node].number
-							if 'avg_stress' not in self.mesh.nodes[node_number].solutions[self.name]:
-								self.mesh.nodes[node_number].solutions[self.name]['avg_stress'] = {'VonMises': 0.,
-																								   'MaxPrinc': 0.,
-																								   'MinPrinc': 0.,
-																								   'MaxShear': 0.,
-																								   'elm_count': 0}
-							self.mesh.nodes[node_number].solutions[self.name]['avg_stress']['VonMises'] += \
-									self.mesh.elements[element].solutions[self.name]['stress']['nodal'][elm_node+1]['VonMises']
-							self.mesh.nodes[node_number].solutions[self.name]['avg_stress']['MaxPrinc'] += \
-									self.mesh.elements[element].solutions[self.name]['stress']['nodal'][elm_node+1]['MaxPrinc']
-							self.mesh.nodes[node_number].solutions[self.name]['avg_stress']['MinPrinc'] += \
-									self.mesh.elements[element].solutions[self.name]['stress']['nodal'][elm_node+1]['MinPrinc']
-							self.mesh.nodes[node_number].solutions[self.name]['avg_stress']['MaxShear'] += \
-									self.mesh.elements[element].solutions[self.name]['stress']['nodal'][elm_node+1]['MaxShear']
-							self.mesh.nodes[node_number].solutions[self.name]['avg_stress']['elm_count'] += 1
-			for node in self.mesh.nodes:
-				if 'avg_stress' in self.mesh.nodes[node].solutions[self.name]:
-					if self.mesh.nodes[node].solutions[self.name]['avg_stress']['elm_count'] != 1:
-						count = self.mesh.nodes[node].solutions[self.name]['avg_stress']['elm_count']
-						self.mesh.nodes[node].solutions[self.name]['avg_stress']['VonMises'] /= count
-						self.mesh.nodes[node].solutions[self.name]['avg_stress']['MaxPrinc'] /= count
-						self.mesh.nodes[node].solutions[self.name]['avg_stress']['MinPrinc'] /= count
-						self.mesh.nodes[node].solutions[self.name]['avg_stress']['MaxShear'] /= count
-					del self.mesh.nodes[node].solutions[self.name]['avg_stress']['elm_count']
+			self.mesh.results.gatherElementField(self.name,'stress',self.mesh.elements)
+			self.mesh.results.setAverage(self.name,'avg_stress','stress',weighted=weighted)
 
 
 	def writeResults(self,filename):
@@ -487,23 +476,18 @@ the force vector F.
 			fobj.write('    |------^------^------^------^------^------^------|\n\n')
 			max_disp = 0.0
 			max_disp_node = 0
-			for node in self.mesh.nodes:
-				if self.name in self.mesh.nodes[node].solutions:
-					if 'displacement' in self.mesh.nodes[node].solutions[self.name]:
-						if self.mesh.nodes[node].solutions[self.name]['displacement'][6] > max_disp:
-							max_disp = self.mesh.nodes[node].solutions[self.name]['displacement'][6]
-							max_disp_node = self.mesh.nodes[node].number
+			displacement = self.mesh.results.field(self.name,'displacement')
+			if len(displacement) > 0 and np.max(displacement[:,6]) > max_disp:
+				max_disp = np.max(displacement[:,6])
+				max_disp_node = self.mesh.results.nodeIDs[np.argmax(displacement[:,6])]
 			fobj.write('\n\n\t\t\t MAXIMUM DISPLACEMENT (node '+str(max_disp_node)+'):\n\t\t\t\t%6.3E\n\n' % (max_disp))
 			max_stress = 0.0
 			max_stress_elm = 0
 			if 'stress' in self.results:
-				for element in self.mesh.elements:
-					if self.name in self.mesh.elements[element].solutions:
-						if ('stress' in self.mesh.elements[element].solutions[self.name]):
-							for node in range(len(self.mesh.elements[element].solutions[self.name]['stress']['nodal'])):
-								if self.mesh.elements[element].solutions[self.name]['stress']['nodal'][node+1]['VonMises'] > max_stress:
-									max_stress = self.mesh.elements[element].solutions[self.name]['stress']['nodal'][node+1]['VonMises']
-									max_stress_elm = self.mesh.elements[element].number
+				[VonMises, element] = self.mesh.results.elementMaximum(self.name,'stress','VonMises')
+				if VonMises is not None and VonMises > max_stress:
+					max_stress = VonMises
+					max_stress_elm = element
 				fobj.write('\t\t MAXIMUM VONMISES STRESS (element '+str(max_stress_elm)+'):\n\t\t\t\t%6.3E\n\n' % (max_stress))
 
 			line11 = '  |-------------------------------------------------------------|'
@@ -554,11 +538,13 @@ the force vector F.
 					fobj.write(line21+'\n')
 					fobj.write(template2.format(*header)+'\n')
 					fobj.write(line22+'\n')
+					displacement = self.mesh.results.field(self.name,'displacement')
 					for node in self.nodesets[self.results[res]['text']]:
 						nodeRes = ['  %04d' % (node)]
-						nodeRes.append(' %6.3E' % (self.mesh.nodes[node].solutions[self.name]['displacement'][6]))
+						row = self.mesh.results.rows[node]
+						nodeRes.append(' %6.3E' % (displacement[row,6]))
 						for xyz in range(6):
-							nodeRes.append(' %6.3E' % (self.mesh.nodes[node].solutions[self.name]['displacement'][xyz]))
+							nodeRes.append(' %6.3E' % (displacement[row,xyz]))
 						fobj.write(template2.format(*nodeRes)+'\n')
 					fobj.write(line22+'\n')
 
@@ -568,17 +554,19 @@ the force vector F.
 					fobj.write(line21+'\n')
 					fobj.write(template2.format(*header)+'\n')
 					fobj.write(line22+'\n')
+					nodeforce = self.mesh.results.field(self.name,'nodeforce')
 					for node in self.nodesets[self.results[res]['text']]:
 						nodeRes = ['  %04d' % (node)]
-						nodeRes.append(' %6.3E' % (self.mesh.nodes[node].solutions[self.name]['nodeforce'][6]))
+						row = self.mesh.results.rows[node]
+						nodeRes.append(' %6.3E' % (nodeforce[row,6]))
 						for xyz in range(6):
-							nodeRes.append(' %6.3E' % (self.mesh.nodes[node].solutions[self.name]['nodeforce'][xyz]))
+							nodeRes.append(' %6.3E' % (nodeforce[row,xyz]))
 						fobj.write(template2.format(*nodeRes)+'\n')
 						if ('plot' in self.results['nodeforce']) and \
 							(node in self.nodesets[self.results[res]['plot']]):
 							pass
 						else:
-							del self.mesh.nodes[node].solutions[self.name]['nodeforce']
+							self.mesh.results.remove(self.name,'nodeforce',row)
 					fobj.write(line22+'\n')
 
 				elif res == 'elementforce' and ('text' in self.results['elementforce']):
@@ -622,22 +610,23 @@ the force vector F.
 							fobj.write(template1.format(*elmRes)+'\n')
 						else:
 							elmRes = ['  %04d' % (element)]
+							nodal = self.mesh.elements[element].solutions[self.name]['strain']['nodal']
 							VonMises = 0.0
-							for node in range(len(self.mesh.elements[element].solutions[self.name]['strain']['nodal'])):
-								if self.mesh.elements[element].solutions[self.name]['strain']['nodal'][node+1]['VonMises'] > VonMises:
-									VonMises = self.mesh.elements[element].solutions[self.name]['strain']['nodal'][node+1]['VonMises']
-							MaxPrincipal = self.mesh.elements[element].solutions[self.name]['strain']['nodal'][1]['MaxPrinc']
-							for node in range(len(self.mesh.elements[element].solutions[self.name]['strain']['nodal'])):
-								if self.mesh.elements[element].solutions[self.name]['strain']['nodal'][node+1]['MaxPrinc'] > MaxPrincipal:
-									MaxPrincipal = self.mesh.elements[element].solutions[self.name]['strain']['nodal'][node+1]['MaxPrinc']
-							MinPrincipal = self.mesh.elements[element].solutions[self.name]['strain']['nodal'][1]['MinPrinc']
-							for node in range(len(self.mesh.elements[element].solutions[self.name]['strain']['nodal'])):
-								if self.mesh.elements[element].solutions[self.name]['strain']['nodal'][node+1]['MinPrinc'] < MinPrincipal:
-									MinPrincipal = self.mesh.elements[element].solutions[self.name]['strain']['nodal'][node+1]['MinPrinc']
-							MaxShear = self.mesh.elements[element].solutions[self.name]['strain']['nodal'][1]['MaxShear']
-							for node in range(len(self.mesh.elements[element].solutions[self.name]['strain']['nodal'])):
-								if self.mesh.elements[element].solutions[self.name]['strain']['nodal'][node+1]['MaxShear'] > MaxShear:
-									MaxShear = self.mesh.elements[element].solutions[self.name]['strain']['nodal'][node+1]['MaxShear']
+							for node in range(len(nodal)):
+								if nodal[node+1]['VonMises'] > VonMises:
+									VonMises = nodal[node+1]['VonMises']
+							MaxPrincipal = nodal[1]['MaxPrinc']
+							for node in range(len(nodal)):
+								if nodal[node+1]['MaxPrinc'] > MaxPrincipal:
+									MaxPrincipal = nodal[node+1]['MaxPrinc']
+							MinPrincipal = nodal[1]['MinPrinc']
+							for node in range(len(nodal)):
+								if nodal[node+1]['MinPrinc'] < MinPrincipal:
+									MinPrincipal = nodal[node+1]['MinPrinc']
+							MaxShear = nodal[1]['MaxShear']
+							for node in range(len(nodal)):
+								if nodal[node+1]['MaxShear'] > MaxShear:
+									MaxShear = nodal[node+1]['MaxShear']
 							elmRes.append(' %6.3E' % (VonMises))
 							elmRes.append(' %6.3E' % (MaxPrincipal))
 							elmRes.append(' %6.3E' % (MaxShear))
@@ -667,22 +656,23 @@ the force vector F.
 							fobj.write(template1.format(*elmRes)+'\n')
 						else:
 							elmRes = ['  %04d' % (element)]
+							nodal = self.mesh.elements[element].solutions[self.name]['stress']['nodal']
 							VonMises = 0.0
-							for node in range(len(self.mesh.elements[element].solutions[self.name]['stress']['nodal'])):
-								if self.mesh.elements[element].solutions[self.name]['stress']['nodal'][node+1]['VonMises'] > VonMises:
-									VonMises = self.mesh.elements[element].solutions[self.name]['stress']['nodal'][node+1]['VonMises']
-							MaxPrincipal = self.mesh.elements[element].solutions[self.name]['stress']['nodal'][1]['MaxPrinc']
-							for node in range(len(self.mesh.elements[element].solutions[self.name]['stress']['nodal'])):
-								if self.mesh.elements[element].solutions[self.name]['stress']['nodal'][node+1]['MaxPrinc'] > MaxPrincipal:
-									MaxPrincipal = self.mesh.elements[element].solutions[self.name]['stress']['nodal'][node+1]['MaxPrinc']
-							MinPrincipal = self.mesh.elements[element].solutions[self.name]['stress']['nodal'][1]['MinPrinc']
-							for node in range(len(self.mesh.elements[element].solutions[self.name]['stress']['nodal'])):
-								if self.mesh.elements[element].solutions[self.name]['stress']['nodal'][node+1]['MinPrinc'] < MinPrincipal:
-									MinPrincipal = self.mesh.elements[element].solutions[self.name]['stress']['nodal'][node+1]['MinPrinc']
-							MaxShear = self.mesh.elements[element].solutions[self.name]['stress']['nodal'][1]['MaxShear']
-							for node in range(len(self.mesh.elements[element].solutions[self.name]['stress']['nodal'])):
-								if self.mesh.elements[element].solutions[self.name]['stress']['nodal'][node+1]['MaxShear'] > MaxShear:
-									MaxShear = self.mesh.elements[element].solutions[self.name]['stress']['nodal'][node+1]['MaxShear']
+							for node in range(len(nodal)):
+								if nodal[node+1]['VonMises'] > VonMises:
+									VonMises = nodal[node+1]['VonMises']
+							MaxPrincipal = nodal[1]['MaxPrinc']
+							for node in range(len(nodal)):
+								if nodal[node+1]['MaxPrinc'] > MaxPrincipal:
+									MaxPrincipal = nodal[node+1]['MaxPrinc']
+							MinPrincipal = nodal[1]['MinPrinc']
+							for node in range(len(nodal)):
+								if nodal[node+1]['MinPrinc'] < MinPrincipal:
+									MinPrincipal = nodal[node+1]['MinPrinc']
+							MaxShear = nodal[1]['MaxShear']
+							for node in range(len(nodal)):
+								if nodal[node+1]['MaxShear'] > MaxShear:
+									MaxShear = nodal[node+1]['MaxShear']
 							elmRes.append(' %6.3E' % (VonMises))
 							elmRes.append(' %6.3E' % (MaxPrincipal))
 							elmRes.append(' %6.3E' % (MaxShear))
@@ -742,13 +732,12 @@ modified mass matrix, M_11.
 	def calcCenterOfMass(self):
 		'''
 	Calculate the center of mass for the
-	mesh used in this solution.
+	mesh used in this solution, from the
+	lumped masses at the nodes.
 	'''
-		self.mesh.centerOfMass = np.array([[0.],[0.],[0.]])
-		for element in self.mesh.elements:
-			for node in range(len(self.mesh.elements[element].nodes)):
-				self.mesh.centerOfMass += self.mesh.elements[element].M[0][0]*np.array(self.mesh.elements[element].nodes[node].coord)
-		self.mesh.centerOfMass = self.mesh.centerOfMass*(1.0/self.mesh.totalMass[0])
+		[nodes, mass] = self.mesh.mass.nodalMasses()
+		X = self.nodeCoordinates(nodes)
+		self.mesh.centerOfMass = mass.dot(X).reshape(3,1)*(1.0/self.mesh.totalMass[0])
 
 
 	def calcInertiaTensor(self):
@@ -757,49 +746,36 @@ modified mass matrix, M_11.
 	mesh used in this solution. Both about
 	the origin and about the center of mass.
 	'''
-		Ixx = 0.
-		Iyy = 0.
-		Izz = 0.
-		Ixy = 0.
-		Ixz = 0.
-		Iyz = 0.
-		for element in self.mesh.elements:
-			for node in range(len(self.mesh.elements[element].nodes)):
-				Ixx += self.mesh.elements[element].M[0][0]*(self.mesh.elements[element].nodes[node].coord[1][0]**2 + \
-															self.mesh.elements[element].nodes[node].coord[2][0]**2)
-				Iyy += self.mesh.elements[element].M[0][0]*(self.mesh.elements[element].nodes[node].coord[0][0]**2 + \
-															self.mesh.elements[element].nodes[node].coord[2][0]**2)
-				Izz += self.mesh.elements[element].M[0][0]*(self.mesh.elements[element].nodes[node].coord[0][0]**2 + \
-															self.mesh.elements[element].nodes[node].coord[1][0]**2)
-				Ixy += self.mesh.elements[element].M[0][0]*(self.mesh.elements[element].nodes[node].coord[0][0]*self.mesh.elements[element].nodes[node].coord[1][0])
-				Ixz += self.mesh.elements[element].M[0][0]*(self.mesh.elements[element].nodes[node].coord[0][0]*self.mesh.elements[element].nodes[node].coord[2][0])
-				Iyz += self.mesh.elements[element].M[0][0]*(self.mesh.elements[element].nodes[node].coord[1][0]*self.mesh.elements[element].nodes[node].coord[2][0])
-		self.mesh.inertiaOrigin = np.array([[ Ixx,-Ixy,-Ixz],
-											[-Ixy, Iyy,-Iyz],
-											[-Ixz,-Iyz, Izz]])
-		Ixx = 0.
-		Iyy = 0.
-		Izz = 0.
-		Ixy = 0.
-		Ixz = 0.
-		Iyz = 0.
-		for element in self.mesh.elements:
-			for node in range(len(self.mesh.elements[element].nodes)):
-				Ixx += self.mesh.elements[element].M[0][0]*((self.mesh.elements[element].nodes[node].coord[1][0]-self.mesh.centerOfMass[1][0])**2 + \
-															(self.mesh.elements[element].nodes[node].coord[2][0]-self.mesh.centerOfMass[2][0])**2)
-				Iyy += self.mesh.elements[element].M[0][0]*((self.mesh.elements[element].nodes[node].coord[0][0]-self.mesh.centerOfMass[0][0])**2 + \
-															(self.mesh.elements[element].nodes[node].coord[2][0]-self.mesh.centerOfMass[2][0])**2)
-				Izz += self.mesh.elements[element].M[0][0]*((self.mesh.elements[element].nodes[node].coord[0][0]-self.mesh.centerOfMass[0][0])**2 + \
-															(self.mesh.elements[element].nodes[node].coord[1][0]-self.mesh.centerOfMass[1][0])**2)
-				Ixy += self.mesh.elements[element].M[0][0]*((self.mesh.elements[element].nodes[node].coord[0][0]-self.mesh.centerOfMass[0][0])\
-														   *(self.mesh.elements[element].nodes[node].coord[1][0]-self.mesh.centerOfMass[1][0]))
-				Ixz += self.mesh.elements[element].M[0][0]*((self.mesh.elements[element].nodes[node].coord[0][0]-self.mesh.centerOfMass[0][0])\
-														   *(self.mesh.elements[element].nodes[node].coord[2][0]-self.mesh.centerOfMass[2][0]))
-				Iyz += self.mesh.elements[element].M[0][0]*((self.mesh.elements[element].nodes[node].coord[1][0]-self.mesh.centerOfMass[1][0])\
-														   *(self.mesh.elements[element].nodes[node].coord[2][0]-self.mesh.centerOfMass[2][0]))
-		self.mesh.inertiaCenterOfMass = np.array([[ Ixx,-Ixy,-Ixz],
-												  [-Ixy, Iyy,-Iyz],
-												  [-Ixz,-Iyz, Izz]])
+		[nodes, mass] = self.mesh.mass.nodalMasses()
+		X = self.nodeCoordinates(nodes)
+		self.mesh.inertiaOrigin = self.inertiaTensor(mass,X)
+		self.mesh.inertiaCenterOfMass = self.inertiaTensor(mass,X-self.mesh.centerOfMass.reshape(1,3))
+
+
+	def nodeCoordinates(self,nodes):
+		'''
+	Coordinates of nodes as a (nodes, 3) array.
+	'''
+		return np.array([[self.mesh.nodes[node].coord[0][0],
+						  self.mesh.nodes[node].coord[1][0],
+						  self.mesh.nodes[node].coord[2][0]] for node in nodes],dtype=float).reshape(-1,3)
+
+
+	def inertiaTensor(self,mass,X):
+		'''
+	Inertia tensor of point masses at
+	coordinates X (points, 3).
+	'''
+		[x, y, z] = [X[:,0], X[:,1], X[:,2]]
+		Ixx = mass.dot(y**2 + z**2)
+		Iyy = mass.dot(x**2 + z**2)
+		Izz = mass.dot(x**2 + y**2)
+		Ixy = mass.dot(x*y)
+		Ixz = mass.dot(x*z)
+		Iyz = mass.dot(y*z)
+		return np.array([[ Ixx,-Ixy,-Ixz],
+						 [-Ixy, Iyy,-Iyz],
+						 [-Ixz,-Iyz, Izz]])
 
 
 	def calcEigenvalues(self):
@@ -831,10 +807,14 @@ modified mass matrix, M_11.
 							  eigenmodes in the model
 							  corresponding to their
 							  eigenfrequencies.
+
+	The shift-invert operator (sigma = 0) uses the
+	factorization of K_11 in self.mesh.factorizations.
 	'''
+		factor = self.mesh.factorizations.factorize(self.K_11,self.fixedDOFs,self.MPCs,self.ties)
 		try:
 			self.eigenvalues, self.eigenvectors = sp.linalg.eigsh(self.K_11,self.results['modeshapes'],self.M_11,
-								sigma=0,which='LM',tol=1.0e-5,maxiter=10000)
+								sigma=0,which='LM',tol=1.0e-5,maxiter=10000,OPinv=factor.linearOperator())
 		except sp.linalg.ArpackNoConvergence as ee:
 			eigs = ee.eigenvalues
 			svecs = ee.eigenvectors
@@ -849,11 +829,29 @@ modified mass matrix, M_11.
 				self.eigenfrequencies.append(sqrt(self.eigenvalues[i])/(2.0*3.14159))
 
 		self.X = self.eigenvectors.copy()
-		for DOF in range(self.mesh.nDOFs):
-			if DOF not in self.fixedDOFs:
-				pass
-			else:
-				self.eigenvectors = np.insert(self.eigenvectors,DOF,0.,axis=0)
+		self.eigenvectors = self.partition.scatter(self.X,0.)
+
+
+	def degreeOfFreedomTable(self):
+		'''
+	Node and direction of every DOF of the mesh, as
+	arrays by DOF. The node is given as its row in
+	nodes, and the direction as 0 to 5 (X, Y, Z, ROTX,
+	ROTY, ROTZ).
+
+	Returns [nodes, node, direction].
+	'''
+		nodes = list(self.mesh.nodes)
+		NFAT = np.array([self.mesh.NFAT[node] for node in nodes],dtype=np.int64).reshape(-1,6) == 1
+		first = np.array([self.mesh.NFMT[node] for node in nodes],dtype=np.int64)
+		[row, direction] = np.nonzero(NFAT)
+		count = NFAT.sum(axis=1)
+		DOFs = first[row] + np.arange(len(row)) - np.repeat(np.cumsum(count)-count,count)
+		node = np.zeros(self.mesh.nDOFs,dtype=np.int64)
+		node[DOFs] = row
+		dofDirection = np.zeros(self.mesh.nDOFs,dtype=np.int64)
+		dofDirection[DOFs] = direction
+		return [nodes, node, dofDirection]
 
 
 	def calcModalEffectiveMass(self):
@@ -862,136 +860,40 @@ modified mass matrix, M_11.
 	every eigenmode in all six directions
 	(X, Y, Z, ROTX, ROTY, ROTZ) using the 
 	normalized eigenvectors.
+
+	The rigid body vectors R (one column per
+	direction) are set up about the center of
+	the fixed translational DOFs, and the
+	participation factors of all modes are
+	calculated at once.
+
+		m_eff = ( X^T M_11 R )^2
 	'''
-		nModes = self.results['modeshapes']
 		nDOFs = self.mesh.nDOFs+len(self.MPCs)
-		NFMT = self.mesh.NFMT
-		NFAT = self.mesh.NFAT
-
-		self.massOfFixedDOFs = np.zeros(3)
-		self.centerOfFixedDOFs = np.zeros(3)
-		x_count = 0
-		y_count = 0
-		z_count = 0
-		for DOF in self.fixedDOFs:
-			Nodes = sorted(NFMT.keys())
-			previous_node = Nodes[0]
-			for node in Nodes:
-				if previous_node == node:
-					pass
-				elif NFMT[previous_node] <= DOF < NFMT[node]:
-					dof_count = 0
-					for dof in range(6):
-						if NFAT[previous_node][dof] == 1:
-							if NFMT[previous_node]+dof_count == DOF:
-								if dof_count == 0:
-									self.centerOfFixedDOFs[0] += self.mesh.nodes[previous_node].coord[0][0]
-									self.massOfFixedDOFs[0] += self.mesh.M[DOF]
-									x_count += 1
-								elif dof_count == 1:
-									self.centerOfFixedDOFs[1] += self.mesh.nodes[previous_node].coord[1][0]
-									self.massOfFixedDOFs[1] += self.mesh.M[DOF]
-									y_count += 1
-								elif dof_count == 2:
-									self.centerOfFixedDOFs[2] += self.mesh.nodes[previous_node].coord[2][0]
-									self.massOfFixedDOFs[2] += self.mesh.M[DOF]
-									z_count += 1
-								else:
-									pass
-							dof_count += 1
-				elif node == Nodes[-1] and DOF > NFMT[node]:
-					dof_count = 0
-					for dof in range(6):
-						if NFAT[node][dof] == 1:
-							if NFMT[node]+dof_count == DOF:
-								if dof_count == 0:
-									self.centerOfFixedDOFs[0] += self.mesh.nodes[node].coord[0][0]
-									self.massOfFixedDOFs[0] += self.mesh.M[DOF]
-									x_count += 1
-								elif dof_count == 1:
-									self.centerOfFixedDOFs[1] += self.mesh.nodes[node].coord[1][0]
-									self.massOfFixedDOFs[1] += self.mesh.M[DOF]
-									y_count += 1
-								elif dof_count == 2:
-									self.centerOfFixedDOFs[2] += self.mesh.nodes[node].coord[2][0]
-									self.massOfFixedDOFs[2] += self.mesh.M[DOF]
-									z_count += 1
-								else:
-									pass
-							dof_count += 1
-				else:
-					pass
-				previous_node = node
-
-		if x_count != 0:
-			self.centerOfFixedDOFs[0] /= x_count
-		if y_count != 0:
-			self.centerOfFixedDOFs[1] /= y_count
-		if z_count != 0:
-			self.centerOfFixedDOFs[2] /= z_count
-		x_c0 = self.centerOfFixedDOFs[0]
-		y_c0 = self.centerOfFixedDOFs[1]
-		z_c0 = self.centerOfFixedDOFs[2]
-
-		# Define e, the 6x1 matrix with a single non-zero element
-		e = [np.array([[1.], [0.], [0.], [0.], [0.], [0.]]),
-			 np.array([[0.], [1.], [0.], [0.], [0.], [0.]]),
-			 np.array([[0.], [0.], [1.], [0.], [0.], [0.]]),
-			 np.array([[0.], [0.], [0.], [1.], [0.], [0.]]),
-			 np.array([[0.], [0.], [0.], [0.], [1.], [0.]]),
-			 np.array([[0.], [0.], [0.], [0.], [0.], [1.]])]
-
-		# Calculate the base excitation vectors
-		excitation_vectors = np.zeros((nDOFs,6))
-		for node in self.mesh.nodes:
-			dx = self.mesh.nodes[node].coord[0][0] - x_c0
-			dy = self.mesh.nodes[node].coord[1][0] - y_c0
-			dz = self.mesh.nodes[node].coord[2][0] - z_c0
-			v = np.array([[1., 0., 0., 0., dz, -dy],
-						  [0., 1., 0., -dz, 0., dx],
-						  [0., 0., 1., dy, -dx, 0.],
-						  [0., 0., 0., 1., 0., 0.],
-						  [0., 0., 0., 0., 1., 0.],
-						  [0., 0., 0., 0., 0., 1.]])
-			n_dof = 0
-			for dof in range(6):
-				if NFAT[node][dof] == 1:
-					DOF = NFMT[node] + n_dof
-					n_dof += 1
-					if dof == 0:
-						T = v.dot(e[0])
-						for i in range(6):
-							excitation_vectors[DOF][i] += T[i][0]
-					elif dof == 1:
-						T = v.dot(e[1])
-						for i in range(6):
-							excitation_vectors[DOF][i] += T[i][0]
-					elif dof == 2:
-						T = v.dot(e[2])
-						for i in range(6):
-							excitation_vectors[DOF][i] += T[i][0]
-					elif dof == 3:
-						T = v.dot(e[3])
-						excitation_vectors[DOF][dof] += T[dof][0]
-					elif dof == 4:
-						T = v.dot(e[4])
-						excitation_vectors[DOF][dof] += T[dof][0]
-					elif dof == 5:
-						T = v.dot(e[5])
-						excitation_vectors[DOF][dof] += T[dof][0]
-					else:
-						pass
-				else:
-					pass
-		excitation_vectors = excitation_vectors[self.index11]
-		excitation_vectors = excitation_vectors[:nDOFs-len(self.fixedDOFs)]
-		
+		[nodes, node, direction] = self.degreeOfFreedomTable()
+		X = self.nodeCoordinates(nodes)
+
+		# mass and center of the fixed DOFs in X, Y and Z
+		fixed = np.array(list(self.fixedDOFs),dtype=np.int64)
+		fixed = fixed[direction[fixed] < 3]
+		count = np.bincount(direction[fixed],minlength=3)
+		self.massOfFixedDOFs = np.bincount(direction[fixed],weights=self.mesh.M[fixed],minlength=3)
+		self.centerOfFixedDOFs = np.bincount(direction[fixed],weights=X[node[fixed],direction[fixed]],minlength=3)/np.maximum(count,1)
+
+		# rigid body vectors, rotations give the
+		# translations d x e_k at a node at a
+		# distance d from the center
+		DOFs = np.arange(self.mesh.nDOFs)
+		R = np.zeros((nDOFs,6))
+		R[DOFs,direction] = 1.
+		translation = DOFs[direction < 3]
+		d = X[node[translation]] - self.centerOfFixedDOFs
+		R[translation,3:] = np.cross(d,np.identity(3)[direction[translation]])
+		R = self.partition.restrict(R)
+
 		# Calculate the modal effective masses
-		self.modalMass = {}
-		for mode in range(nModes):
-			self.modalMass[mode+1] = [0., 0., 0., 0., 0., 0.]
-			for dof in range(6):
-				self.modalMass[mode+1][dof] = (self.X[:,mode] @ self.M_11 @ excitation_vectors[:,dof])**2
+		participation = self.X.T @ (self.M_11 @ R)
+		self.modalMass = dict(zip(range(1,self.X.shape[1]+1),(participation**2).tolist()))
 
 
 	def calcStrainEnergyDensity(self):
@@ -1117,11 +1019,26 @@ Results can be requested for displacement (comes
 as relative displacement if accelerated base),
 velocity, acceleration and a fourier transform
 of the acceleration.
+
+The modal equations are integrated with the Newmark
+method, or with the exact recursive Nigam-Jennings
+method if INTEGRATOR is set to NigamJennings in the
+*.sol-file. The latter is exact for forces that vary
+linearly between time steps, so coarser time tables
+can be used without losing accuracy. With INTEGRATOR
+set to FrequencyDomain the modal equations are solved
+with the fast fourier transform, and the fourier
+transform of the acceleration is taken directly from
+the modal spectra.
+
+self.integrator	- 'Newmark', 'NigamJennings' or
+				  'FrequencyDomain'
 '''
 	def __init__(self,name,mesh):
 		super(ModalDynamic,self).__init__(name,mesh)
 		self.type = 'ModalDynamic'
 		self.hasBaseMotion = False
+		self.integrator = 'Newmark'
 
 
 	def calcEigenvalues(self):
@@ -1153,56 +1070,46 @@ of the acceleration.
 							  eigenmodes in the model
 							  corresponding to their
 							  eigenfrequencies.
+
+	The shift-invert operator (sigma = 0) and the static
+	correction T1 for base motion use the factorization
+	of K_11 in self.mesh.factorizations.
   '''
+		factor = self.mesh.factorizations.factorize(self.K_11,self.fixedDOFs,self.MPCs,self.ties)
 		if self.hasBaseMotion:
 			# rearrange the stiffness and mass matrices
 			# with regards to the accelerated boundary DOFs
-			L = self.mesh.nDOFs+len(self.MPCs)						# total number of DOFs
 			M = self.mesh.nDOFs+len(self.MPCs)-len(self.fixedDOFs)	# number of internal DOFs
 			N = len(self.fixedDOFs)									# number of fixed DOFs
 
-			self.T1 = -sp.linalg.inv(self.K_11).dot(self.K_12)
+			# static constraint modes, T1 = -inv(K_11) K_12, are
+			# solved with the factorization of K_11 for a block of
+			# K_12 columns at a time and kept as a thin dense block
+			self.T1 = np.empty((M,N))
+			for start in range(0,N,256):
+				stop = min(start+256,N)
+				self.T1[:,start:stop] = -factor.solve(self.K_12[:,start:stop].toarray())
 			T2 = np.ones(M)
 			T2 = sp.diags(T2,0)
 			self.T2 = T2.tocsc()
-			TT_1 = 0
-			if N > 1:
-				TT_1 = np.ones(N)
-			else:
-				TT_1 = np.array([[1.]])
-			TT_1 = sp.diags(TT_1,0)
-			TT_1 = TT_1.tocsc()
-			TT_0 = sp.csc_matrix((N,M))
-			TT = sp.vstack([sp.hstack([TT_1,TT_0]),sp.hstack([self.T1,self.T2])])
-
-			M_q = sp.vstack([sp.hstack([self.M_22,self.M_12.T]),sp.hstack([self.M_12,self.M_11])])
-			m_q = TT.T.dot(M_q.dot(TT))
-			m_w2 = m_q[range(N)][:,range(N,m_q.shape[0])]
-			self.m_w2 = m_w2.T
-			self.m_ww = m_q[range(N,m_q.shape[0])][:,range(N,m_q.shape[0])]
-
-			K_q = sp.vstack([sp.hstack([self.K_22,self.K_12.T]),sp.hstack([self.K_12,self.K_11])])
-			k_q = TT.T.dot(K_q.dot(TT))
-			self.k_ww = k_q[range(N,m_q.shape[0])][:,range(N,m_q.shape[0])]
-			
-			try:
-				self.eigenvalues, self.eigenvectors = sp.linalg.eigsh(k_q[range(N,L)][:,range(N,L)],self.results['modeshapes'],m_q[range(N,L)][:,range(N,L)],
-										sigma=0,which='LM',tol=1.0e-5,maxiter=10000)
-			except sp.linalg.ArpackNoConvergence as ee:
-				eigs = ee.eigenvalues
-				svecs = ee.eigenvectors
-				output('only %d eigenvalues converged!' % len(eigs))
 
-		else:
-			# use the same constrained stiffness and 
-			# mass matrices that are used in a static solution
-			try:
-				self.eigenvalues, self.eigenvectors = sp.linalg.eigsh(self.K_11,self.results['modeshapes'],self.M_11,
-									sigma=0,which='LM',tol=1.0e-5,maxiter=10000)
-			except sp.linalg.ArpackNoConvergence as ee:
-				eigs = ee.eigenvalues
-				svecs = ee.eigenvectors
-				output('only %d eigenvalues converged!' % len(eigs))
+			# with the transformation TT = [[I, 0], [T1, T2]] only
+			# these blocks of TT^T M TT and TT^T K TT are needed,
+			# so they are calculated directly without forming TT
+			self.m_w2 = self.M_11.dot(self.T1) + self.M_12.toarray()
+			self.m_ww = self.M_11
+			self.k_ww = self.K_11
+
+		# the internal DOF blocks of the transformed matrices with
+		# base motion are the same constrained stiffness and mass
+		# matrices that are used in a static solution
+		try:
+			self.eigenvalues, self.eigenvectors = sp.linalg.eigsh(self.K_11,self.results['modeshapes'],self.M_11,
+								sigma=0,which='LM',tol=1.0e-5,maxiter=10000,OPinv=factor.linearOperator())
+		except sp.linalg.ArpackNoConvergence as ee:
+			eigs = ee.eigenvalues
+			svecs = ee.eigenvectors
+			output('only %d eigenvalues converged!' % len(eigs))
 
 		self.eigenfrequencies = []
 		for i in range(len(self.eigenvalues)):
@@ -1213,11 +1120,7 @@ of the acceleration.
 				self.eigenfrequencies.append(sqrt(self.eigenvalues[i])/(2.0*3.14159))
 
 		self.X = self.eigenvectors.copy()
-		for DOF in range(self.mesh.nDOFs):
-			if DOF not in self.fixedDOFs:
-				pass
-			else:
-				self.eigenvectors = np.insert(self.eigenvectors,DOF,0.,axis=0)
+		self.eigenvectors = self.partition.scatter(self.X,0.)
 
 
 	def assembleLoadVector(self):
@@ -1238,14 +1141,11 @@ of the acceleration.
 	'''
 		start_time = time.time()
 		print('assembling load vector...')
-		self.F = np.zeros((self.mesh.nDOFs+len(self.MPCs),1))
 		for j in self.loads:
 			if self.loads[j].type in ['Acceleration', 'ForceDynamic']:
-				self.loads[j].calcDegreeOfFreedomForces(self.mesh.nDOFs,self.mesh.NFMT)
+				self.loads[j].calcDegreeOfFreedomForces(self.mesh.NFMT)
 			else:
 				print('\n\tUNKNOWN LOAD TYPE FOR MODAL DYNAMICS:', self.loads[j].type)
-			for k in range(self.mesh.nDOFs):
-				self.F[k] += self.loads[j].F[k]
 
 			if self.loads[j].table.time[0] == 0.:
 				time_t = self.loads[j].table.time[-1]
@@ -1267,35 +1167,20 @@ of the acceleration.
 			else:
 				print('\n\tERROR!!!')
 				print('\n\tAcceleration/Force input table must start at time t = 0.')
+		self.F = loadVector(self.loads.values(),self.mesh.nDOFs+len(self.MPCs))
 		end_time = time.time()
 		print('finished: ', end_time-start_time)
 
 
-	def newmarkCoefficients(self,dt):
-		'''
-	Calculates the Newmark coefficients used
-	for iteration when calculating the displacements.
-	'''
-		alpha=0.25
-		beta=0.5
-
-		a0=1/(alpha*(dt**2))
-		a1=beta/(alpha*dt)
-		a2=1/(alpha*dt)
-		a3=(1/(2*alpha))-1
-		a4=(beta/alpha)-1
-		a5=(dt/2)*((beta/alpha)-2)
-		a6=dt*(1-beta)
-		a7=beta*dt
-
-		return [a0,a1,a2,a3,a4,a5,a6,a7]
-
-
-	def calcDisplacements(self):
+	def calcDisplacements(self,filename):
 		'''
 	Calculates displacements of only selected
 	nodes specified in *.sol-file, using modal
-	dynamics.
+	dynamics. The modal equations are integrated
+	a block of time steps at a time, and the
+	histories at the requested DOFs are written
+	to a HistoryStore in the array directory of
+	the *.out-file (filename) block by block.
 
 	self.K_11		- Stiffness matrix of model
 					  modified to exclude DOFs
@@ -1317,43 +1202,29 @@ of the acceleration.
 	q0				- Initial displacements in modal coordinates
 	dq_dt0			- Initial velocities in modal coordinates
 	Q				- Load vector in modal coordinates
+	self.histories	- HistoryStore with the requested
+					  time histories
 
 	'''
 		L = self.mesh.nDOFs+len(self.MPCs)
 		M = self.mesh.nDOFs+len(self.MPCs)-len(self.fixedDOFs)
 		N = len(self.fixedDOFs)
 		self.nModes = len(self.X[0])
-		evecs_s = sp.csc_matrix(self.X)
 		self.omega = np.sqrt(self.eigenvalues)
 
-		# declare variables
-		F_1 = 0
-		q0 = 0
-		dq_dt0 = 0
-		Q = 0
-
-		# set Newmark coefficients
-		[a0,a1,a2,a3,a4,a5,a6,a7] = self.newmarkCoefficients(self.dt)
+		# the modal equations are integrated
+		# for all modes at once
+		print('\tIntegrator:', self.integrator)
+		if self.integrator == 'NigamJennings':
+			integrator = NigamJenningsIntegrator(self.dt)
+		elif self.integrator == 'FrequencyDomain':
+			integrator = FrequencyDomainIntegrator(self.dt)
+		else:
+			integrator = NewmarkIntegrator(self.dt)
 
 		start_time = time.time()
 		print('setting damping ratio...')
-		# set damping ratio
-		for damp in self.dampings:
-			if len(self.dampings) > 1:
-				print('\n\tWARNING!!!\n\tMore than one damping specified for solution.')
-				print('\tWill use damping:', self.dampings[damp].name)
-			self.dampRatio = []
-			if self.dampings[damp].type == 'Viscous':
-				self.dampRatio = [self.dampings[damp].dampRatio for i in range(self.nModes)]
-			else:
-				for mode in range(self.nModes):
-					for freq in range(len(self.dampings[damp].table.frequency)):
-						if self.eigenfrequencies[mode] < self.dampings[damp].table.frequency[freq]:
-							self.dampRatio.append(self.dampings[damp].table.dampRatio[freq-1])
-							break
-						if freq == len(self.dampings[damp].table.frequency)-1:
-							self.dampRatio.append(self.dampings[damp].table.dampRatio[freq])
-			break
+		self.setDampingRatio()
 		end_time = time.time()
 		print('finished: ', end_time-start_time)
 
@@ -1361,26 +1232,18 @@ of the acceleration.
 		if self.hasBaseMotion:
 			# modal dynamics with base acceleration
 			A_2 = self.F[self.index11]
-			enf_dofs = self.index11[M:]
-			free_dofs = self.index11[:M]
 
 			start_time = time.time()
 			print('find velocity and displacement at base...')
 
 			# given base acceleration, use integration
 			# to find velocity and displacement at base
-			enf_accl = {}
-			enf_velc = {}
-			enf_disp = {}
-			for r in range(L):
-				if A_2[r][0] != 0.:
-					enf_accl[r] = A_2[r]*self.accel
-					enf_dv = cumtrapz(enf_accl[r])
-					enf_velc[r] = np.zeros(self.n)
-					enf_velc[r][1:self.n] = enf_dv*self.dt
-					enf_du = cumtrapz(enf_velc[r])
-					enf_disp[r] = np.zeros(self.n)
-					enf_disp[r][1:self.n] = enf_du*self.dt
+			enf_cols = [r-M for r in range(M,L) if A_2[r][0] != 0.]
+			enf_a = np.outer(self.accel,A_2[M:,0][enf_cols])
+			enf_v = np.zeros(enf_a.shape)
+			enf_v[1:self.n] = cumtrapz(enf_a,axis=0)*self.dt
+			enf_d = np.zeros(enf_a.shape)
+			enf_d[1:self.n] = cumtrapz(enf_v,axis=0)*self.dt
 
 			end_time = time.time()
 			print('finished: ', end_time-start_time)
@@ -1390,43 +1253,17 @@ of the acceleration.
 			# set up base acceleration, velocity and
 			# displacement vectors as sparse matrices
 			# because of all the zeros
-			a_row = []
-			a_col = []
-			a_data = []
-			v_row = []
-			v_col = []
-			v_data = []
-			d_row = []
-			d_col = []
-			d_data = []
-			for r in range(L):
-				if A_2[r][0] != 0.:
-					for c in range(self.n):
-						a_row.append(enf_dofs.index(self.index11[r]))
-						a_col.append(c)
-						a_data.append(enf_accl[r][c])
-						v_row.append(enf_dofs.index(self.index11[r]))
-						v_col.append(c)
-						v_data.append(enf_velc[r][c])
-						d_row.append(enf_dofs.index(self.index11[r]))
-						d_col.append(c)
-						d_data.append(enf_disp[r][c])
-			enf_accl = sp.coo_matrix((np.array(a_data),(np.array(a_col),np.array(a_row))),shape=(self.n,N))
-			enf_accl = enf_accl.tocsc()
-			enf_velc = sp.coo_matrix((np.array(v_data),(np.array(v_col),np.array(v_row))),shape=(self.n,N))
-			enf_velc = enf_velc.tocsc()
-			enf_disp = sp.coo_matrix((np.array(d_data),(np.array(d_col),np.array(d_row))),shape=(self.n,N))
-			enf_disp = enf_disp.tocsc()
-	
-			K_Q = evecs_s.T.dot(self.k_ww.dot(evecs_s))
-			K_Q = K_Q.tocsc()
-			M_Q = evecs_s.T.dot(self.m_ww.dot(evecs_s))
-			M_Q = M_Q.tocsc()
-			C_Q = np.zeros(self.nModes)
-			for i in range(self.nModes):
-				C_Q[i] = 2*self.dampRatio[i]*self.omega[i]
-			C_Q = sp.diags(C_Q,0)
-			C_Q = C_Q.tocsc()
+			rows = np.tile(np.arange(self.n),len(enf_cols))
+			cols = np.repeat(enf_cols,self.n)
+			enf_accl = sp.csr_matrix((enf_a.T.ravel(),(rows,cols)),shape=(self.n,N))
+			enf_velc = sp.csr_matrix((enf_v.T.ravel(),(rows,cols)),shape=(self.n,N))
+			enf_disp = sp.csr_matrix((enf_d.T.ravel(),(rows,cols)),shape=(self.n,N))
+
+			# the modal equations are uncoupled, so only
+			# the diagonals of the modal matrices are used
+			K_Q = self.X.T.dot(self.k_ww.dot(self.X)).diagonal()
+			M_Q = self.X.T.dot(self.m_ww.dot(self.X)).diagonal()
+			C_Q = 2.*np.array(self.dampRatio)*self.omega
 
 			end_time = time.time()
 			print('finished: ', end_time-start_time)
@@ -1555,243 +1392,131 @@ of the acceleration.
 			end_time = time.time()
 			print('finished: ', end_time-start_time)
 			
-			disp = {}
-			for dof in res_dofs['displacement']:
-				disp[dof] = np.zeros((self.n,1))
-			velc = {}
-			for dof in res_dofs['velocity']:
-				velc[dof] = np.zeros((self.n,1))
-			accl = {}
-			for dof in res_dofs['acceleration']:
-				accl[dof] = np.zeros((self.n,1))
-
-			q   = np.zeros((self.nModes,1))
-			qd  = np.zeros((self.nModes,1))
-			qdd = np.zeros((self.nModes,1))
-			qn  = np.zeros((self.nModes,1))
-
-			KH = K_Q+a0*M_Q+a1*C_Q
-
-			start_time = time.time()
-			print('invert KH...')			
-			
-			inv_KH = sp.linalg.inv(KH)
-			inv_KH_diag = np.zeros(self.nModes)
-			for i in range(self.nModes):
-				inv_KH_diag[i]=inv_KH[i,i]
+			# DOFs of the base motion, from the first node
+			# of the first boundary
+			node_DOFs = ['X', 'Y', 'Z', 'RX', 'RY', 'RZ']
+			self.base_disp = {}
+			self.base_accel = {}
+			base_dofs = {}
+			for bound in self.boundaries:
+				for node in self.boundaries[bound].nodeset:
+					m = 0
+					for nfs in range(6):
+						if self.mesh.nodes[node].NFS[nfs] == 1:
+							base_dofs[node_DOFs[nfs]] = self.mesh.NFMT[node]+m
+							m += 1
+					break
+				break
 
-			end_time = time.time()
-			print('finished: ', end_time-start_time)
+			# one history for every requested result at a node
+			# DOF, and for the base motion (node 0)
+			columns = []
+			for [result, histories] in [['displacement', self.displacement],
+										['velocity', self.velocity],
+										['acceleration', self.acceleration],
+										['frf_accel', self.frf_accel]]:
+				for node in histories:
+					for dof in histories[node]:
+						columns.append((result, node, dof))
+			for dof in base_dofs:
+				columns.append(('base_disp', 0, dof))
+				columns.append(('base_accel', 0, dof))
+			self.histories = HistoryStore(ResultArchive(filename+'.out').path(self.name+'_histories'),columns,self.n)
 
 			start_time = time.time()
 			print('calculate response in modal coordinates...')			
 
-			disp_indices = {dof: free_dofs.index(dof) for dof in res_dofs['displacement']}
-			velc_indices = {dof: free_dofs.index(dof) for dof in res_dofs['velocity']}
-			accl_indices = {dof: free_dofs.index(dof) for dof in res_dofs['acceleration']}
-
-			n_min1 = self.n-1
-			for i in range(n_min1):
-
-				FP = -evecs_s.T.dot(self.m_w2.dot(enf_accl[i,:].T))
-				FH = M_Q.dot(a0*q+a2*qd+a3*qdd)+C_Q.dot(a1*q+a4*qd+a5*qdd)
-				for dof in range(self.nModes):
-					FH[dof] += FP[dof]
-
-				for dof in range(self.nModes):
-					qn[dof] = inv_KH_diag[dof]*FH[dof]
-
-				qddn = a0*(qn-q)-a2*qd-a3*qdd
-				qdn = qd+a6*qdd+a7*qddn
-
-				for dof in range(self.nModes):
-					q[dof]   = qn[dof]
-					qd[dof]  = qdn[dof]
-					qdd[dof] = qddn[dof]
-
-				for dof in res_dofs['displacement']:
-					disp[dof][i+1] = evecs_s[disp_indices[dof]].dot(q)
-				for dof in res_dofs['velocity']:
-					velc[dof][i+1] = evecs_s[velc_indices[dof]].dot(qd)
-				for dof in res_dofs['acceleration']:
-					accl[dof][i+1] = evecs_s[accl_indices[dof]].dot(qdd)
-
-#				for dof in res_dofs['displacement']:
-#					disp[dof][i+1] = evecs_s[free_dofs.index(dof)].dot(q)
-#				for dof in res_dofs['velocity']:
-#					velc[dof][i+1] = evecs_s[free_dofs.index(dof)].dot(qd)
-#				for dof in res_dofs['acceleration']:
-#					accl[dof][i+1] = evecs_s[free_dofs.index(dof)].dot(qdd)
-
-			end_time = time.time()
-			print('finished: ', end_time-start_time)
-			
-			start_time = time.time()
-			print('transform response from modal to real coordinates...')			
-			# set up acceleration, velocity and
-			# displacement vectors for all dofs as
-			# sparse matrices because of all the zeros
-			# needed to transform back using self.TT
-			# here in the form of self.T1 and self.T2
-			a_row = []
-			a_col = []
-			a_data = []
-			v_row = []
-			v_col = []
-			v_data = []
-			d_row = []
-			d_col = []
-			d_data = []
-			for r in range(M):
-				if free_dofs[r] in disp:
-					for c in range(self.n):
-						d_row.append(r)
-						d_col.append(c)
-						d_data.append(disp[free_dofs[r]][c][0])
-				if free_dofs[r] in velc:
-					for c in range(self.n):
-						v_row.append(r)
-						v_col.append(c)
-						v_data.append(velc[free_dofs[r]][c][0])
-				if free_dofs[r] in accl:
-					for c in range(self.n):
-						a_row.append(r)
-						a_col.append(c)
-						a_data.append(accl[free_dofs[r]][c][0])
-			disp = sp.coo_matrix((np.array(d_data),(np.array(d_col),np.array(d_row))),shape=(self.n,M))
-			disp = disp.tocsc()
-			velc = sp.coo_matrix((np.array(v_data),(np.array(v_col),np.array(v_row))),shape=(self.n,M))
-			velc = velc.tocsc()
-			accl = sp.coo_matrix((np.array(a_data),(np.array(a_col),np.array(a_row))),shape=(self.n,M))
-			accl = accl.tocsc()
-
-			dT = self.T1.dot(enf_disp.T) + self.T2.dot(disp.T)
-			vT = self.T1.dot(enf_velc.T) + self.T2.dot(velc.T)
-			aT = self.T1.dot(enf_accl.T) + self.T2.dot(accl.T)
-
-			ZdT = sp.hstack([dT.T,enf_disp])
-			ZdT = ZdT.tocsc()
-			ZvT = sp.hstack([vT.T,enf_velc])
-			ZvT = ZvT.tocsc()
-			ZaT = sp.hstack([aT.T,enf_accl])
-			ZaT = ZaT.tocsc()
+			# modal forces from the base acceleration at the same
+			# time steps as the response, for one block at a time
+			W = self.m_w2.T.dot(self.X)
+			def modalForces():
+				for start in range(0,self.n,self.histories.chunk):
+					stop = min(start+self.histories.chunk,self.n)
+					yield -enf_accl[start:stop].dot(W).T
+
+			# transform the response from modal to real
+			# coordinates and write it, one block at a time
+			start = 0
+			for [q, qd, qdd] in integrator.blocks(M_Q,C_Q,K_Q,modalForces()):
+				stop = start+q.shape[1]
+				disp = self.baseMotionResponse(res_dofs['displacement'],q,enf_disp[start:stop])
+				velc = self.baseMotionResponse(res_dofs['velocity'],qd,enf_velc[start:stop])
+				accl = self.baseMotionResponse(res_dofs['acceleration'],qdd,enf_accl[start:stop])
+				base_disp = self.baseMotionResponse(list(base_dofs.values()),q,enf_disp[start:stop])
+				base_accel = self.baseMotionResponse(list(base_dofs.values()),qdd,enf_accl[start:stop])
+				block = np.empty((len(columns),stop-start))
+				for i in range(len(columns)):
+					[result, node, dof] = columns[i]
+					if result == 'displacement':
+						block[i] = disp[self.displacement[node][dof]][:,0]
+						if dof in base_dofs:
+							block[i] -= base_disp[base_dofs[dof]][:,0]
+					elif result == 'velocity':
+						block[i] = velc[self.velocity[node][dof]][:,0]
+					elif result == 'acceleration':
+						block[i] = accl[self.acceleration[node][dof]][:,0]
+					elif result == 'frf_accel':
+						block[i] = accl[self.frf_accel[node][dof]][:,0]
+					elif result == 'base_disp':
+						block[i] = base_disp[base_dofs[dof]][:,0]
+					else:
+						block[i] = base_accel[base_dofs[dof]][:,0]
+				self.histories.append(block)
+				start = stop
 
 			end_time = time.time()
 			print('finished: ', end_time-start_time)
 			
-			start_time = time.time()
-			print('save results to file...')			
-
 			# save requested results to
 			# solution to be written in
 			# *.out-file
-			self.base_disp = {}
-			self.base_accel = {}
-			node_DOFs = ['X', 'Y', 'Z', 'RX', 'RY', 'RZ']
-			for bound in self.boundaries:
-				for node in self.boundaries[bound].nodeset:
-					m = 0
-					for nfs in range(6):
-						if self.mesh.nodes[node].NFS[nfs] == 1:
-							self.base_disp[node_DOFs[nfs]] = ZdT[:,self.index11[M+m]].toarray()
-							self.base_accel[node_DOFs[nfs]] = ZaT[:,self.index11[M+m]].toarray()
-							m += 1
-					break
-				break
-			for node in self.displacement:
-				for dof in self.displacement[node]:
-					if dof in self.base_disp:
-						self.displacement[node][dof] = ZdT[:,self.index11.index(self.displacement[node][dof])].toarray()-self.base_disp[dof]
-					else:
-						self.displacement[node][dof] = ZdT[:,self.index11.index(self.displacement[node][dof])].toarray()
-			for node in self.velocity:
-				for dof in self.velocity[node]:
-					self.velocity[node][dof] = ZvT[:,self.index11.index(self.velocity[node][dof])].toarray()
-			for node in self.acceleration:
-				for dof in self.acceleration[node]:
-					self.acceleration[node][dof] = ZaT[:,self.index11.index(self.acceleration[node][dof])].toarray()
+			for dof in base_dofs:
+				self.base_disp[dof] = self.histories.column(('base_disp', 0, dof))
+				self.base_accel[dof] = self.histories.column(('base_accel', 0, dof))
+			for [result, histories] in [['displacement', self.displacement],
+										['velocity', self.velocity],
+										['acceleration', self.acceleration]]:
+				for node in histories:
+					for dof in histories[node]:
+						histories[node][dof] = self.histories.column((result, node, dof))
 			# include base motion acceleration in results
 			self.acceleration[0] = {}
 			for dof in self.base_accel:
 				self.acceleration[0][dof] = self.base_accel[dof]
+			if self.integrator == 'FrequencyDomain':
+				# spectrum of the absolute acceleration from the
+				# modal spectra and the spectrum of the base motion
+				nf = integrator.spectrum.shape[1]
+				rows = np.tile(np.arange(nf),len(enf_cols))
+				cols = np.repeat(enf_cols,nf)
+				enf_spec = sp.csc_matrix((integrator.spectrumOf(enf_a,axis=0).T.ravel(),(rows,cols)),shape=(nf,N))
+				frf_dofs = sorted(set([self.frf_accel[node][dof] for node in self.frf_accel for dof in self.frf_accel[node]]))
+				spectrum = self.baseMotionResponse(frf_dofs,integrator.spectrum,enf_spec)
 			for node in self.frf_accel:
 				for dof in self.frf_accel[node]:
-					self.frf_accel[node][dof] = {'MAGN': fwdFFT(ZaT[:,self.index11.index(self.frf_accel[node][dof])].toarray())[3]}
+					if self.integrator == 'FrequencyDomain':
+						self.frf_accel[node][dof] = {'MAGN': list(np.abs(spectrum[self.frf_accel[node][dof]][:,0]))}
+					else:
+						self.frf_accel[node][dof] = {'MAGN': fwdFFT(self.histories.history(('frf_accel', node, dof)))[3]}
 					if not hasattr(self,'freq'):
 						self.freq = (1./self.dt)/2.
 						self.df = self.freq/len(self.frf_accel[node][dof]['MAGN'])
 						self.f = np.arange(0., self.freq, self.df)
-			end_time = time.time()
-			print('finished: ', end_time-start_time)
 
 
 		else:
 			# modal dynamics with dynamic load
 			# applied somewhere other than base
 			F_1 = self.F[self.index11[:M]]
-			row = []
-			col = []
-			data = []
-			for r in range(M):
-				for c in range(self.n):
-					if F_1[r][0] != 0.:
-						row.append(r)
-						col.append(c)
-						data.append(F_1[r][0]*self.force[c])
-			F_1 = sp.coo_matrix((np.array(data),(np.array(row),np.array(col))),shape=(M,self.n))
-			F_1 = F_1.tocsc()
 
 			init_disp = np.zeros((self.mesh.nDOFs-len(self.fixedDOFs)+len(self.MPCs),1))
 			init_velc = np.zeros((self.mesh.nDOFs-len(self.fixedDOFs)+len(self.MPCs),1))
 
-			q0 = evecs_s.T.dot(self.M_11).dot(init_disp)
-			dq_dt0 = evecs_s.T.dot(self.M_11).dot(init_velc)
-			Q = evecs_s.T.dot(F_1)
-
-			ksi = []
-			d = []
-			KH = []
-			FH = []
-			for i in range(self.nModes):
-				ksi.append(self.dampRatio[i])
-				d.append(2.*ksi[i]*self.omega[i])
-				KH.append(self.omega[i]**2 + a0 + a1*2.*ksi[i]*self.omega[i])
-				FH.append(0.)
-
-			q = []
-			dq_dt = []
-			d2q_dt2 = []
-			if self.hasBaseMotion:
-				for i in range(self.nModes):
-					q.append([])
-					q[i].append(0.)
-					dq_dt.append([])
-					dq_dt[i].append(0.)
-					d2q_dt2.append([])
-					d2q_dt2[i].append(0.)
-			else:
-				for i in range(self.nModes):
-					q.append([])
-					q[i].append(q0[i][0])
-					dq_dt.append([])
-					dq_dt[i].append(dq_dt0[i][0])
-					d2q_dt2.append([])
-					d2q_dt2[i].append(0.)
-
-			for j in range(1,self.n):
-				for i in range(self.nModes):
-					V1 = a1*q[i][j-1] + a4*dq_dt[i][j-1] + a5*d2q_dt2[i][j-1]
-					V2 = a0*q[i][j-1] + a2*dq_dt[i][j-1] + a3*d2q_dt2[i][j-1]
-
-					CV = d[i]*V1
-					FH[i] = Q[i,j] + V2 + CV
+			q0 = self.X.T.dot(self.M_11.dot(init_disp))
+			dq_dt0 = self.X.T.dot(self.M_11.dot(init_velc))
 
-					q[i].append(FH[i]/KH[i])
-					d2q_dt2[i].append(a0*(q[i][j]-q[i][j-1])-a2*dq_dt[i][j-1]-a3*d2q_dt2[i][j-1])
-					dq_dt[i].append(dq_dt[i][j-1]+a6*d2q_dt2[i][j-1]+a7*d2q_dt2[i][j])
-
-
-			# save the requested results
+			# save the requested results, first as
+			# DOFs and then as responses at the DOFs
 			self.displacement = {}
 			self.velocity = {}
 			self.acceleration = {}
@@ -1827,39 +1552,29 @@ of the acceleration.
 									if only_one_dof:
 										if self.results[result]['result DOF']-1 == nfs:
 											if result == 'displacement':
-												self.displacement[node][node_DOFs[nfs]] = self.eigenvectors[self.mesh.NFMT[node]+m].dot(q)
+												self.displacement[node][node_DOFs[nfs]] = self.mesh.NFMT[node]+m
 											elif result == 'velocity':
-												self.velocity[node][node_DOFs[nfs]] = self.eigenvectors[self.mesh.NFMT[node]+m].dot(dq_dt)
+												self.velocity[node][node_DOFs[nfs]] = self.mesh.NFMT[node]+m
 											elif result == 'acceleration':
-												self.acceleration[node][node_DOFs[nfs]] = self.eigenvectors[self.mesh.NFMT[node]+m].dot(d2q_dt2)
+												self.acceleration[node][node_DOFs[nfs]] = self.mesh.NFMT[node]+m
 											elif result == 'frf_accel':
 												if node_DOFs[nfs] not in self.acceleration[node]:
-													self.acceleration[node][node_DOFs[nfs]] = self.eigenvectors[self.mesh.NFMT[node]+m].dot(d2q_dt2)
-												[X, REAL, IMAG, MAGN, PHASE] = fwdFFT(self.acceleration[node][node_DOFs[nfs]])
-												self.frf_accel[node][node_DOFs[nfs]] = {'MAGN': MAGN}
-												if not hasattr(self,'freq'):
-													self.freq = (1./self.dt)/2.
-													self.df = self.freq/len(self.frf_accel[node][node_DOFs[nfs]]['MAGN'])
-													self.f = np.arange(0., self.freq, self.df)
+													self.acceleration[node][node_DOFs[nfs]] = self.mesh.NFMT[node]+m
+												self.frf_accel[node][node_DOFs[nfs]] = self.mesh.NFMT[node]+m
 											else:
 												print('\n\tERROR:\n\tType of result not supported:', result)
 											break
 									else:
 										if result == 'displacement':
-											self.displacement[node][node_DOFs[nfs]] = self.eigenvectors[self.mesh.NFMT[node]+m].dot(q)
+											self.displacement[node][node_DOFs[nfs]] = self.mesh.NFMT[node]+m
 										elif result == 'velocity':
-											self.velocity[node][node_DOFs[nfs]] = self.eigenvectors[self.mesh.NFMT[node]+m].dot(dq_dt)
+											self.velocity[node][node_DOFs[nfs]] = self.mesh.NFMT[node]+m
 										elif result == 'acceleration':
-											self.acceleration[node][node_DOFs[nfs]] = self.eigenvectors[self.mesh.NFMT[node]+m].dot(d2q_dt2)
+											self.acceleration[node][node_DOFs[nfs]] = self.mesh.NFMT[node]+m
 										elif result == 'frf_accel':
 											if node_DOFs[nfs] not in self.acceleration[node]:
-												self.acceleration[node][node_DOFs[nfs]] = self.eigenvectors[self.mesh.NFMT[node]+m].dot(d2q_dt2)
-											[X, REAL, IMAG, MAGN, PHASE] = fwdFFT(self.acceleration[node][node_DOFs[nfs]])
-											self.frf_accel[node][node_DOFs[nfs]] = {'MAGN': MAGN, 'PHASE': PHASE}
-											if not hasattr(self,'freq'):
-												self.freq = (1./self.dt)/2.
-												self.df = self.freq/len(self.frf_accel[node][node_DOFs[nfs]]['MAGN'])
-												self.f = np.arange(0., self.freq, self.df)
+												self.acceleration[node][node_DOFs[nfs]] = self.mesh.NFMT[node]+m
+											self.frf_accel[node][node_DOFs[nfs]] = self.mesh.NFMT[node]+m
 										else:
 											print('\n\tERROR:\n\tType of result not supported:', result)
 									m += 1
@@ -1869,6 +1584,64 @@ of the acceleration.
 				else:
 					pass
 
+			# one history for every requested result at a node DOF
+			columns = []
+			for [result, histories] in [['displacement', self.displacement],
+										['velocity', self.velocity],
+										['acceleration', self.acceleration]]:
+				for node in histories:
+					for dof in histories[node]:
+						columns.append((result, node, dof))
+			self.histories = HistoryStore(ResultArchive(filename+'.out').path(self.name+'_histories'),columns,self.n)
+
+			# the load vector is scaled by the force table, so
+			# the modal forces of a block of time steps are an
+			# outer product of the modal load vector and the table
+			Q = self.X.T.dot(F_1[:,0])
+			def modalForces():
+				for start in range(0,self.n,self.histories.chunk):
+					yield np.outer(Q,self.force[start:start+self.histories.chunk])
+
+			# transform the modal responses back to the requested
+			# DOFs and write them, one block of time steps at a time
+			dofs = {}
+			for [result, histories] in [['displacement', self.displacement],
+										['velocity', self.velocity],
+										['acceleration', self.acceleration]]:
+				dofs[result] = sorted(set([histories[node][dof] for node in histories for dof in histories[node]]))
+			rows = [dofs[result].index(DOF) for [result, DOF] in \
+						[[result, getattr(self,result)[node][dof]] for [result, node, dof] in columns]]
+
+			# modal masses are one (mass normalized eigenvectors)
+			d = 2.*np.array(self.dampRatio)*self.omega
+			for [q, dq_dt, d2q_dt2] in integrator.blocks(np.ones(self.nModes),d,self.omega**2,modalForces(),q0[:,0],dq_dt0[:,0]):
+				block = np.empty((len(columns),q.shape[1]))
+				response = {}
+				for [result, modal] in [['displacement', q], ['velocity', dq_dt], ['acceleration', d2q_dt2]]:
+					response[result] = self.eigenvectors[dofs[result]].dot(modal)
+				for i in range(len(columns)):
+					block[i] = response[columns[i][0]][rows[i]]
+				self.histories.append(block)
+
+			for [result, node, dof] in columns:
+				getattr(self,result)[node][dof] = self.histories.column((result, node, dof))
+			if self.integrator == 'FrequencyDomain':
+				# spectrum of the acceleration from the modal spectra
+				rows = sorted(set([self.frf_accel[node][dof] for node in self.frf_accel for dof in self.frf_accel[node]]))
+				spectrum = dict(zip(rows, self.eigenvectors[rows].dot(integrator.spectrum)))
+			for node in self.frf_accel:
+				for dof in self.frf_accel[node]:
+					if self.integrator == 'FrequencyDomain':
+						X = spectrum[self.frf_accel[node][dof]]
+						[MAGN, PHASE] = [list(np.abs(X)), list(np.degrees(np.angle(X)))]
+					else:
+						[X, REAL, IMAG, MAGN, PHASE] = fwdFFT(self.histories.history(('acceleration', node, dof)))
+					self.frf_accel[node][dof] = {'MAGN': MAGN, 'PHASE': PHASE}
+					if not hasattr(self,'freq'):
+						self.freq = (1./self.dt)/2.
+						self.df = self.freq/len(self.frf_accel[node][dof]['MAGN'])
+						self.f = np.arange(0., self.freq, self.df)
+
 		# delete some matrices so the *.out-file
 		# doesn't become unneccesarily big
 		if hasattr(self,'T1'):
@@ -1883,16 +1656,70 @@ of the acceleration.
 			del self.k_ww
 
 
+	def setDampingRatio(self):
+		'''
+	Set the damping ratio of every mode from the damping
+	of the solution, either one viscous damping ratio
+	for all modes or a damping ratio table, where the
+	damping ratio depends on the eigenfrequency.
+
+	self.dampRatio	- Damping ratio of each mode
+					  (zero without damping).
+	'''
+		self.dampRatio = [0. for i in range(self.nModes)]
+		for damp in self.dampings:
+			if len(self.dampings) > 1:
+				print('\n\tWARNING!!!\n\tMore than one damping specified for solution.')
+				print('\tWill use damping:', self.dampings[damp].name)
+			self.dampRatio = []
+			if self.dampings[damp].type == 'Viscous':
+				self.dampRatio = [self.dampings[damp].dampRatio for i in range(self.nModes)]
+			else:
+				for mode in range(self.nModes):
+					for freq in range(len(self.dampings[damp].table.frequency)):
+						if self.eigenfrequencies[mode] < self.dampings[damp].table.frequency[freq]:
+							self.dampRatio.append(self.dampings[damp].table.dampRatio[freq-1])
+							break
+						if freq == len(self.dampings[damp].table.frequency)-1:
+							self.dampRatio.append(self.dampings[damp].table.dampRatio[freq])
+			break
+
+
+	def baseMotionResponse(self,dofs,q,enf):
+		'''
+	Transform a modal response q (modes, time steps) and
+	the enforced base motion enf (time steps, enforced
+	DOFs) back to the DOFs listed in dofs, with one
+	matrix product for all of them.
+
+		u = X q + T1 enf		(internal DOFs)
+		u = enf					(enforced DOFs)
+
+	Returns a (time steps, 1) array for every DOF.
+	'''
+		M = len(self.X)
+		cols = self.partition.position[dofs].tolist()
+		free = [col for col in cols if col < M]
+		u_free = self.X[free].dot(q) + enf.dot(self.T1[free].T).T
+		u = {}
+		for i in range(len(dofs)):
+			if cols[i] < M:
+				u[dofs[i]] = u_free[free.index(cols[i])].reshape(-1,1)
+			else:
+				u[dofs[i]] = enf[:,cols[i]-M].toarray()
+		return u
+
+
 	def exportToCSV(self,filename):
 		'''
-	Writes requested results to *.csv-file.
+	Writes requested results to *.csv-file. The time
+	histories are read from the history store one block
+	of time steps at a time and written as rows of text.
 	'''
 		# write results to *.csv file if
 		# user requested results in text
 		text_nodes = []
 		text_result = []
-		has_time = False
-		has_frf = False
 		for result in self.results:
 			if result in ['displacement', 'velocity', 'acceleration', 'frf_accel']:
 				if 'text' in self.results[result]:
@@ -1901,100 +1728,59 @@ of the acceleration.
 						text_nodes.append(node)
 
 		if len(text_nodes) != 0:
-			write_to_csv = {}
-			for node in self.displacement:
-				if node in text_nodes and 'displacement' in text_result:
-					if has_time == False:
-						has_time = True
-					if 'displacement' not in write_to_csv:
-						write_to_csv['displacement'] = {}
-					if node not in write_to_csv['displacement']:
-						write_to_csv['displacement'][node] = {}
-					for dof in self.displacement[node]:
-						write_to_csv['displacement'][node][dof] = self.displacement[node][dof]
-			for node in self.velocity:
-				if node in text_nodes and 'velocity' in text_result:
-					if has_time == False:
-						has_time = True
-					if 'velocity' not in write_to_csv:
-						write_to_csv['velocity'] = {}
-					if node not in write_to_csv['velocity']:
-						write_to_csv['velocity'][node] = {}
-					for dof in self.velocity[node]:
-						write_to_csv['velocity'][node][dof] = self.velocity[node][dof]
-			for node in self.acceleration:
-				if node in text_nodes and 'acceleration' in text_result:
-					if has_time == False:
-						has_time = True
-					if 'acceleration' not in write_to_csv:
-						write_to_csv['acceleration'] = {}
-					if node not in write_to_csv['acceleration']:
-						write_to_csv['acceleration'][node] = {}
-					for dof in self.acceleration[node]:
-						write_to_csv['acceleration'][node][dof] = self.acceleration[node][dof]
-				if 0 in self.acceleration:
-					write_to_csv['acceleration'][0] = {}
-					for dof in self.acceleration[0]:
-						write_to_csv['acceleration'][0][dof] = self.acceleration[0][dof]
-			for node in self.frf_accel:
-				if node in text_nodes and 'frf_accel' in text_result:
-					if has_frf == False:
-						has_frf = True
-					if 'frf_accel' not in write_to_csv:
-						write_to_csv['frf_accel'] = {}
-					if node not in write_to_csv['frf_accel']:
-						write_to_csv['frf_accel'][node] = {}
-					for dof in self.frf_accel[node]:
-						write_to_csv['frf_accel'][node][dof] = self.frf_accel[node][dof]
+			# histories (label in the history store) and
+			# spectra written to file, with the enforced
+			# base acceleration (node 0) after the nodes
+			histories = []
+			spectra = []
+			for result in ['displacement', 'velocity', 'acceleration']:
+				if result in text_result:
+					for node in getattr(self,result):
+						if node in text_nodes and node != 0:
+							for dof in getattr(self,result)[node]:
+								histories.append([result+'_node_'+str(node)+'_'+dof, (result, node, dof)])
+			if 'acceleration' in text_result and 0 in self.acceleration:
+				for dof in self.acceleration[0]:
+					histories.append(['acceleration_node_0_'+dof, ('base_accel', 0, dof)])
+			if 'frf_accel' in text_result:
+				for node in self.frf_accel:
+					if node in text_nodes:
+						for dof in self.frf_accel[node]:
+							spectra.append(['frf_accel_node_'+str(node)+'_'+dof, self.frf_accel[node][dof]['MAGN']])
+			has_time = len(histories) != 0
+			has_frf = len(spectra) != 0
 
 			if os.path.exists(filename+'.csv'):
 				print('\n\tOverwriting '+filename+'.csv')
 			fobj = open(filename+'.csv', 'w')
+			header = []
 			if has_time:
-				fobj.write('time')
+				header.append('time')
 			if has_frf:
-				if has_time:
-					fobj.write(',freq')
-				else:
-					fobj.write('freq')
-			for res in write_to_csv:
-				if res in text_result:
-					for node in write_to_csv[res]:
-						if node in text_nodes or node == 0:
-							for dof in write_to_csv[res][node]:
-								fobj.write(','+res+'_node_'+str(node)+'_'+dof)
-			fobj.write('\n')
+				header.append('freq')
+			header += [column[0] for column in histories+spectra]
+			fobj.write(','.join(header)+'\n')
+
+			# rows of the frequency lines, then one '---'
+			# for every spectrum column below them
 			n_f = 0
 			if hasattr(self,'f'):
 				n_f = len(self.f)
-			for n in range(self.n):
-				if has_time:
-						fobj.write(str(self.t[n]))
-				if has_frf:
-					if has_time:
-						if n < n_f:
-							fobj.write(','+str(self.f[n]))
-						else:
-							fobj.write(',---')
-					else:
-						if n < n_f:
-							fobj.write(str(self.f[n]))
-						else:
-							fobj.write('---')
-				for res in write_to_csv:
-					for node in write_to_csv[res]:
-						for dof in write_to_csv[res][node]:
-							if res in ['displacement', 'velocity', 'acceleration']:
-								if self.hasBaseMotion:
-									fobj.write(','+str(write_to_csv[res][node][dof][n][0]))
-								else:
-									fobj.write(','+str(write_to_csv[res][node][dof][n]))
-							else:
-								if n < n_f:
-									fobj.write(','+str(write_to_csv[res][node][dof]['MAGN'][n]))
-								else:
-									fobj.write(',---')
-				fobj.write('\n')
+			frequencies = []
+			if has_frf:
+				frequencies = [[str(f)]+[str(column[1][n]) for column in spectra] for f, n in zip(np.asarray(self.f).tolist(),range(n_f))]
+			tail = ['---' for i in range(len(spectra)+1)] if has_frf else []
+			time = np.asarray(self.t).tolist()
+			blocks = self.histories.blocks([column[1] for column in histories]) if has_time else []
+
+			n = 0
+			for block in blocks:
+				for row in block.tolist():
+					spectrum = frequencies[n] if n < len(frequencies) else tail
+					fobj.write(','.join([str(time[n])]+spectrum[:1]+list(map(str,row))+spectrum[1:])+'\n')
+					n += 1
+			for n in range(n,self.n):
+				fobj.write(','.join(frequencies[n] if n < len(frequencies) else tail)+'\n')
 			fobj.close()
 
 
@@ -2002,3 +1788,222 @@ of the acceleration.
 
 
 
+class FrequencyResponse(ModalDynamic):
+	'''
+Modal frequency response solver. Calculates the
+steady state response to harmonic loads with the
+eigenmodes of the model, for all frequency lines
+and all modes at once. Takes dynamic forces with
+fixed nodes boundary condition, or applies a harmonic
+acceleration to fixed nodes boundary condition. The
+amplitudes are taken from the loads, so load tables
+are not used.
+
+Results can be requested for displacement and
+velocity (relative to the base if accelerated base),
+acceleration and frf_accel (both absolute). They are
+stored as magnitude and phase (degrees) for every
+frequency line in self.f.
+
+self.frequencies	- [first frequency, last frequency,
+					  number of frequency lines] from the
+					  *.sol-file, or None to use the lines
+					  from defaultFrequencyLines().
+self.f				- Frequency lines (Hz).
+'''
+	def __init__(self,name,mesh):
+		super(FrequencyResponse,self).__init__(name,mesh)
+		self.type = 'FrequencyResponse'
+		self.frequencies = None
+
+
+	def assembleLoadVector(self):
+		'''
+	Assemble the load vector of harmonic load
+	amplitudes from loads defined in the input file.
+	'''
+		for j in self.loads:
+			if self.loads[j].type in ['Acceleration', 'ForceDynamic']:
+				self.loads[j].calcDegreeOfFreedomForces(self.mesh.NFMT)
+			else:
+				print('\n\tUNKNOWN LOAD TYPE FOR FREQUENCY RESPONSE:', self.loads[j].type)
+		self.F = loadVector(self.loads.values(),self.mesh.nDOFs+len(self.MPCs))
+
+
+	def resultDOFs(self):
+		'''
+	DOFs of the nodes where results are requested in
+	the *.sol-file (plot and text), returned as
+	{result: {node: {dof: DOF number}}}.
+	'''
+		node_DOFs = ['X', 'Y', 'Z', 'RX', 'RY', 'RZ']
+		dofs = {}
+		for result in self.results:
+			if result in ['displacement', 'velocity', 'acceleration', 'frf_accel']:
+				dofs[result] = {}
+				only_one_dof = 'result DOF' in self.results[result]
+				for pltxt in ['plot', 'text']:
+					if pltxt not in self.results[result]:
+						continue
+					for node in self.nodesets[self.results[result][pltxt]]:
+						if only_one_dof and self.mesh.NFAT[node][self.results[result]['result DOF']-1] != 1:
+							print('\n\tWARNING:\n\tSelected DOF for results at node', node, 'is not available')
+							print('\tfor this type of element. Calculating results for all DOFs in node.')
+						dofs[result][node] = {}
+						m = 0
+						for nfs in range(6):
+							if self.mesh.nodes[node].NFS[nfs] == 1:
+								if not only_one_dof or self.results[result]['result DOF']-1 == nfs or \
+										self.mesh.NFAT[node][self.results[result]['result DOF']-1] != 1:
+									dofs[result][node][node_DOFs[nfs]] = self.mesh.NFMT[node]+m
+								m += 1
+		return dofs
+
+
+	def calcFrequencyResponse(self):
+		'''
+	Calculates the steady state response at the
+	requested DOFs for all frequency lines. With mass
+	normalized eigenvectors the modal response to a
+	harmonic modal load p is
+
+		q(W) = p/(w^2 - W^2 + 2i*zeta*w*W)
+
+	which is evaluated as one (frequency lines, modes)
+	array. Displacements are then X q, velocities
+	iW X q and accelerations -W^2 X q. With base
+	motion, p is the modal load from a unit harmonic
+	base acceleration, and the base acceleration
+	(T1 times the enforced acceleration) is added to
+	the accelerations.
+
+	self.X			- Eigenvectors excluding DOFs
+					  listed in self.fixedDOFs.
+	self.omega		- Circular eigenfrequencies.
+	self.dampRatio	- Damping ratio of each mode.
+	H				- Modal transfer functions
+					  (frequency lines, modes).
+	'''
+		M = self.mesh.nDOFs+len(self.MPCs)-len(self.fixedDOFs)
+		N = len(self.fixedDOFs)
+		self.nModes = len(self.X[0])
+		self.omega = np.sqrt(np.abs(self.eigenvalues))
+		self.setDampingRatio()
+
+		if 0. in self.dampRatio:
+			print('\n\tWARNING:\n\tNo damping for', self.dampRatio.count(0.), 'of the modes in solution', self.name)
+			print('\tThe response is infinite at the eigenfrequencies of those modes.')
+		if self.frequencies is None:
+			self.f = self.defaultFrequencyLines()
+		else:
+			self.f = np.linspace(self.frequencies[0],self.frequencies[1],self.frequencies[2])
+		self.freq = self.f[-1]
+		self.df = np.min(np.diff(self.f)) if len(self.f) > 1 else 0.
+		W = 2.*np.pi*self.f
+
+		zeta = np.array(self.dampRatio)
+		H = 1./(self.omega**2 - W[:,None]**2 + 2j*zeta*self.omega*W[:,None])
+
+		dofs = self.resultDOFs()
+		responses = {}
+		if self.hasBaseMotion:
+			# modal load from the enforced base acceleration
+			A_2 = self.F[self.index11][M:,0]
+			p = -self.X.T.dot(self.m_w2.dot(A_2))
+			q = (H*p).T
+
+			# the enforced acceleration is the same
+			# for every frequency line
+			enf_cols = np.nonzero(A_2)[0]
+			rows = np.tile(np.arange(len(W)),len(enf_cols))
+			cols = np.repeat(enf_cols,len(W))
+			enf_accl = sp.csc_matrix((np.repeat(A_2[enf_cols],len(W)),(rows,cols)),shape=(len(W),N))
+			no_enf = sp.csc_matrix((len(W),N))
+			for result in dofs:
+				rows = sorted(set([dofs[result][node][dof] for node in dofs[result] for dof in dofs[result][node]]))
+				if result == 'displacement':
+					responses[result] = self.baseMotionResponse(rows,q,no_enf)
+				elif result == 'velocity':
+					responses[result] = self.baseMotionResponse(rows,1j*W*q,no_enf)
+				else:
+					responses[result] = self.baseMotionResponse(rows,-W**2*q,enf_accl)
+		else:
+			F_1 = self.F[self.index11[:M]][:,0]
+			q = (H*self.X.T.dot(F_1)).T
+			for result in dofs:
+				rows = sorted(set([dofs[result][node][dof] for node in dofs[result] for dof in dofs[result][node]]))
+				u = self.eigenvectors[rows].dot(q)
+				if result == 'velocity':
+					u = 1j*W*u
+				elif result in ['acceleration', 'frf_accel']:
+					u = -W**2*u
+				responses[result] = dict(zip(rows,u))
+
+		# save magnitude and phase of the
+		# requested results at every DOF
+		self.displacement = {}
+		self.velocity = {}
+		self.acceleration = {}
+		self.frf_accel = {}
+		for result in dofs:
+			for node in dofs[result]:
+				getattr(self,result)[node] = {}
+				for dof in dofs[result][node]:
+					u = np.ravel(responses[result][dofs[result][node][dof]])
+					getattr(self,result)[node][dof] = {'MAGN': np.abs(u), 'PHASE': np.degrees(np.angle(u))}
+
+		# delete some matrices so the *.out-file
+		# doesn't become unneccesarily big
+		for matrix in ['T1', 'T2', 'm_ww', 'm_w2', 'k_ww']:
+			if hasattr(self,matrix):
+				delattr(self,matrix)
+
+
+	def defaultFrequencyLines(self,lines=1000,spread=0.25,modeLines=21):
+		'''
+	Frequency lines used when FREQUENCIES is not given.
+	lines are spaced evenly from 0 Hz to the highest
+	eigenfrequency plus spread, and modeLines more are
+	placed over two half-power bandwidths (2 zeta fn,
+	but at least 1% of fn) on each side of every
+	eigenfrequency, so that the peaks of the low modes
+	are resolved too. Lines on the eigenfrequency of an
+	undamped mode are left out.
+	'''
+		fn = self.omega/(2.*np.pi)
+		f = [np.linspace(0.,(1.+spread)*max(fn),lines)]
+		for mode in range(self.nModes):
+			if fn[mode] > 0.:
+				offsets = np.linspace(-2.,2.,modeLines)
+				if self.dampRatio[mode] == 0.:
+					offsets = offsets[offsets != 0.]
+				f.append(fn[mode]*(1.+2.*max(self.dampRatio[mode],0.005)*offsets))
+		return np.unique(np.concatenate(f))
+
+
+	def exportToCSV(self,filename):
+		'''
+	Writes requested results to *.csv-file, with
+	magnitude and phase for every frequency line.
+	'''
+		columns = []
+		for result in ['displacement', 'velocity', 'acceleration', 'frf_accel']:
+			if result in self.results and 'text' in self.results[result]:
+				for node in self.nodesets[self.results[result]['text']]:
+					for dof in getattr(self,result)[node]:
+						columns.append([result+'_node_'+str(node)+'_'+dof, getattr(self,result)[node][dof]])
+
+		if len(columns) != 0:
+			if os.path.exists(filename+'.csv'):
+				print('\n\tOverwriting '+filename+'.csv')
+			fobj = open(filename+'.csv', 'w')
+			fobj.write('freq')
+			for column in columns:
+				fobj.write(','+column[0]+'_MAGN,'+column[0]+'_PHASE')
+			fobj.write('\n')
+			for n in range(len(self.f)):
+				fobj.write(str(self.f[n]))
+				for column in columns:
+					fobj.write(','+str(column[1]['MAGN'][n])+','+str(column[1]['PHASE'][n]))
+				fobj.write('\n')
+			fobj.close()